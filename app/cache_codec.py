@@ -0,0 +1,165 @@
+"""Compact serialization for values stored in Redis.
+
+Every encoded value starts with a tag byte describing how the rest was
+written, so the serializer or compression can be changed without flushing
+the cache::
+
+    0b1CCC_FFFF   high bit always set, CCC = compression, FFFF = format
+
+Entries written before the codec existed are plain JSON text, whose first
+byte is always ASCII (high bit clear), so they are still decoded as JSON.
+"""
+import json
+import zlib
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+FORMAT_JSON = 1
+FORMAT_MSGPACK = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+_TAG_MARKER = 0x80
+
+_FORMATS = {"json": FORMAT_JSON, "msgpack": FORMAT_MSGPACK}
+_COMPRESSIONS = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "zstd": COMPRESSION_ZSTD}
+
+
+class CodecError(ValueError):
+    """Raised when a cached value cannot be decoded."""
+
+
+def _dumps_json(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def _loads_json(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class CacheCodec:
+    """Encode cache values to tagged bytes and decode them back."""
+
+    def __init__(
+        self,
+        serializer: str = "json",
+        compression: str = "zlib",
+        compress_threshold: int = 1024,
+    ):
+        """Initialize the codec.
+
+        Args:
+            serializer: ``json`` (orjson when installed) or ``msgpack``
+            compression: ``none``, ``zlib`` or ``zstd``
+            compress_threshold: Serialized payloads shorter than this many
+                bytes are stored uncompressed
+
+        Raises:
+            ValueError: If the serializer or compression is unknown or its
+                package is not installed
+        """
+        if serializer not in _FORMATS:
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        if compression not in _COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+        if serializer == "msgpack" and msgpack is None:
+            raise ValueError("Cache serializer 'msgpack' requires the msgpack package")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("Cache compression 'zstd' requires the zstandard package")
+
+        self.serializer = serializer
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+        self._format = _FORMATS[serializer]
+        self._compression = _COMPRESSIONS[compression]
+        self._zstd_compressor = zstandard.ZstdCompressor() if self._compression == COMPRESSION_ZSTD else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize ``value`` and prepend its tag byte.
+
+        Args:
+            value: JSON-compatible value
+
+        Returns:
+            Encoded bytes, compressed if they exceed the threshold
+        """
+        if self._format == FORMAT_MSGPACK:
+            body = msgpack.packb(value, use_bin_type=True)
+        else:
+            body = _dumps_json(value)
+
+        compression = COMPRESSION_NONE
+        if self._compression != COMPRESSION_NONE and len(body) >= self.compress_threshold:
+            compression = self._compression
+            if compression == COMPRESSION_ZLIB:
+                body = zlib.compress(body)
+            else:
+                body = self._zstd_compressor.compress(body)
+
+        return bytes((_TAG_MARKER | compression << 4 | self._format,)) + body
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        """Decode a value written by any codec configuration, or legacy JSON.
+
+        Args:
+            data: Raw value read from Redis
+
+        Returns:
+            The decoded value
+
+        Raises:
+            CodecError: If the tag is unknown or the payload is corrupt
+        """
+        if isinstance(data, str) or not data or not data[0] & _TAG_MARKER:
+            # Plain JSON written before values were tagged
+            try:
+                return _loads_json(data)
+            except ValueError as e:
+                raise CodecError(f"Invalid legacy JSON cache value: {e}") from e
+
+        tag = data[0]
+        compression = (tag >> 4) & 0x07
+        value_format = tag & 0x0F
+        body = data[1:]
+        try:
+            if compression == COMPRESSION_ZLIB:
+                body = zlib.decompress(body)
+            elif compression == COMPRESSION_ZSTD:
+                if zstandard is None:
+                    raise CodecError("Cache value is zstd-compressed but zstandard is not installed")
+                body = self._zstd_decompressor.decompress(body)
+            elif compression != COMPRESSION_NONE:
+                raise CodecError(f"Unknown cache compression tag: {compression}")
+
+            if value_format == FORMAT_JSON:
+                return _loads_json(body)
+            if value_format == FORMAT_MSGPACK:
+                if msgpack is None:
+                    raise CodecError("Cache value is msgpack-encoded but msgpack is not installed")
+                return msgpack.unpackb(body, raw=False)
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Corrupt cache value: {e}") from e
+        raise CodecError(f"Unknown cache format tag: {value_format}")
@@ -0,0 +1,123 @@
+import os
+
+# Application settings, read once from the environment at import time.
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1.0"))
+
+# Circuit breaker guarding Redis: after this many consecutive failures the
+# cache is bypassed for REDIS_BREAKER_RESET_SECONDS before a trial request.
+REDIS_BREAKER_FAILURE_THRESHOLD = int(os.getenv("REDIS_BREAKER_FAILURE_THRESHOLD", "3"))
+REDIS_BREAKER_RESET_SECONDS = float(os.getenv("REDIS_BREAKER_RESET_SECONDS", "30"))
+
+# TheMealDB API root; point it at a local stand-in (benchmarks/fake_mealdb.py)
+# for offline load tests
+MEALDB_BASE_URL = os.getenv("MEALDB_BASE_URL", "https://www.themealdb.com/api/json/v1/1")
+MEALDB_MAX_CONNECTIONS = int(os.getenv("MEALDB_MAX_CONNECTIONS", "20"))
+MEALDB_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("MEALDB_MAX_KEEPALIVE_CONNECTIONS", "10"))
+MEALDB_KEEPALIVE_EXPIRY = float(os.getenv("MEALDB_KEEPALIVE_EXPIRY", "30"))
+
+# Database for recipes: sqlite:///... or postgresql://... An async driver
+# (sqlite+aiosqlite:///..., postgresql+asyncpg://...) makes request handlers
+# use AsyncSession; plain URLs keep the sync Session. Startup schema work
+# always runs synchronously.
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./recipes.db")
+
+# Schema migrations (see app/migrations.py). Deploys that run
+# ``python -m app.migrations upgrade`` once can turn off the startup run.
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Whether the seed migration adds the sample recipes to an empty database
+SEED_INITIAL_RECIPES = os.getenv("SEED_INITIAL_RECIPES", "true").lower() in ("1", "true", "yes")
+
+# SQLite connection profile (see app/sqlite_tuning.py): "default" keeps
+# SQLite's defaults; "tuned" enables WAL and the pragmas below and, with a
+# read pool size above 0, sends writes to one writer connection and reads
+# to a pool of read-only connections
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# How long a request waits for the single writer connection
+SQLITE_WRITER_TIMEOUT_SECONDS = float(os.getenv("SQLITE_WRITER_TIMEOUT_SECONDS", "30"))
+
+# PostgreSQL connection pool (see app/postgres.py), per process. Size it so
+# that workers x containers x (size + overflow) stays under max_connections.
+POSTGRES_POOL_SIZE = int(os.getenv("POSTGRES_POOL_SIZE", "10"))
+POSTGRES_MAX_OVERFLOW = int(os.getenv("POSTGRES_MAX_OVERFLOW", "10"))
+POSTGRES_POOL_TIMEOUT_SECONDS = float(os.getenv("POSTGRES_POOL_TIMEOUT_SECONDS", "10"))
+# Recycle connections before server or proxy idle timeouts drop them
+POSTGRES_POOL_RECYCLE_SECONDS = int(os.getenv("POSTGRES_POOL_RECYCLE_SECONDS", "1800"))
+
+# Recipe storage: "sqlite" reads through a session per request; "snapshot"
+# loads recipes.db into memory at startup and serves reads from it, with
+# writes still going to SQLite (see app/snapshot.py)
+REPOSITORY_MODE = os.getenv("REPOSITORY_MODE", "sqlite")
+
+# GET /recipes keyset pagination
+RECIPES_DEFAULT_PAGE_SIZE = int(os.getenv("RECIPES_DEFAULT_PAGE_SIZE", "100"))
+RECIPES_MAX_PAGE_SIZE = int(os.getenv("RECIPES_MAX_PAGE_SIZE", "1000"))
+
+# GET /recipes/export streaming
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# POST /recipes/bulk
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+BULK_MAX_BATCH_SIZE = int(os.getenv("BULK_MAX_BATCH_SIZE", "5000"))
+
+# MealDB search cache
+MEALDB_CACHE_TTL_SECONDS = int(os.getenv("MEALDB_CACHE_TTL_SECONDS", "86400"))
+# TTL for queries TheMealDB has no results for
+MEALDB_NEGATIVE_CACHE_TTL_SECONDS = int(os.getenv("MEALDB_NEGATIVE_CACHE_TTL_SECONDS", "900"))
+# Stampede protection: one worker refills a missing key under a short lease
+# while the others poll the cache for up to MEALDB_REFILL_WAIT_SECONDS.
+MEALDB_REFILL_LEASE_MS = int(os.getenv("MEALDB_REFILL_LEASE_MS", "15000"))
+MEALDB_REFILL_WAIT_SECONDS = float(os.getenv("MEALDB_REFILL_WAIT_SECONDS", "5"))
+MEALDB_REFILL_POLL_SECONDS = float(os.getenv("MEALDB_REFILL_POLL_SECONDS", "0.05"))
+# XFetch early refresh aggressiveness (0 disables, >1 refreshes earlier)
+MEALDB_XFETCH_BETA = float(os.getenv("MEALDB_XFETCH_BETA", "1.0"))
+# In-process L1 cache of built search results in front of Redis
+MEALDB_L1_MAXSIZE = int(os.getenv("MEALDB_L1_MAXSIZE", "512"))
+MEALDB_L1_TTL_SECONDS = float(os.getenv("MEALDB_L1_TTL_SECONDS", "60"))
+# Redis pub/sub channel used to evict L1 entries in other workers
+MEALDB_INVALIDATION_CHANNEL = os.getenv("MEALDB_INVALIDATION_CHANNEL", "mealdb_cache_invalidate")
+# Encoding of values stored in Redis (see app/cache_codec.py): json|msgpack,
+# and none|zlib|zstd compression for payloads of at least the threshold size
+REDIS_CACHE_SERIALIZER = os.getenv("REDIS_CACHE_SERIALIZER", "json")
+REDIS_CACHE_COMPRESSION = os.getenv("REDIS_CACHE_COMPRESSION", "zlib")
+REDIS_CACHE_COMPRESS_THRESHOLD = int(os.getenv("REDIS_CACHE_COMPRESS_THRESHOLD", "1024"))
+
+# Rendered GET /recipes/search responses, keyed on the normalized query and
+# the internal data version. The TTL bounds how stale the MealDB half of a
+# response can get, like the L1 cache above.
+SEARCH_RESPONSE_CACHE_MAXSIZE = int(os.getenv("SEARCH_RESPONSE_CACHE_MAXSIZE", "1024"))
+SEARCH_RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_RESPONSE_CACHE_TTL_SECONDS", "60"))
+
+# GET /recipes/by-ingredients: MealDB recipes kept in the per-process
+# ingredient index, and the default/maximum number of results
+MEALDB_INGREDIENT_INDEX_MAXSIZE = int(os.getenv("MEALDB_INGREDIENT_INDEX_MAXSIZE", "10000"))
+INGREDIENT_SEARCH_DEFAULT_LIMIT = int(os.getenv("INGREDIENT_SEARCH_DEFAULT_LIMIT", "50"))
+INGREDIENT_SEARCH_MAX_LIMIT = int(os.getenv("INGREDIENT_SEARCH_MAX_LIMIT", "500"))
+
+# Facet counts for GET /recipes?facets=true, keyed on the data version and
+# filters (the TTL only bounds memory; writes change the key)
+FACET_CACHE_MAXSIZE = int(os.getenv("FACET_CACHE_MAXSIZE", "256"))
+FACET_CACHE_TTL_SECONDS = float(os.getenv("FACET_CACHE_TTL_SECONDS", "300"))
+
+# Request profiling (see app/profiling.py), off by default. When on, a
+# PROFILE_SAMPLE_RATE fraction of requests is run under cProfile, and those
+# plus any request slower than PROFILE_SLOW_REQUEST_MS (0 disables) are kept
+# with their span breakdown in a buffer of the last PROFILE_BUFFER_SIZE,
+# served at /debug/profiles.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "1000"))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))
+
+# Request capture for traffic replay (see app/request_log.py), off unless a
+# path is set. Each worker appends one JSON line per recorded request;
+# bodies up to REQUEST_LOG_MAX_BODY_BYTES are kept (0 keeps none).
+REQUEST_LOG_PATH = os.getenv("REQUEST_LOG_PATH", "")
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "1.0"))
+REQUEST_LOG_MAX_BODY_BYTES = int(os.getenv("REQUEST_LOG_MAX_BODY_BYTES", "0"))
@@ -1,41 +1,173 @@
-from typing import List
+import functools
+from typing import AsyncIterator, List, Optional, Tuple
+from app import config
 from app.models import Recipe
-from sqlalchemy import create_engine, Column, Integer, String, JSON
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-import json
+from app.ingredients import INGREDIENTS_TABLE
+from app.postgres import create_postgres_engine, pool_options, trigram_index_exists
+from app.search_index import fts_index_exists
+from app.sqlite_tuning import ReadWriteSession, create_sqlite_engines, install_pragmas, tuned_pragmas
 
-# SQLAlchemy setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./recipes.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async driver for each backend, and the sync driver used for startup work
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def sync_database_url(url: str) -> URL:
+    """``url`` with any async driver swapped for the backend's default one."""
+    parsed = make_url(url)
+    if parsed.get_driver_name() in ASYNC_DRIVERS.values():
+        return parsed.set(drivername=parsed.get_backend_name())
+    return parsed
+
+
+def async_database_url(url: str) -> URL:
+    """``url`` with the backend's async driver (aiosqlite or asyncpg)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for database backend: {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def _connect_args(url: URL) -> dict:
+    # SQLite connections are shared with the threadpool
+    return {"check_same_thread": False} if url.get_backend_name() == "sqlite" else {}
+
+
+# SQLAlchemy setup. Importing this module never connects: engines and
+# session factories are created on first use, and the schema is created and
+# upgraded by app/migrations.py. DATABASE_URL with an async driver
+# (sqlite+aiosqlite://, postgresql+asyncpg://) makes request handlers use the
+# async engine; migrations always go through the sync one.
+SQLALCHEMY_DATABASE_URL = sync_database_url(config.DATABASE_URL)
+ASYNC_DATABASE = make_url(config.DATABASE_URL).get_driver_name() in ASYNC_DRIVERS.values()
+POSTGRES = SQLALCHEMY_DATABASE_URL.get_backend_name() == "postgresql"
 Base = declarative_base()
 
+# JSON text on SQLite, binary JSONB on PostgreSQL
+JSON_DOCUMENT = JSON().with_variant(JSONB(), "postgresql")
+
 # SQLAlchemy model
 class RecipeDB(Base):
     __tablename__ = "recipes"
+    __table_args__ = (
+        # Facet filters; id last so filtered keyset pages need no extra sort
+        Index("ix_recipes_cuisine_difficulty", "cuisine", "difficulty", "id"),
+        Index("ix_recipes_difficulty", "difficulty", "id"),
+        # Never reuse the id of a deleted recipe (as InMemoryRecipeRepository
+        # does not): ETags, cached entries and logged requests name ids
+        {"sqlite_autoincrement": True},
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    ingredients = Column(JSON)  # Store as JSON string
-    steps = Column(JSON)  # Store as JSON string
+    ingredients = Column(JSON_DOCUMENT)  # Store as JSON string
+    steps = Column(JSON_DOCUMENT)  # Store as JSON string
     prepTime = Column(String)
     cookTime = Column(String)
     difficulty = Column(String)
     cuisine = Column(String)
+    # prepTime/cookTime parsed at write time (see app/facets.parse_minutes)
+    prep_minutes = Column(Integer, index=True)
+    cook_minutes = Column(Integer)
+
+# Normalized ingredients, one row per (recipe, ingredient name, index term);
+# see app/ingredients.py
+class RecipeIngredientDB(Base):
+    __tablename__ = INGREDIENTS_TABLE
+    __table_args__ = (
+        # Covers the whole by-ingredients ranking query
+        Index("ix_recipe_ingredients_term", "term", "recipe_id", "name", "ingredient_count"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    term = Column(String, nullable=False)
+    # Distinct ingredients in the recipe, repeated on each row
+    ingredient_count = Column(Integer, nullable=False)
+
+# Single-row counter bumped by every write to the recipes table; cached
+# responses derived from recipe data are keyed on it
+class DataVersionDB(Base):
+    __tablename__ = "data_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+@functools.lru_cache(maxsize=None)
+def get_engines() -> Tuple[Engine, Optional[Engine]]:
+    """Create the sync engines on first use.
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+    PostgreSQL gets a pooled engine (see app/postgres.py). For SQLite,
+    SQLITE_PROFILE picks the pragmas and whether reads use a separate
+    read-only pool (see app/sqlite_tuning.py).
+
+    Returns:
+        ``(engine, read_engine)``; ``read_engine`` is None unless reads and
+        writes are split
+    """
+    if POSTGRES:
+        return create_postgres_engine(SQLALCHEMY_DATABASE_URL), None
+    return create_sqlite_engines(SQLALCHEMY_DATABASE_URL, config.SQLITE_PROFILE, config.SQLITE_READ_POOL_SIZE)
+
+def get_engine() -> Engine:
+    """The engine for writes and schema work, created on first use."""
+    return get_engines()[0]
+
+@functools.lru_cache(maxsize=None)
+def get_sessionmaker() -> sessionmaker:
+    """Session factory on the sync engines, created on first use."""
+    engine, read_engine = get_engines()
+    if read_engine is not None:
+        return sessionmaker(
+            class_=ReadWriteSession, autocommit=False, autoflush=False, writer=engine, reader=read_engine
+        )
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@functools.lru_cache(maxsize=None)
+def fts_enabled() -> bool:
+    """Whether the FTS5 index exists; checked once per process, after migrations."""
+    return fts_index_exists(get_engine())
+
+@functools.lru_cache(maxsize=None)
+def trigram_enabled() -> bool:
+    """Whether the pg_trgm title index exists; checked once per process, after migrations."""
+    return trigram_index_exists(get_engine())
 
 # Dependency to get database session
 def get_db() -> Session:
-    db = SessionLocal()
+    db = get_sessionmaker()()
     try:
         yield db
     finally:
         db.close()
 
-# Initial seed data for backward compatibility
+@functools.lru_cache(maxsize=None)
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Session factory on the async engine, created on first use.
+
+    Sessions keep loaded attributes after commit, since an async session
+    cannot lazily reload them.
+    """
+    url = async_database_url(config.DATABASE_URL)
+    options = pool_options() if url.get_backend_name() == "postgresql" else {}
+    async_engine = create_async_engine(url, connect_args=_connect_args(url), **options)
+    if url.get_backend_name() == "sqlite" and config.SQLITE_PROFILE == "tuned":
+        install_pragmas(async_engine.sync_engine, tuned_pragmas())
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Async dependency to get database session
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+# Recipes seeded into a new database (see app/migrations.py)
 initial_recipes: List[Recipe] = [
     Recipe(
         id=1,
@@ -60,28 +192,3 @@ initial_recipes: List[Recipe] = [
         source="internal",
     ),
 ]
-
-# Initialize database with seed data if empty
-def init_db():
-    db = SessionLocal()
-    try:
-        # Check if recipes table is empty
-        if db.query(RecipeDB).count() == 0:
-            for recipe in initial_recipes:
-                db_recipe = RecipeDB(
-                    id=recipe.id,
-                    title=recipe.title,
-                    ingredients=recipe.ingredients,
-                    steps=recipe.steps,
-                    prepTime=recipe.prepTime,
-                    cookTime=recipe.cookTime,
-                    difficulty=recipe.difficulty,
-                    cuisine=recipe.cuisine
-                )
-                db.add(db_recipe)
-            db.commit()
-    finally:
-        db.close()
-
-# Call init_db to ensure database is seeded
-init_db()
\ No newline at end of file
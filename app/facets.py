@@ -0,0 +1,115 @@
+"""Recipe filters, facet counts and parsing of free-text cooking times.
+
+``prepTime``/``cookTime`` are free text ("10 minutes", "1 hour 30 mins").
+They are parsed once at write time into the integer ``prep_minutes`` /
+``cook_minutes`` columns so time filters can run in SQL.
+"""
+import re
+from collections import Counter
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# Facets reported by list and search endpoints, as Recipe attribute names
+FACET_FIELDS = ("cuisine", "difficulty")
+
+_RANGE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:-|–|to)\s*(?=\d)")
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(hours?|hrs?|h|minutes?|mins?|m)?\b")
+
+
+def parse_minutes(value: Optional[str]) -> Optional[int]:
+    """Parse a free-text duration into whole minutes.
+
+    Bare numbers are minutes; for ranges ("10-15 minutes") the upper bound
+    is used.
+
+    Args:
+        value: Text such as "10 minutes", "1 hour 30 mins" or "1.5 hrs"
+
+    Returns:
+        Minutes, or None if the text contains no duration
+    """
+    if not value:
+        return None
+    text_value = _RANGE_RE.sub("", value.lower())
+    total = 0.0
+    found = False
+    for amount, unit in _DURATION_RE.findall(text_value):
+        found = True
+        if unit.startswith("h"):
+            total += float(amount) * 60
+        else:
+            total += float(amount)
+    return round(total) if found else None
+
+
+class RecipeFilters(NamedTuple):
+    """Filters shared by the list and search endpoints.
+
+    Several values for one field match any of them; fields combine with AND.
+    """
+
+    cuisine: Tuple[str, ...] = ()
+    difficulty: Tuple[str, ...] = ()
+    max_prep_minutes: Optional[int] = None
+    max_cook_minutes: Optional[int] = None
+    max_total_minutes: Optional[int] = None
+
+    @property
+    def active(self) -> bool:
+        return any(value not in ((), None) for value in self)
+
+    def matches(self, recipe) -> bool:
+        """Apply the filters to a Recipe, parsing its times on the fly."""
+        return self.matches_values(
+            recipe.cuisine, recipe.difficulty, parse_minutes(recipe.prepTime), parse_minutes(recipe.cookTime)
+        )
+
+    def matches_values(
+        self, cuisine: str, difficulty: str, prep_minutes: Optional[int], cook_minutes: Optional[int]
+    ) -> bool:
+        if self.cuisine and cuisine not in self.cuisine:
+            return False
+        if self.difficulty and difficulty not in self.difficulty:
+            return False
+        if self.max_prep_minutes is not None and (prep_minutes is None or prep_minutes > self.max_prep_minutes):
+            return False
+        if self.max_cook_minutes is not None and (cook_minutes is None or cook_minutes > self.max_cook_minutes):
+            return False
+        if self.max_total_minutes is not None:
+            if prep_minutes is None or cook_minutes is None or prep_minutes + cook_minutes > self.max_total_minutes:
+                return False
+        return True
+
+
+def count_facets(recipes: Iterable) -> Dict[str, Dict[str, int]]:
+    """Facet counts over already-filtered Recipe objects."""
+    counters = {field: Counter() for field in FACET_FIELDS}
+    for recipe in recipes:
+        for field, counter in counters.items():
+            counter[getattr(recipe, field)] += 1
+    return {field: dict(counter.most_common()) for field, counter in counters.items()}
+
+
+def backfill_recipe_minutes(engine: Engine) -> int:
+    """Parse prep/cook minutes for rows stored before the columns existed.
+
+    Returns:
+        Number of rows updated
+    """
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            'SELECT id, "prepTime", "cookTime" FROM recipes '
+            "WHERE prep_minutes IS NULL AND cook_minutes IS NULL"
+        )).all()
+        updates = []
+        for recipe_id, prep_time, cook_time in rows:
+            prep_minutes, cook_minutes = parse_minutes(prep_time), parse_minutes(cook_time)
+            if prep_minutes is not None or cook_minutes is not None:
+                updates.append({"id": recipe_id, "prep": prep_minutes, "cook": cook_minutes})
+        if updates:
+            conn.execute(
+                text("UPDATE recipes SET prep_minutes = :prep, cook_minutes = :cook WHERE id = :id"), updates
+            )
+    return len(updates)
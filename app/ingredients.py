@@ -0,0 +1,271 @@
+"""Ingredient normalization and the ingredient → recipe inverted index.
+
+Recipe ingredients are free text ("3/4 cup soy sauce", "5 thinly sliced
+Onion"); TheMealDB ones are always "<measure> <ingredient>". They are
+reduced to a bare, singular, lowercase name ("soy sauce", "onion") and
+indexed under the full name plus each of its words, so ``have=chicken``
+also finds "chicken breast".
+
+Internal recipes are indexed in the ``recipe_ingredients`` table (see
+``RecipeIngredientDB``); MealDB recipes and the in-memory repository use
+``IngredientIndex``. Both rank with ``match_sort_key``.
+"""
+import functools
+import heapq
+import json
+import re
+import threading
+from collections import Counter
+from typing import Dict, FrozenSet, Hashable, Iterable, List, NamedTuple, Sequence, Set, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Engine
+
+INGREDIENTS_TABLE = "recipe_ingredients"
+
+# Leading words that are measures rather than the ingredient
+_UNITS = {
+    "c", "cup", "cups", "tbsp", "tbs", "tbls", "tblsp", "tblsps", "tablespoon", "tablespoons",
+    "tsp", "tsps", "teaspoon", "teaspoons", "g", "gram", "grams", "kg", "mg", "ml", "l", "litre",
+    "litres", "liter", "liters", "oz", "ounce", "ounces", "lb", "lbs", "pound", "pounds", "pinch",
+    "pinches", "dash", "dashes", "clove", "cloves", "can", "cans", "tin", "tins", "jar", "box",
+    "packet", "pack", "package", "handful", "bunch", "slice", "slices", "sprig", "sprigs",
+    "stalk", "stalks", "leaves", "piece", "pieces", "whole", "large", "medium", "small", "knob",
+    "splash", "drizzle", "sheet", "sheets", "fillet", "fillets", "head", "heads", "cm", "inch",
+}
+# Preparation words dropped wherever they appear
+_DESCRIPTORS = {
+    "chopped", "finely", "roughly", "thinly", "sliced", "diced", "minced", "fresh", "freshly",
+    "dried", "ground", "grated", "crushed", "beaten", "peeled", "cubed", "shredded", "softened",
+    "melted", "boneless", "skinless", "free-range", "lean", "hot", "cold", "warm", "to", "taste",
+    "serve", "for", "garnish", "sprinkling", "spinkling", "of", "a", "an", "few", "some",
+    "about", "optional", "and", "or", "plus", "extra", "the",
+}
+_NO_SINGULAR = {
+    "asparagus", "couscous", "hummus", "molasses", "swiss", "grits", "citrus", "octopus",
+    "hibiscus", "bass", "glass", "lettuce", "cress",
+}
+_IRREGULAR_SINGULARS = {"leaves": "leaf", "halves": "half", "loaves": "loaf", "knives": "knife"}
+
+_QUANTITY_RE = re.compile(r"^[\d½¼¾⅓⅔⅛/.,\-–x]+([a-z]*)$")
+_PARENTHESES_RE = re.compile(r"\([^)]*\)")
+_WORD_RE = re.compile(r"[a-z][a-z'\-]*")
+
+# Rank internal recipes by the share of their ingredients covered by
+# ``:terms``; served from the covering (term, recipe_id, name,
+# ingredient_count) index without touching the recipes table. The coverage
+# ratio is spelled out in ORDER BY because PostgreSQL only accepts output
+# column aliases there on their own, not inside expressions.
+BY_INGREDIENTS_SQL = text(f"""
+SELECT recipe_id,
+       COUNT(DISTINCT term) AS matched,
+       COUNT(DISTINCT name) AS covered,
+       MAX(ingredient_count) AS total
+FROM {INGREDIENTS_TABLE}
+WHERE term IN :terms
+GROUP BY recipe_id
+HAVING COUNT(DISTINCT term) >= :min_match
+ORDER BY CAST(COUNT(DISTINCT name) AS REAL) / MAX(ingredient_count) DESC, matched DESC, total, recipe_id
+LIMIT :limit
+""").bindparams(bindparam("terms", expanding=True))
+
+
+def _singular(word: str) -> str:
+    if word in _IRREGULAR_SINGULARS:
+        return _IRREGULAR_SINGULARS[word]
+    if len(word) <= 3 or word in _NO_SINGULAR or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+@functools.lru_cache(maxsize=8192)
+def normalize_ingredient(value: str) -> str:
+    """Reduce an ingredient line to a bare, singular, lowercase name.
+
+    Args:
+        value: Ingredient text, optionally with a leading measure
+
+    Returns:
+        The normalized name, or "" if nothing but measures was given
+    """
+    value = _PARENTHESES_RE.sub(" ", value.lower()).split(",")[0]
+    words = value.split()
+
+    # Leading quantities ("3/4", "500g") and units ("cup", "pinch")
+    start = 0
+    while start < len(words):
+        word = words[start]
+        quantity = _QUANTITY_RE.match(word)
+        if quantity and (not quantity.group(1) or quantity.group(1) in _UNITS):
+            start += 1
+        elif word.rstrip(".") in _UNITS or word in _DESCRIPTORS:
+            start += 1
+        else:
+            break
+
+    names = []
+    for word in words[start:]:
+        for part in _WORD_RE.findall(word):
+            if part not in _DESCRIPTORS:
+                names.append(_singular(part))
+    return " ".join(names)
+
+
+def normalize_terms(values: Iterable[str]) -> List[str]:
+    """Normalize user-supplied ingredients, dropping blanks and duplicates."""
+    terms = (normalize_ingredient(value) for value in values)
+    return list(dict.fromkeys(term for term in terms if term))
+
+
+def ingredient_terms(name: str) -> FrozenSet[str]:
+    """Index terms for a normalized name: the full name and each word."""
+    if not name:
+        return frozenset()
+    return frozenset([name, *name.split()])
+
+
+def ingredient_rows(recipe_id: int, ingredients: Iterable[str]) -> List[Dict[str, object]]:
+    """Rows for ``recipe_ingredients``: one per (distinct name, term)."""
+    names = normalize_terms(ingredients)
+    rows = []
+    for name in names:
+        for term in sorted(ingredient_terms(name)):
+            rows.append({"recipe_id": recipe_id, "name": name, "term": term, "ingredient_count": len(names)})
+    return rows
+
+
+class IngredientMatch(NamedTuple):
+    """How well one recipe is covered by the ingredients a user has."""
+
+    # Number of the user's ingredients the recipe uses
+    matched: int
+    # Distinct ingredients in the recipe
+    total: int
+    # Recipe ingredients the user does not have
+    missing: Tuple[str, ...]
+
+    @property
+    def coverage(self) -> float:
+        return (self.total - len(self.missing)) / self.total if self.total else 0.0
+
+
+def match_sort_key(match: IngredientMatch) -> tuple:
+    """Best first: highest coverage, then most of the user's items used, then fewest ingredients."""
+    return (-match.coverage, -match.matched, match.total)
+
+
+def describe_match(names: Iterable[str], terms: Set[str], matched: int) -> IngredientMatch:
+    """Build an ``IngredientMatch`` for normalized recipe ingredient ``names``."""
+    names = list(dict.fromkeys(names))
+    missing = tuple(name for name in names if not ingredient_terms(name) & terms)
+    return IngredientMatch(matched=matched, total=len(names), missing=missing)
+
+
+class IngredientIndex:
+    """In-memory inverted index from ingredient terms to recipe keys."""
+
+    def __init__(self) -> None:
+        # term -> recipe keys, and term -> (recipe key, ingredient name)
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._name_postings: Dict[str, Set[Tuple[Hashable, str]]] = {}
+        self._names: Dict[Hashable, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: Hashable, ingredients: Iterable[str]) -> None:
+        """Index (or re-index) the recipe ``key`` with its raw ingredient lines."""
+        names = tuple(normalize_terms(ingredients))
+        with self._lock:
+            self._remove(key)
+            self._names[key] = names
+            for name in names:
+                for term in ingredient_terms(name):
+                    self._postings.setdefault(term, set()).add(key)
+                    self._name_postings.setdefault(term, set()).add((key, name))
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        for name in self._names.pop(key, ()):
+            for term in ingredient_terms(name):
+                keys = self._postings.get(term)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._postings[term]
+                pairs = self._name_postings.get(term)
+                if pairs is not None:
+                    pairs.discard((key, name))
+                    if not pairs:
+                        del self._name_postings[term]
+
+    def search(
+        self, terms: Sequence[str], min_match: int = 1, limit: int = 50
+    ) -> List[Tuple[Hashable, IngredientMatch]]:
+        """Rank indexed recipes by how well ``terms`` cover their ingredients.
+
+        Args:
+            terms: Normalized ingredients the user has (see ``normalize_terms``)
+            min_match: Minimum number of ``terms`` a recipe must use
+            limit: Maximum number of results
+
+        Returns:
+            ``(key, match)`` pairs, best first
+        """
+        term_set = set(terms)
+        with self._lock:
+            matched = Counter()
+            covered_names: Set[Tuple[Hashable, str]] = set()
+            for term in term_set:
+                matched.update(self._postings.get(term, ()))
+                covered_names.update(self._name_postings.get(term, ()))
+            covered = Counter(key for key, _ in covered_names)
+
+            # Rank on counts alone; only the returned page gets missing names
+            def rank(key: Hashable) -> tuple:
+                total = len(self._names[key])
+                return (-covered[key] / total, -matched[key], total, key)
+
+            candidates = [key for key, count in matched.items() if count >= min_match]
+            best = heapq.nsmallest(limit, candidates, key=rank)
+            return [(key, describe_match(self._names[key], term_set, matched[key])) for key in best]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+def backfill_ingredient_index(engine: Engine) -> int:
+    """Index recipes that have no ``recipe_ingredients`` rows yet.
+
+    Covers rows written before the table existed and rows inserted without
+    going through a repository (e.g. the seed data).
+
+    Returns:
+        Number of recipes indexed
+    """
+    with engine.begin() as conn:
+        missing = conn.execute(text(
+            f"SELECT id, ingredients FROM recipes "
+            f"WHERE id NOT IN (SELECT recipe_id FROM {INGREDIENTS_TABLE})"
+        )).all()
+        rows = []
+        for recipe_id, ingredients in missing:
+            if isinstance(ingredients, str):
+                ingredients = json.loads(ingredients)
+            rows.extend(ingredient_rows(recipe_id, ingredients or []))
+        if rows:
+            conn.execute(
+                text(
+                    f"INSERT INTO {INGREDIENTS_TABLE} (recipe_id, name, term, ingredient_count) "
+                    f"VALUES (:recipe_id, :name, :term, :ingredient_count)"
+                ),
+                rows,
+            )
+    return len(missing)
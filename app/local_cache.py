@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Used as the L1 tier in front of Redis. ``None`` is reserved to mean
+    "not cached", so it cannot be stored as a value.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if self._clock() >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TierStats:
+    """Per-tier hit counts and cumulative lookup latency for a layered cache."""
+
+    def __init__(self, tiers=("l1", "l2", "upstream")) -> None:
+        self._counts: Dict[str, int] = {tier: 0 for tier in tiers}
+        self._seconds: Dict[str, float] = {tier: 0.0 for tier in tiers}
+
+    def record(self, tier: str, seconds: float) -> None:
+        self._counts[tier] += 1
+        self._seconds[tier] += seconds
+
+    def snapshot(self) -> dict:
+        total = sum(self._counts.values())
+        result: Dict[str, Any] = {}
+        for tier, count in self._counts.items():
+            result[tier] = {
+                "served": count,
+                "ratio": count / total if total else 0.0,
+                "avg_ms": self._seconds[tier] / count * 1000 if count else 0.0,
+            }
+        return result
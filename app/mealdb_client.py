@@ -1,24 +1,106 @@
-import requests
+import asyncio
+import httpx
+import logging
+import math
+import random
 import re
-from typing import List, Optional, Dict, Any
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple, Optional, Dict, Any, Sequence, Tuple
+from app import config, metrics, profiling
+from app.ingredients import IngredientIndex, IngredientMatch
+from app.local_cache import TierStats, TTLCache
 from app.models import Recipe
-from app.redis_client import RedisClient
+from app.redis_client import CachedResults, RedisClient, normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class MealDBError(Exception):
+    """Raised when TheMealDB cannot be reached or returns an unusable response."""
+
+
+class SearchResult(NamedTuple):
+    """Recipes found for a search, and whether they reflect TheMealDB's answer."""
+
+    recipes: List[Recipe]
+    # False when TheMealDB failed and the recipes are stale or empty; such
+    # results are not cached, here or by callers
+    complete: bool = True
 
 
 class MealDBClient:
-    """Client for interacting with TheMealDB API with Redis caching."""
+    """Async client for interacting with TheMealDB API with Redis caching."""
     
-    BASE_URL = "https://www.themealdb.com/api/json/v1/1"
+    BASE_URL = config.MEALDB_BASE_URL
+    REQUEST_TIMEOUT = 10.0
     
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379",
+        http_client: Optional[httpx.AsyncClient] = None,
+        redis_client: Optional[RedisClient] = None,
+    ):
         """Initialize MealDB client with Redis caching.
         
+        The client is meant to be created once per process (see the app
+        lifespan in ``main.py``) so the Redis pool and the keep-alive HTTP
+        connections to TheMealDB are shared across requests.
+        
         Args:
             redis_url: Redis connection URL for caching
+            http_client: Optional HTTP client to reuse; one is created
+                (and owned by this instance) when omitted
+            redis_client: Optional Redis client to reuse instead of creating
+                one from ``redis_url``
         """
-        self.redis_client = RedisClient(redis_url)
+        self.redis_client = redis_client or RedisClient(redis_url)
+        # L1: built Recipe lists for hot queries, in front of Redis (L2)
+        self.local_cache = TTLCache(config.MEALDB_L1_MAXSIZE, config.MEALDB_L1_TTL_SECONDS)
+        self.tier_stats = TierStats()
+        # Ingredient index over the most recently seen MealDB recipes
+        self.ingredient_index = IngredientIndex()
+        self._indexed_recipes: "OrderedDict[str, Recipe]" = OrderedDict()
+        self.instance_id = uuid.uuid4().hex
+        self._invalidation_task: Optional["asyncio.Task[None]"] = None
+        # In-flight loads per normalized query, shared by concurrent callers
+        self._inflight: Dict[str, "asyncio.Future[List[Recipe]]"] = {}
+        self._random: Callable[[], float] = random.random
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or httpx.AsyncClient(
+            timeout=self.REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=config.MEALDB_MAX_CONNECTIONS,
+                max_keepalive_connections=config.MEALDB_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=config.MEALDB_KEEPALIVE_EXPIRY,
+            ),
+        )
+    
+    def start_invalidation_listener(self) -> None:
+        """Evict L1 entries when other workers rewrite them in Redis."""
+        if self._invalidation_task is None and self.redis_client:
+            self._invalidation_task = asyncio.ensure_future(
+                self.redis_client.listen_invalidations(self._on_invalidation, self.local_cache.clear)
+            )
+    
+    def _on_invalidation(self, origin: str, key: str) -> None:
+        if origin != self.instance_id:
+            self.local_cache.pop(key)
     
-    def search_meals_by_name(self, meal_name: str) -> List[Dict[str, Any]]:
+    async def aclose(self) -> None:
+        """Close the HTTP client (if owned) and the Redis connection pool."""
+        if self._invalidation_task is not None:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except asyncio.CancelledError:
+                pass
+        if self._owns_http_client:
+            await self.http_client.aclose()
+        await self.redis_client.close()
+    
+    async def search_meals_by_name(self, meal_name: str) -> List[Dict[str, Any]]:
         """
         Search for meals by name using TheMealDB API.
         
@@ -31,11 +113,41 @@ class MealDBClient:
         if not meal_name or not meal_name.strip():
             return []
             
+        try:
+            return await self._fetch_meals(meal_name)
+        except MealDBError as e:
+            logger.error(f"Error fetching meals from MealDB: {e}")
+            return []
+    
+    async def _get(self, url: str, params: Dict[str, str]) -> httpx.Response:
+        """GET from TheMealDB, recorded as the ``mealdb_http`` stage."""
+        started = time.perf_counter()
+        metrics.MEALDB_REQUESTS_IN_FLIGHT.inc()
+        try:
+            return await self.http_client.get(url, params=params)
+        finally:
+            metrics.MEALDB_REQUESTS_IN_FLIGHT.dec()
+            metrics.MEALDB_HTTP.observe_since(started)
+            profiling.record_span("mealdb.http", started)
+    
+    async def _fetch_meals(self, meal_name: str) -> List[Dict[str, Any]]:
+        """
+        Call TheMealDB search endpoint.
+        
+        Args:
+            meal_name: The name of the meal to search for
+            
+        Returns:
+            List of meal data dictionaries (empty if TheMealDB has no match)
+            
+        Raises:
+            MealDBError: If the request fails or the response is malformed
+        """
         try:
             url = f"{self.BASE_URL}/search.php"
             params = {"s": meal_name.strip()}
             
-            response = requests.get(url, params=params, timeout=10)
+            response = await self._get(url, params)
             response.raise_for_status()
             
             data = response.json()
@@ -44,12 +156,74 @@ class MealDBClient:
             meals = data.get("meals", [])
             return meals if meals else []
             
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching meals from MealDB: {e}")
-            return []
+        except httpx.HTTPError as e:
+            raise MealDBError(str(e)) from e
         except Exception as e:
-            print(f"Unexpected error in MealDB search: {e}")
-            return []
+            raise MealDBError(f"Unexpected error in MealDB search: {e}") from e
+    
+    async def _lookup_meal(self, meal_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Call TheMealDB lookup endpoint for a single meal.
+        
+        Args:
+            meal_id: TheMealDB ``idMeal``
+            
+        Returns:
+            Meal data dictionary, or None if TheMealDB has no such meal
+            
+        Raises:
+            MealDBError: If the request fails or the response is malformed
+        """
+        try:
+            response = await self._get(f"{self.BASE_URL}/lookup.php", {"i": meal_id})
+            response.raise_for_status()
+            meals = response.json().get("meals")
+            return meals[0] if meals else None
+        except httpx.HTTPError as e:
+            raise MealDBError(str(e)) from e
+        except Exception as e:
+            raise MealDBError(f"Unexpected error in MealDB lookup: {e}") from e
+    
+    async def get_recipe_by_id(self, meal_id: str) -> Optional[Recipe]:
+        """
+        Get a single MealDB recipe by id, from the per-meal cache when possible
+        and otherwise from TheMealDB ``lookup.php``.
+        
+        Args:
+            meal_id: TheMealDB ``idMeal``
+            
+        Returns:
+            Recipe object, or None if the meal does not exist or TheMealDB
+            cannot be reached
+        """
+        if not meal_id or not meal_id.isdigit():
+            return None
+        
+        if self.redis_client and self.redis_client.is_available():
+            cached = await self.redis_client.get_cached_meal(meal_id)
+            if cached is not None:
+                try:
+                    recipe = Recipe(**cached)
+                    self._index_recipes([recipe])
+                    return recipe
+                except Exception as e:
+                    logger.warning(f"Error converting cached recipe: {e}")
+        
+        try:
+            meal_data = await self._lookup_meal(meal_id)
+        except MealDBError as e:
+            logger.error(f"Error fetching meal from MealDB: {e}")
+            return None
+        if meal_data is None:
+            return None
+        
+        started = time.perf_counter()
+        recipe = self.convert_mealdb_to_recipe(meal_data)
+        metrics.CONVERT.observe_since(started)
+        self._index_recipes([recipe])
+        if self.redis_client and self.redis_client.is_available():
+            await self.redis_client.cache_meal(recipe.model_dump(), ttl_seconds=config.MEALDB_CACHE_TTL_SECONDS)
+        return recipe
     
     def _extract_ingredients_and_measures(self, meal_data: Dict[str, Any]) -> List[str]:
         """
@@ -168,49 +342,207 @@ class MealDBClient:
             source="mealdb"
         )
     
-    def search_recipes(self, query: Optional[str]) -> List[Recipe]:
+    async def search_recipes(self, query: Optional[str]) -> List[Recipe]:
         """
         Search for recipes in TheMealDB and convert to our Recipe format.
+        
+        Args:
+            query: Search query string
+            
+        Returns:
+            List of Recipe objects from TheMealDB (cached or fresh); empty if
+            TheMealDB could not be reached
+        """
+        return (await self.search(query)).recipes
+    
+    async def search(self, query: Optional[str]) -> SearchResult:
+        """
+        ``search_recipes`` that also reports whether TheMealDB answered.
         Uses Redis caching with 24-hour TTL to avoid repeated API calls.
         
+        Cache misses are protected against stampedes: concurrent misses for
+        the same normalized query in this process share one upstream fetch,
+        and across workers a short Redis lease lets only one worker refill
+        the key while the others wait for it. Hot keys are refreshed in the
+        background shortly before they expire (XFetch), so they rarely miss.
+        
         Args:
             query: Search query string
             
         Returns:
-            List of Recipe objects from TheMealDB (cached or fresh)
+            The recipes, with ``complete`` False if the upstream fetch failed
         """
         if not query or not query.strip():
-            return []
+            return SearchResult([])
+        key = normalize_query(query)
+        started = time.perf_counter()
+        
+        # L1: already-built recipes in this process
+        recipes = self.local_cache.get(key)
+        if recipes is not None:
+            metrics.L1_CACHE_HIT.inc()
+            self.tier_stats.record("l1", time.perf_counter() - started)
+            return SearchResult(list(recipes))
+        metrics.L1_CACHE_MISS.inc()
             
-        # Check cache first
+        # L2: Redis
         if self.redis_client and self.redis_client.is_available():
-            cached_recipes_data = self.redis_client.get_cached_results(query)
-            if cached_recipes_data:
-                # Convert cached data back to Recipe objects
-                recipes = []
-                for recipe_data in cached_recipes_data:
-                    try:
-                        recipe = Recipe(**recipe_data)
-                        recipes.append(recipe)
-                    except Exception as e:
-                        print(f"Error converting cached recipe: {e}")
-                        continue
-                return recipes
-        
-        # Cache miss - fetch from TheMealDB API
-        meal_data_list = self.search_meals_by_name(query)
-        
-        # Convert to Recipe objects
+            entry = await self.redis_client.get_cached_entry(key)
+            if entry is not None:
+                recipes = self._recipes_from_cache(entry.results)
+                self._remember(key, recipes)
+                if self._should_refresh_early(entry):
+                    self._load_once(key, wait_for_lease=False, stale=recipes)
+                self.tier_stats.record("l2", time.perf_counter() - started)
+                return SearchResult(list(recipes))
+        
+        # Cache miss - fetch from TheMealDB API (once per key in this process)
+        result = await asyncio.shield(self._load_once(key, wait_for_lease=True))
+        self.tier_stats.record("upstream", time.perf_counter() - started)
+        return SearchResult(list(result.recipes), result.complete)
+    
+    def _remember(self, key: str, recipes: List[Recipe]) -> None:
+        """Store recipes in L1, keeping negative results no longer than in Redis."""
+        ttl = None if recipes else min(config.MEALDB_L1_TTL_SECONDS, config.MEALDB_NEGATIVE_CACHE_TTL_SECONDS)
+        self.local_cache.set(key, recipes, ttl=ttl)
+        self._index_recipes(recipes)
+    
+    def _index_recipes(self, recipes: List[Recipe]) -> None:
+        """Add recipes to the ingredient index, evicting the least recently seen."""
+        for recipe in recipes:
+            self._indexed_recipes[recipe.id] = recipe
+            self._indexed_recipes.move_to_end(recipe.id)
+            self.ingredient_index.add(recipe.id, recipe.ingredients)
+        while len(self._indexed_recipes) > config.MEALDB_INGREDIENT_INDEX_MAXSIZE:
+            meal_id, _ = self._indexed_recipes.popitem(last=False)
+            self.ingredient_index.remove(meal_id)
+    
+    def find_by_ingredients(
+        self, terms: Sequence[str], min_match: int = 1, limit: int = 50
+    ) -> List[Tuple[Recipe, IngredientMatch]]:
+        """Rank MealDB recipes this process has seen by ingredient coverage.
+        
+        Only recipes that passed through this client (searches and lookups)
+        are indexed; TheMealDB itself has no multi-ingredient search.
+        
+        Args:
+            terms: Normalized ingredient names (see ``normalize_terms``)
+            min_match: Minimum number of ``terms`` a recipe must use
+            limit: Maximum number of results
+            
+        Returns:
+            ``(recipe, match)`` pairs, best first
+        """
+        return [
+            (self._indexed_recipes[meal_id], match)
+            for meal_id, match in self.ingredient_index.search(terms, min_match=min_match, limit=limit)
+        ]
+    
+    def _recipes_from_cache(self, cached_recipes_data: list) -> List[Recipe]:
+        """Convert cached data back to Recipe objects."""
         recipes = []
-        for meal_data in meal_data_list:
+        for recipe_data in cached_recipes_data:
             try:
-                recipe = self.convert_mealdb_to_recipe(meal_data)
+                recipe = Recipe(**recipe_data)
                 recipes.append(recipe)
             except Exception as e:
-                print(f"Error converting MealDB recipe: {e}")
+                logger.warning(f"Error converting cached recipe: {e}")
                 continue
+        return recipes
+    
+    def _should_refresh_early(self, entry: CachedResults) -> bool:
+        """
+        XFetch probabilistic early expiration: refresh with a probability that
+        grows as expiry approaches, scaled by how long the value took to compute.
+        """
+        if entry.expires_at is None or entry.delta <= 0:
+            return False
+        # 1 - random() is in (0, 1], so the log is finite and <= 0
+        gap = -entry.delta * config.MEALDB_XFETCH_BETA * math.log(1.0 - self._random())
+        return time.time() + gap >= entry.expires_at
+    
+    def _load_once(
+        self, key: str, wait_for_lease: bool, stale: Optional[List[Recipe]] = None
+    ) -> "asyncio.Future[SearchResult]":
+        """Return the in-flight load for ``key``, starting one if none is running."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(key, wait_for_lease, stale))
+            self._inflight[key] = future
+            
+            def _forget(done: "asyncio.Future[SearchResult]") -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            
+            future.add_done_callback(_forget)
+        return future
+    
+    async def _load(self, key: str, wait_for_lease: bool, stale: Optional[List[Recipe]]) -> SearchResult:
+        """
+        Fetch ``key`` from TheMealDB and refill the cache, holding the refill
+        lease across workers when Redis is available.
         
-        # Cache the results (24 hours = 86400 seconds)
+        Args:
+            key: Normalized search query
+            wait_for_lease: If another worker holds the lease, wait for it to
+                fill the cache (cache miss) rather than giving up (early refresh)
+            stale: Recipes to return if the lease is held elsewhere and we do
+                not wait
+        """
+        token = ""
+        if self.redis_client and self.redis_client.is_available():
+            token = await self.redis_client.acquire_lock(key, config.MEALDB_REFILL_LEASE_MS)
+            if token is None:
+                if not wait_for_lease:
+                    return SearchResult(stale or [])
+                refilled = await self._wait_for_refill(key)
+                if refilled is not None:
+                    return SearchResult(refilled)
+                # The lease holder did not refill in time; fetch ourselves
+                token = ""
+        
+        try:
+            started = time.monotonic()
+            try:
+                meal_data_list = await self._fetch_meals(key)
+            except MealDBError as e:
+                logger.error(f"Error fetching meals from MealDB: {e}")
+                return SearchResult(stale or [], complete=False)
+            
+            # Convert to Recipe objects
+            converting = time.perf_counter()
+            recipes = []
+            for meal_data in meal_data_list:
+                try:
+                    recipe = self.convert_mealdb_to_recipe(meal_data)
+                    recipes.append(recipe)
+                except Exception as e:
+                    logger.warning(f"Error converting MealDB recipe: {e}")
+                    continue
+            metrics.CONVERT.observe_since(converting)
+            
+            await self._cache_recipes(key, recipes, delta=time.monotonic() - started)
+            self._remember(key, recipes)
+            return SearchResult(recipes)
+        finally:
+            if token:
+                await self.redis_client.release_lock(key, token)
+    
+    async def _wait_for_refill(self, key: str) -> Optional[List[Recipe]]:
+        """Poll the cache while another worker refills ``key``."""
+        deadline = time.monotonic() + config.MEALDB_REFILL_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(config.MEALDB_REFILL_POLL_SECONDS)
+            entry = await self.redis_client.get_cached_entry(key)
+            if entry is not None:
+                return self._recipes_from_cache(entry.results)
+        return None
+    
+    async def _cache_recipes(self, key: str, recipes: List[Recipe], delta: float) -> None:
+        """
+        Cache the results (24 hours by default). Queries with no results are
+        cached too, under a shorter TTL, so typos don't hit TheMealDB each time.
+        """
         if self.redis_client and self.redis_client.is_available():
             # Convert Recipe objects to dictionaries for JSON serialization
             recipes_data = []
@@ -219,10 +551,12 @@ class MealDBClient:
                     recipe_dict = recipe.model_dump()
                     recipes_data.append(recipe_dict)
                 except Exception as e:
-                    print(f"Error serializing recipe for cache: {e}")
+                    logger.warning(f"Error serializing recipe for cache: {e}")
                     continue
             
             if recipes_data:
-                self.redis_client.cache_results(query, recipes_data, ttl_seconds=86400)
-                
-        return recipes
+                ttl_seconds = config.MEALDB_CACHE_TTL_SECONDS
+            else:
+                ttl_seconds = config.MEALDB_NEGATIVE_CACHE_TTL_SECONDS
+            if await self.redis_client.cache_results(key, recipes_data, ttl_seconds=ttl_seconds, delta=delta):
+                await self.redis_client.publish_invalidation(key, self.instance_id)
@@ -0,0 +1,295 @@
+"""Prometheus-style metrics for this process, served at ``/metrics``.
+
+A small in-process implementation of counters, gauges and histograms in the
+Prometheus text exposition format. Hot paths use children bound to their
+label values once (at import, or the first time a route is seen), so
+recording a sample is a lock plus a few additions, with no metric objects
+or label tuples built per request. Values are per worker process, like
+``/cache/stats``; Prometheus adds up the workers it scrapes.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Request latency: 5 ms to 10 s
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# Stages of a request: 100 µs to 10 s
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_string(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class CounterChild:
+    """One labelled counter series."""
+
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        return [f"{name}_total{labels} {_format_value(self.value)}"]
+
+
+class GaugeChild:
+    """One labelled gauge series."""
+
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        return [f"{name}{labels} {_format_value(self.value)}"]
+
+
+class HistogramChild:
+    """One labelled histogram series with fixed bucket upper bounds."""
+
+    __slots__ = ("_lock", "_bounds", "_counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        # One slot per bound plus the +Inf bucket; not cumulative until rendered
+        self._counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def observe_since(self, started: float) -> None:
+        """Observe the seconds elapsed since ``started`` (a ``time.perf_counter()`` value)."""
+        self.observe(time.perf_counter() - started)
+
+    def samples(self, name: str, label_names: Sequence[str], label_values: Sequence[str]) -> List[str]:
+        with self._lock:
+            counts, total, count = list(self._counts), self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self._bounds + (float("inf"),), counts):
+            cumulative += n
+            labels = _label_string(label_names, label_values, f'le="{_format_value(bound)}"')
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _label_string(label_names, label_values)
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {count}")
+        return lines
+
+
+class _Metric:
+    """A metric family: one child per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child for ``values``, creating it on first use.
+
+        Bind children once and keep them; don't call this per request on a
+        hot path.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._child_samples(values, child))
+        return lines
+
+    def _child_samples(self, values: Tuple[str, ...], child) -> List[str]:
+        return child.samples(self.name, _label_string(self.labelnames, values))
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = REQUEST_BUCKETS,
+        registry=None,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def _child_samples(self, values: Tuple[str, ...], child) -> List[str]:
+        return child.samples(self.name, self.labelnames, values)
+
+
+class Registry:
+    """The metric families rendered together by ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> bytes:
+        """All families in the Prometheus text format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode()
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+REQUESTS = Counter("http_requests", "HTTP responses by route template and status code.", ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled.").labels()
+
+STAGE_DURATION = Histogram(
+    "recipe_stage_duration_seconds", "Time spent in each stage of serving recipes.", ("stage",), STAGE_BUCKETS
+)
+DB_QUERY = STAGE_DURATION.labels("db_query")
+REDIS_GET = STAGE_DURATION.labels("redis_get")
+REDIS_SET = STAGE_DURATION.labels("redis_set")
+MEALDB_HTTP = STAGE_DURATION.labels("mealdb_http")
+CONVERT = STAGE_DURATION.labels("convert")
+SERIALIZE = STAGE_DURATION.labels("serialize")
+
+DB_QUERIES_IN_FLIGHT = Gauge("db_queries_in_flight", "Repository calls running.").labels()
+MEALDB_REQUESTS_IN_FLIGHT = Gauge("mealdb_requests_in_flight", "HTTP requests to TheMealDB awaiting a response.").labels()
+
+CACHE_LOOKUPS = Counter("cache_lookups", "Cache lookups by cache and result.", ("cache", "result"))
+SEARCH_CACHE_HIT = CACHE_LOOKUPS.labels("redis_search", "hit")
+SEARCH_CACHE_NEGATIVE_HIT = CACHE_LOOKUPS.labels("redis_search", "negative_hit")
+SEARCH_CACHE_MISS = CACHE_LOOKUPS.labels("redis_search", "miss")
+SEARCH_CACHE_ERROR = CACHE_LOOKUPS.labels("redis_search", "error")
+MEAL_CACHE_HIT = CACHE_LOOKUPS.labels("redis_meal", "hit")
+MEAL_CACHE_MISS = CACHE_LOOKUPS.labels("redis_meal", "miss")
+MEAL_CACHE_ERROR = CACHE_LOOKUPS.labels("redis_meal", "error")
+L1_CACHE_HIT = CACHE_LOOKUPS.labels("l1", "hit")
+L1_CACHE_MISS = CACHE_LOOKUPS.labels("l1", "miss")
+RESPONSE_CACHE_HIT = CACHE_LOOKUPS.labels("search_response", "hit")
+RESPONSE_CACHE_MISS = CACHE_LOOKUPS.labels("search_response", "miss")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight requests per route.
+
+    Requests are labelled with the matched route template (``/recipes/{recipe_id}``),
+    never the raw path, so the number of series stays bounded; requests no
+    route matched share the ``unmatched`` label. Children are cached per
+    (method, route) and (method, route, status).
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self._durations: Dict[Tuple[str, str], HistogramChild] = {}
+        self._responses: Dict[Tuple[str, str, int], CounterChild] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "unmatched")
+            duration = self._durations.get(key)
+            if duration is None:
+                duration = self._durations.setdefault(key, REQUEST_DURATION.labels(*key))
+            duration.observe(elapsed)
+            response_key = key + (status_code,)
+            responses = self._responses.get(response_key)
+            if responses is None:
+                responses = self._responses.setdefault(response_key, REQUESTS.labels(*key, str(status_code)))
+            responses.inc()
+
+
+def render_metrics(registry: Optional[Registry] = None) -> bytes:
+    """The ``/metrics`` body for ``registry`` (the process registry by default)."""
+    return (REGISTRY if registry is None else registry).render()
@@ -0,0 +1,271 @@
+"""Versioned schema migrations, run once per deploy rather than on import.
+
+Each migration has a version number and is recorded in the
+``schema_migrations`` table once applied, so a process starting against a
+current database only reads that table. Pending migrations run under a
+cross-process lock (an advisory lock on PostgreSQL, a lock file next to a
+SQLite database), so uvicorn workers starting together apply each of them
+exactly once and the others wait for them.
+
+The first migrations are idempotent, which brings databases created by
+releases that built the schema at import time (tables present, no
+``schema_migrations`` rows) up to date as well.
+
+Run them as a deploy step with::
+
+    python -m app.migrations upgrade
+
+or let the app lifespan run them (MIGRATE_ON_STARTUP, on by default).
+"""
+import argparse
+import fcntl
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, NamedTuple, Sequence
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+from app import config, database
+from app.database import JSON_DOCUMENT, RecipeDB, initial_recipes
+from app.facets import backfill_recipe_minutes
+from app.ingredients import INGREDIENTS_TABLE, backfill_ingredient_index
+from app.models import RecipeCreate
+from app.postgres import ensure_trigram_index
+from app.search_index import ensure_fts_index, fts_index_exists
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+# Arbitrary key for pg_advisory_lock, shared by every process migrating
+_PG_LOCK_KEY = 7_410_325_118
+
+_metadata = MetaData()
+_migrations_table = Table(
+    MIGRATIONS_TABLE,
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", String, nullable=False),
+)
+
+# The schema of migration 1, frozen here rather than taken from the models
+# so that later model changes reach every database through later migrations
+_baseline_metadata = MetaData()
+Table(
+    "recipes",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, index=True),
+    Column("ingredients", JSON_DOCUMENT),
+    Column("steps", JSON_DOCUMENT),
+    Column("prepTime", String),
+    Column("cookTime", String),
+    Column("difficulty", String),
+    Column("cuisine", String),
+)
+Table(
+    INGREDIENTS_TABLE,
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("recipe_id", Integer, ForeignKey("recipes.id"), nullable=False, index=True),
+    Column("name", String, nullable=False),
+    Column("term", String, nullable=False),
+    Column("ingredient_count", Integer, nullable=False),
+    Index("ix_recipe_ingredients_term", "term", "recipe_id", "name", "ingredient_count"),
+)
+Table(
+    "data_version",
+    _baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False, default=0),
+)
+
+_FACET_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_recipes_cuisine_difficulty ON recipes (cuisine, difficulty, id)",
+    "CREATE INDEX IF NOT EXISTS ix_recipes_difficulty ON recipes (difficulty, id)",
+    "CREATE INDEX IF NOT EXISTS ix_recipes_prep_minutes ON recipes (prep_minutes)",
+]
+
+
+class Migration(NamedTuple):
+    """One schema change; ``apply`` gets the sync engine and may commit itself."""
+
+    version: int
+    name: str
+    apply: Callable[[Engine], object]
+
+
+def _add_recipe_time_columns(engine: Engine) -> None:
+    """Add the parsed time columns and facet indexes to older recipes tables."""
+    columns = {column["name"] for column in inspect(engine).get_columns("recipes")}
+    with engine.begin() as conn:
+        for name in ("prep_minutes", "cook_minutes"):
+            if name not in columns:
+                conn.execute(text(f"ALTER TABLE recipes ADD COLUMN {name} INTEGER"))
+        for statement in _FACET_INDEXES:
+            conn.execute(text(statement))
+
+
+def _seed_initial_recipes(engine: Engine) -> None:
+    """Add the sample recipes, only to an empty database and only if SEED_INITIAL_RECIPES is on."""
+    from app.repositories import SQLiteRecipeRepository
+
+    if not config.SEED_INITIAL_RECIPES:
+        logger.info("Skipping the sample recipes (SEED_INITIAL_RECIPES is off)")
+        return
+    with Session(engine) as db:
+        if db.scalar(select(func.count()).select_from(RecipeDB)):
+            return
+        # Through the repository so ids, ingredient rows and parsed times
+        # are written like any other recipe's
+        SQLiteRecipeRepository(db, full_text=False).create_recipes([
+            RecipeCreate(**recipe.model_dump(exclude={"id", "source"})) for recipe in initial_recipes
+        ])
+
+
+def _autoincrement_recipe_ids(engine: Engine) -> None:
+    """Rebuild a SQLite recipes table as AUTOINCREMENT, so deleted ids are never reused.
+
+    SQLite cannot alter a primary key, so the rows are copied into a new
+    table with the same columns; indexes and the full-text triggers, which
+    go with the old table, are recreated. PostgreSQL sequences already never
+    hand out an id twice.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        schema = conn.scalar(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'recipes'"))
+    if "AUTOINCREMENT" in schema.upper():
+        return
+    recipes = Table("recipes", MetaData(), autoload_with=engine)
+    indexes = inspect(engine).get_indexes("recipes")
+    rebuilt = recipes.to_metadata(MetaData(), name="recipes_rebuilt")
+    rebuilt.dialect_kwargs["sqlite_autoincrement"] = True
+    columns = ", ".join(f'"{column.name}"' for column in recipes.columns)
+    with engine.begin() as conn:
+        conn.execute(CreateTable(rebuilt))
+        conn.execute(text(f"INSERT INTO recipes_rebuilt ({columns}) SELECT {columns} FROM recipes"))
+        conn.execute(text("DROP TABLE recipes"))
+        conn.execute(text("ALTER TABLE recipes_rebuilt RENAME TO recipes"))
+        for index in indexes:
+            unique = "UNIQUE " if index["unique"] else ""
+            index_columns = ", ".join(f'"{name}"' for name in index["column_names"])
+            conn.execute(text(f'CREATE {unique}INDEX "{index["name"]}" ON recipes ({index_columns})'))
+    if fts_index_exists(engine):
+        ensure_fts_index(engine)
+
+
+# In version order. Append new migrations; never renumber or edit applied ones.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create tables", lambda engine: _baseline_metadata.create_all(bind=engine)),
+    Migration(2, "recipe time columns and facet indexes", _add_recipe_time_columns),
+    # No-op if SQLite lacks FTS5 or the database is PostgreSQL
+    Migration(3, "full-text index", ensure_fts_index),
+    # No-op unless the database is PostgreSQL with pg_trgm available
+    Migration(4, "trigram title index", ensure_trigram_index),
+    Migration(5, "backfill ingredient index", backfill_ingredient_index),
+    Migration(6, "backfill recipe minutes", backfill_recipe_minutes),
+    Migration(7, "seed initial recipes", _seed_initial_recipes),
+    Migration(8, "never reuse recipe ids", _autoincrement_recipe_ids),
+]
+
+
+@contextmanager
+def migration_lock(engine: Engine) -> Iterator[None]:
+    """Hold a lock shared by every process migrating this database."""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+        return
+    path = engine.url.database
+    if engine.dialect.name != "sqlite" or path in (None, "", ":memory:"):
+        # Nothing else can see the database
+        yield
+        return
+    with open(f"{path}.migrate.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    """Versions recorded in ``schema_migrations``, ascending; empty for a new database."""
+    if not inspect(engine).has_table(MIGRATIONS_TABLE):
+        return []
+    with engine.connect() as conn:
+        return list(conn.scalars(select(_migrations_table.c.version).order_by(_migrations_table.c.version)))
+
+
+def pending_migrations(engine: Engine, migrations: Sequence[Migration] = MIGRATIONS) -> List[Migration]:
+    """Migrations not yet applied to the database, in version order."""
+    applied = set(applied_versions(engine))
+    return sorted((m for m in migrations if m.version not in applied), key=lambda m: m.version)
+
+
+def migrate(engine: Engine, migrations: Sequence[Migration] = MIGRATIONS) -> List[int]:
+    """Apply pending migrations in version order.
+
+    Args:
+        engine: Sync engine for the application database
+        migrations: Migrations to apply; defaults to ``MIGRATIONS``
+
+    Returns:
+        Versions applied by this call; empty if the database was current or
+        another process applied them first
+    """
+    if not pending_migrations(engine, migrations):
+        return []
+    applied = []
+    with migration_lock(engine):
+        _metadata.create_all(bind=engine)
+        # Re-read under the lock: another process may have just finished
+        for migration in pending_migrations(engine, migrations):
+            logger.info(f"Applying migration {migration.version}: {migration.name}")
+            migration.apply(engine)
+            with engine.begin() as conn:
+                conn.execute(_migrations_table.insert().values(
+                    version=migration.version,
+                    name=migration.name,
+                    applied_at=datetime.now(timezone.utc).isoformat(),
+                ))
+            applied.append(migration.version)
+    # Search features may have just been created
+    database.fts_enabled.cache_clear()
+    database.trigram_enabled.cache_clear()
+    return applied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the recipe database schema")
+    parser.add_argument(
+        "command",
+        choices=["upgrade", "status"],
+        help="upgrade: apply pending migrations; status: list applied and pending migrations",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    engine = database.get_engine()
+    if args.command == "upgrade":
+        applied = migrate(engine)
+        print(f"Applied {len(applied)} migration(s)" if applied else "Database is up to date")
+        return
+    applied = set(applied_versions(engine))
+    for migration in MIGRATIONS:
+        state = "applied" if migration.version in applied else "pending"
+        print(f"{migration.version:>4}  {state:<8} {migration.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,3 +16,7 @@ class RecipeCreate(RecipeBase):
 class Recipe(RecipeBase):
     id: Union[int, str]  # Can be int for internal recipes or str for external
     source: str = "internal"  # "internal" for local recipes, "mealdb" for external
+
+
+# Fields that list endpoints may project; "id" is always included
+RECIPE_FIELDS = tuple(Recipe.model_fields)
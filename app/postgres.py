@@ -0,0 +1,106 @@
+"""PostgreSQL backend: pooled engine and the pg_trgm title index.
+
+Selected by a ``postgresql://`` (or ``postgresql+asyncpg://``) DATABASE_URL,
+so several app containers can share one database. ``ingredients`` and
+``steps`` are stored as JSONB (see ``RecipeDB``), and title search is an
+``ILIKE '%...%'`` served by a trigram GIN index instead of a table scan;
+``PostgresRecipeRepository`` (``AsyncPostgresRecipeRepository`` with
+asyncpg) in app/repositories.py uses both.
+
+Existing databases can be given the index with::
+
+    python -m app.postgres ensure
+"""
+import argparse
+import logging
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.exc import DBAPIError
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+TRIGRAM_INDEX = "ix_recipes_title_trgm"
+
+_CREATE_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON recipes USING gin (title gin_trgm_ops)",
+]
+
+
+def pool_options() -> Dict[str, Any]:
+    """Connection pool settings for sync and async PostgreSQL engines.
+
+    Connections are checked with a cheap ping on checkout (so a failover or
+    an idle-connection timeout in a proxy costs a reconnect, not a failed
+    request) and recycled after POSTGRES_POOL_RECYCLE_SECONDS.
+    """
+    return {
+        "pool_size": config.POSTGRES_POOL_SIZE,
+        "max_overflow": config.POSTGRES_MAX_OVERFLOW,
+        "pool_timeout": config.POSTGRES_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": config.POSTGRES_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": True,
+    }
+
+
+def create_postgres_engine(url: URL) -> Engine:
+    """Create a pooled engine for a PostgreSQL URL."""
+    return create_engine(url, **pool_options())
+
+
+def ensure_trigram_index(engine: Engine) -> bool:
+    """Enable pg_trgm and create the trigram index on ``recipes.title`` if missing.
+
+    Args:
+        engine: SQLAlchemy engine bound to a database with a ``recipes`` table
+
+    Returns:
+        True if title search is index-backed, False if the database is not
+        PostgreSQL or pg_trgm could not be enabled (title search then scans)
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+    try:
+        with engine.begin() as conn:
+            for statement in _CREATE_STATEMENTS:
+                conn.execute(text(statement))
+    except DBAPIError as e:
+        logger.warning(f"pg_trgm unavailable, title search will scan the recipes table: {e}")
+        return False
+    return True
+
+
+def trigram_index_exists(engine: Engine) -> bool:
+    """Return True if the trigram title index is present in the database."""
+    if engine.dialect.name != "postgresql":
+        return False
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT 1 FROM pg_indexes WHERE tablename = 'recipes' AND indexname = :name"),
+            {"name": TRIGRAM_INDEX},
+        ).first()
+    return row is not None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the PostgreSQL recipe title index")
+    parser.add_argument(
+        "command",
+        choices=["ensure"],
+        help="ensure: enable pg_trgm and create the title index if missing",
+    )
+    parser.parse_args()
+
+    from app.database import get_engine
+
+    if not ensure_trigram_index(get_engine()):
+        raise SystemExit("Trigram search is not supported by this database")
+    print(f"{TRIGRAM_INDEX} ready")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Opt-in request profiling: sampled cProfile runs and a slow-request log.
+
+``ProfilingMiddleware`` runs a random fraction of requests under cProfile
+and keeps those, plus every request slower than a threshold, in a
+``ProfileStore`` ring buffer served at ``/debug/profiles``. Each kept
+request carries a span breakdown (repository calls, the MealDB search, Redis
+commands, TheMealDB HTTP calls) recorded with ``record_span`` and ``traced``,
+so a slow request shows where its time went even when it was not sampled.
+
+Spans are collected through a context variable that is only set while the
+middleware is installed, so with profiling off (the default) recording a
+span is a single ``ContextVar.get``.
+
+cProfile sees the event loop thread only: sync repository methods run in
+the threadpool show up as the ``repo.*`` spans, not in the profile. While a
+request is profiled, other requests interleaved on the same loop are
+profiled with it, and only one request per process is profiled at a time.
+"""
+import cProfile
+import io
+import itertools
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# (name, start, end) perf_counter spans of the request being traced in this
+# context, or None when no request is being traced
+_spans: ContextVar[Optional[List[Tuple[str, float, float]]]] = ContextVar("request_spans", default=None)
+
+
+def record_span(name: str, started: float) -> None:
+    """Record a span from ``started`` (a ``time.perf_counter()`` value) until now."""
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((name, started, time.perf_counter()))
+
+
+async def traced(name: str, awaitable: Awaitable[T]) -> T:
+    """Await ``awaitable``, recording it as a span called ``name``."""
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        record_span(name, started)
+
+
+class ProfileStore:
+    """The last ``maxsize`` profiled requests of this process."""
+
+    def __init__(self, maxsize: int) -> None:
+        self._profiles: Deque[Dict[str, Any]] = deque(maxlen=maxsize)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict[str, Any], profiler: Optional[cProfile.Profile] = None) -> Dict[str, Any]:
+        """Store a request summary; ``profiler`` is formatted only when read."""
+        with self._lock:
+            profile = {"id": next(self._ids), **profile, "profiled": profiler is not None}
+            self._profiles.append({**profile, "_profiler": profiler})
+        return profile
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Stored requests without their cProfile output, newest first."""
+        with self._lock:
+            entries = list(self._profiles)
+        return [{k: v for k, v in entry.items() if k != "_profiler"} for entry in reversed(entries)]
+
+    def get(self, profile_id: int, limit: int = 40) -> Optional[Dict[str, Any]]:
+        """A stored request with the top ``limit`` functions by cumulative time, if still buffered."""
+        with self._lock:
+            entry = next((entry for entry in self._profiles if entry["id"] == profile_id), None)
+        if entry is None:
+            return None
+        profile = {k: v for k, v in entry.items() if k != "_profiler"}
+        profiler = entry["_profiler"]
+        if profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+            profile["profile"] = out.getvalue()
+        return profile
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware sampling requests into a ``ProfileStore``.
+
+    Args:
+        app: The wrapped ASGI app
+        store: Where kept requests go
+        sample_rate: Fraction of requests run under cProfile (0 disables)
+        slow_ms: Requests at least this slow are kept with their spans even
+            if not sampled (0 disables)
+        rng: Source of uniform [0, 1) numbers, for tests
+    """
+
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        sample_rate: float = 0.01,
+        slow_ms: float = 1000.0,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self._random = rng
+        self._profiling = False
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiler = None
+        if self.sample_rate > 0 and not self._profiling and self._random() < self.sample_rate:
+            self._profiling = True
+            profiler = cProfile.Profile()
+
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        spans: List[Tuple[str, float, float]] = []
+        token = _spans.set(spans)
+        started_at = time.time()
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            _spans.reset(token)
+            if profiler is not None or (self.slow_ms > 0 and elapsed_ms >= self.slow_ms):
+                route = scope.get("route")
+                self.store.add(
+                    {
+                        "reason": "sampled" if profiler is not None else "slow",
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "query": scope["query_string"].decode("latin-1"),
+                        "route": route.path if route is not None else None,
+                        "status": status_code,
+                        "started_at": datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+                        "duration_ms": round(elapsed_ms, 3),
+                        "spans": [
+                            {
+                                "name": name,
+                                "start_ms": round((span_start - started) * 1000, 3),
+                                "duration_ms": round((span_end - span_start) * 1000, 3),
+                            }
+                            for name, span_start, span_end in sorted(spans, key=lambda span: span[1])
+                        ],
+                    },
+                    profiler,
+                )
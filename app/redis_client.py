@@ -1,27 +1,115 @@
-import redis
-import json
-from typing import Any, Optional
+import asyncio
+import redis.asyncio as redis
+import time
+import uuid
+from typing import Any, Callable, NamedTuple, Optional
 import logging
+from app import config, metrics, profiling
+from app.cache_codec import CacheCodec
+from app.circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
+# Delete the lock only if we still own it (value matches our token)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def normalize_query(search_query: str) -> str:
+    """Normalize a search query so equivalent queries share cache entries."""
+    return search_query.strip().lower()
+
+
+class CachedResults(NamedTuple):
+    """A cached result set plus the metadata used for early refresh."""
+
+    results: list
+    # Seconds it took to compute the value (the XFetch "delta")
+    delta: float = 0.0
+    # Unix time the entry expires; None for legacy entries without metadata
+    expires_at: Optional[float] = None
+
+
+class CacheStats:
+    """Counters for search-cache lookups in this process."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
+
 
 class RedisClient:
-    """Redis client for caching MealDB search results."""
+    """Async Redis client for caching MealDB search results.
+    
+    Each converted meal is stored once under ``mealdb_meal:<idMeal>``; search
+    keys (``mealdb_search:<query>``) only hold the list of meal ids, which
+    are resolved with a single MGET. A meal that appears in many searches is
+    therefore stored once, and can be served by id for detail pages.
     
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
+    Values are stored as tagged bytes produced by a ``CacheCodec``; plain
+    JSON entries written by older versions are still readable.
+    """
+    
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379",
+        max_connections: int = config.REDIS_MAX_CONNECTIONS,
+        breaker: Optional[CircuitBreaker] = None,
+        codec: Optional[CacheCodec] = None,
+    ):
         """Initialize Redis client.
         
+        Connections come from a bounded pool and are established lazily on
+        the first command, so constructing the client never blocks the event
+        loop. Availability is tracked by a circuit breaker fed by the outcome
+        of real commands instead of a PING before every call.
+        
         Args:
             redis_url: Redis connection URL
+            max_connections: Upper bound on pooled connections; commands
+                beyond it fail fast and are treated as cache misses
+            breaker: Circuit breaker to use (a default one is created if omitted)
+            codec: Value codec to use (configured from app.config if omitted)
         """
+        self.stats = CacheStats()
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=config.REDIS_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=config.REDIS_BREAKER_RESET_SECONDS,
+        )
+        self.codec = codec or CacheCodec(
+            serializer=config.REDIS_CACHE_SERIALIZER,
+            compression=config.REDIS_CACHE_COMPRESSION,
+            compress_threshold=config.REDIS_CACHE_COMPRESS_THRESHOLD,
+        )
         try:
-            self.redis_client = redis.from_url(redis_url, decode_responses=True)
-            # Test connection
-            self.redis_client.ping()
-            logger.info(f"Connected to Redis at {redis_url}")
-        except redis.ConnectionError as e:
-            logger.error(f"Failed to connect to Redis: {e}")
+            self.pool = redis.ConnectionPool.from_url(
+                redis_url,
+                max_connections=max_connections,
+                socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=config.REDIS_SOCKET_TIMEOUT,
+                decode_responses=False,
+            )
+            self.redis_client = redis.Redis(connection_pool=self.pool)
+            logger.info(f"Configured Redis at {redis_url} (max {max_connections} connections)")
+        except (redis.ConnectionError, ValueError) as e:
+            logger.error(f"Failed to configure Redis: {e}")
+            self.pool = None
             self.redis_client = None
     
     def _make_cache_key(self, search_query: str) -> str:
@@ -34,74 +122,297 @@ class RedisClient:
             Cache key string
         """
         # Normalize query for consistent cache keys
-        normalized_query = search_query.strip().lower()
-        return f"mealdb_search:{normalized_query}"
+        return f"mealdb_search:{normalize_query(search_query)}"
+    
+    def _make_meal_key(self, meal_id: Any) -> str:
+        return f"mealdb_meal:{meal_id}"
     
-    def get_cached_results(self, search_query: str) -> Optional[list]:
+    def _make_lock_key(self, search_query: str) -> str:
+        return f"mealdb_lock:{normalize_query(search_query)}"
+    
+    async def get_cached_results(self, search_query: str) -> Optional[list]:
         """Get cached search results from Redis.
         
         Args:
             search_query: The search query string
             
         Returns:
-            Cached results as list, or None if not found
+            Cached results as list (empty for a cached "no results" answer),
+            or None if not found
         """
-        if not self.redis_client:
+        entry = await self.get_cached_entry(search_query)
+        return entry.results if entry is not None else None
+    
+    async def get_cached_entry(self, search_query: str) -> Optional[CachedResults]:
+        """Get cached search results together with their refresh metadata.
+        
+        Args:
+            search_query: The search query string
+            
+        Returns:
+            CachedResults, or None if not found
+        """
+        if not self.redis_client or not self.breaker.allow_request():
             return None
             
+        started = time.perf_counter()
         try:
             cache_key = self._make_cache_key(search_query)
-            cached_data = self.redis_client.get(cache_key)
+            cached_data = await self.redis_client.get(cache_key)
+            self.breaker.record_success()
+            
+            if cached_data is not None:
+                entry = await self._resolve_entry(self.codec.decode(cached_data))
+            else:
+                entry = None
+            metrics.REDIS_GET.observe_since(started)
+            profiling.record_span("redis.get_cached_entry", started)
             
-            if cached_data:
-                results = json.loads(cached_data)
-                logger.info(f"Cache hit for query: '{search_query}'")
-                return results
+            # Per-lookup lines are debug only; /metrics has the counts
+            if entry is not None:
+                if entry.results:
+                    self.stats.hits += 1
+                    metrics.SEARCH_CACHE_HIT.inc()
+                    logger.debug(f"Cache hit for query: '{search_query}'")
+                else:
+                    self.stats.negative_hits += 1
+                    metrics.SEARCH_CACHE_NEGATIVE_HIT.inc()
+                    logger.debug(f"Negative cache hit for query: '{search_query}'")
+                return entry
             else:
-                logger.info(f"Cache miss for query: '{search_query}'")
+                self.stats.misses += 1
+                metrics.SEARCH_CACHE_MISS.inc()
+                logger.debug(f"Cache miss for query: '{search_query}'")
                 return None
                 
         except Exception as e:
+            self.breaker.record_failure()
+            self.stats.errors += 1
+            metrics.SEARCH_CACHE_ERROR.inc()
+            profiling.record_span("redis.get_cached_entry", started)
             logger.error(f"Error retrieving from cache: {e}")
             return None
     
-    def cache_results(self, search_query: str, results: list, ttl_seconds: int = 86400) -> bool:
+    async def _resolve_entry(self, payload: Any) -> Optional[CachedResults]:
+        """Turn a stored search entry into CachedResults, fetching meals by id.
+        
+        Returns None if a referenced meal is no longer cached (e.g. evicted),
+        which callers treat as a miss.
+        """
+        if isinstance(payload, list):
+            # Entry written before refresh metadata was stored
+            return CachedResults(payload)
+        if "ids" not in payload:
+            # Entry written before meals were stored separately
+            return CachedResults(payload["results"], payload["delta"], payload["expires_at"])
+        
+        results = []
+        if payload["ids"]:
+            meals = await self.redis_client.mget([self._make_meal_key(meal_id) for meal_id in payload["ids"]])
+            if any(meal is None for meal in meals):
+                return None
+            results = [self.codec.decode(meal) for meal in meals]
+        return CachedResults(results, payload["delta"], payload["expires_at"])
+    
+    async def get_cached_meal(self, meal_id: str) -> Optional[dict]:
+        """Get a single cached recipe by its MealDB id.
+        
+        Args:
+            meal_id: TheMealDB ``idMeal``
+            
+        Returns:
+            Cached recipe dict, or None if not found
+        """
+        if not self.redis_client or not self.breaker.allow_request():
+            return None
+        started = time.perf_counter()
+        try:
+            cached_data = await self.redis_client.get(self._make_meal_key(meal_id))
+            metrics.REDIS_GET.observe_since(started)
+            profiling.record_span("redis.get_cached_meal", started)
+            self.breaker.record_success()
+            (metrics.MEAL_CACHE_MISS if cached_data is None else metrics.MEAL_CACHE_HIT).inc()
+            return self.codec.decode(cached_data) if cached_data is not None else None
+        except Exception as e:
+            self.breaker.record_failure()
+            metrics.MEAL_CACHE_ERROR.inc()
+            profiling.record_span("redis.get_cached_meal", started)
+            logger.error(f"Error retrieving meal from cache: {e}")
+            return None
+    
+    async def cache_meal(self, recipe: dict, ttl_seconds: int = 86400) -> bool:
+        """Cache a single recipe dict under its id.
+        
+        Args:
+            recipe: Recipe dict with an ``id`` (TheMealDB ``idMeal``)
+            ttl_seconds: Time to live in seconds (default: 24 hours)
+            
+        Returns:
+            True if caching succeeded, False otherwise
+        """
+        if not self.redis_client or not self.breaker.allow_request():
+            return False
+        started = time.perf_counter()
+        try:
+            await self.redis_client.setex(self._make_meal_key(recipe["id"]), ttl_seconds, self.codec.encode(recipe))
+            metrics.REDIS_SET.observe_since(started)
+            profiling.record_span("redis.cache_meal", started)
+            self.breaker.record_success()
+            return True
+        except Exception as e:
+            self.breaker.record_failure()
+            profiling.record_span("redis.cache_meal", started)
+            logger.error(f"Error caching meal: {e}")
+            return False
+    
+    async def cache_results(
+        self, search_query: str, results: list, ttl_seconds: int = 86400, delta: float = 0.0
+    ) -> bool:
         """Cache search results in Redis.
         
         Args:
             search_query: The search query string
-            results: List of search results to cache
+            results: List of recipe dicts (each with an ``id``) to cache; an
+                empty list records that the query has no results (negative caching)
             ttl_seconds: Time to live in seconds (default: 24 hours)
+            delta: Seconds it took to compute the results, used to schedule
+                probabilistic early refresh
             
         Returns:
             True if caching succeeded, False otherwise
         """
-        if not self.redis_client:
+        if not self.redis_client or not self.breaker.allow_request():
             return False
             
+        started = time.perf_counter()
         try:
             cache_key = self._make_cache_key(search_query)
-            json_data = json.dumps(results)
+            entry_data = self.codec.encode({
+                "ids": [result["id"] for result in results],
+                "delta": delta,
+                "expires_at": time.time() + ttl_seconds,
+            })
             
-            self.redis_client.setex(cache_key, ttl_seconds, json_data)
-            logger.info(f"Cached {len(results)} results for query: '{search_query}' (TTL: {ttl_seconds}s)")
+            # Meals first, then the id list referencing them, in one round trip
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for result in results:
+                    pipe.setex(self._make_meal_key(result["id"]), ttl_seconds, self.codec.encode(result))
+                pipe.setex(cache_key, ttl_seconds, entry_data)
+                await pipe.execute()
+            metrics.REDIS_SET.observe_since(started)
+            profiling.record_span("redis.cache_results", started)
+            self.breaker.record_success()
+            logger.debug(f"Cached {len(results)} results for query: '{search_query}' (TTL: {ttl_seconds}s)")
             return True
             
         except Exception as e:
+            self.breaker.record_failure()
+            profiling.record_span("redis.cache_results", started)
             logger.error(f"Error caching results: {e}")
             return False
     
+    async def acquire_lock(self, search_query: str, ttl_ms: int) -> Optional[str]:
+        """Try to take the short refill lease for a query across workers.
+        
+        Args:
+            search_query: The search query string
+            ttl_ms: Lease duration; it expires on its own if the holder dies
+            
+        Returns:
+            A token to pass to ``release_lock`` if the lease was taken, an
+            empty string if Redis is unavailable (proceed without a lease),
+            or None if another worker currently holds it
+        """
+        if not self.redis_client or not self.breaker.allow_request():
+            return ""
+        
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis_client.set(
+                self._make_lock_key(search_query), token, nx=True, px=ttl_ms
+            )
+            self.breaker.record_success()
+            return token if acquired else None
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Error acquiring refill lock: {e}")
+            return ""
+    
+    async def release_lock(self, search_query: str, token: str) -> None:
+        """Release a lease taken with ``acquire_lock`` if we still own it."""
+        if not token or not self.redis_client:
+            return
+        try:
+            await self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, self._make_lock_key(search_query), token)
+        except Exception as e:
+            logger.error(f"Error releasing refill lock: {e}")
+    
+    async def publish_invalidation(self, key: str, origin: str) -> None:
+        """Tell other workers that the cached value for ``key`` changed.
+        
+        Args:
+            key: Normalized search query whose cache entry was rewritten
+            origin: Identifier of the publishing process, so it can ignore
+                its own messages
+        """
+        if not self.redis_client or not self.breaker.allow_request():
+            return
+        try:
+            await self.redis_client.publish(config.MEALDB_INVALIDATION_CHANNEL, f"{origin}:{key}")
+            self.breaker.record_success()
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Error publishing cache invalidation: {e}")
+    
+    async def listen_invalidations(
+        self,
+        on_message: Callable[[str, str], None],
+        on_subscribe: Callable[[], None],
+        retry_seconds: float = 5.0,
+    ) -> None:
+        """Consume invalidation messages until cancelled, reconnecting on errors.
+        
+        Args:
+            on_message: Called with ``(origin, key)`` for every message
+            on_subscribe: Called after each (re)subscription; messages may
+                have been missed while disconnected
+            retry_seconds: Delay before resubscribing after a failure
+        """
+        if not self.redis_client:
+            return
+        while True:
+            pubsub = self.redis_client.pubsub()
+            try:
+                await pubsub.subscribe(config.MEALDB_INVALIDATION_CHANNEL)
+                on_subscribe()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    origin, _, key = message["data"].decode().partition(":")
+                    on_message(origin, key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener disconnected: {e}")
+            finally:
+                await pubsub.aclose()
+            await asyncio.sleep(retry_seconds)
+    
     def is_available(self) -> bool:
-        """Check if Redis is available.
+        """Check if Redis should be used, according to the circuit breaker.
+        
+        This does not touch the network; the breaker state is updated from
+        the outcome of real cache commands.
         
         Returns:
             True if Redis is available, False otherwise
         """
         if not self.redis_client:
             return False
-            
-        try:
-            self.redis_client.ping()
-            return True
-        except:
-            return False
+        return self.breaker.state != CircuitBreaker.OPEN
+    
+    async def close(self) -> None:
+        """Release the underlying connection pool."""
+        if self.redis_client:
+            await self.redis_client.aclose()
+            await self.pool.aclose()
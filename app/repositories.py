@@ -1,16 +1,68 @@
-from typing import List, Protocol, Optional
-from app.models import Recipe, RecipeCreate
+import threading
+from bisect import bisect_left, bisect_right
+from itertools import count, islice
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Protocol, Optional, Sequence, Set, Tuple
+from app.models import RECIPE_FIELDS, Recipe, RecipeCreate
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db, RecipeDB
+from app import database
+from app.database import get_db, DataVersionDB, RecipeDB, RecipeIngredientDB
+from app.facets import FACET_FIELDS, RecipeFilters, parse_minutes
+from app.ingredients import (
+    BY_INGREDIENTS_SQL,
+    IngredientIndex,
+    IngredientMatch,
+    describe_match,
+    ingredient_rows,
+)
+from app.search_index import MATCH_SQL, build_match_query, fts_match_subquery
+from app.snapshot import SnapshotStore
+from app.title_index import GRAM_SIZE, TitleIndex
 
 
 class RecipeRepository(Protocol):
-    """Abstraction for recipe data operations."""
+    """Abstraction for recipe data operations.
 
-    def list_recipes(self) -> List[Recipe]:
+    ``AsyncSQLiteRecipeRepository`` implements the same methods as
+    coroutines; route handlers call either kind through
+    ``app.routers.recipes.call_repository``.
+    """
+
+    def list_recipes(
+        self, limit: Optional[int] = None, after: Optional[int] = None, filters: Optional[RecipeFilters] = None
+    ) -> List[Recipe]:
+        """Return recipes ordered by id, optionally only those with id > ``after``."""
+        ...
+
+    def list_recipe_fields(
+        self,
+        fields: Sequence[str],
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        filters: Optional[RecipeFilters] = None,
+    ) -> List[Dict[str, Any]]:
+        """Like ``list_recipes`` but return dicts holding only ``fields`` (plus ``id``)."""
+        ...
+
+    def facet_counts(self, filters: Optional[RecipeFilters] = None) -> Dict[str, Dict[str, int]]:
+        """Count recipes passing ``filters`` per value of each facet field, most common first."""
+        ...
+
+    def iter_recipes(self, batch_size: int = 1000) -> Iterator[Recipe]:
+        """Yield every recipe ordered by id, loading at most ``batch_size`` at a time."""
         ...
 
-    def search_recipes(self, query: Optional[str]) -> List[Recipe]:
+    def search_recipes(self, query: Optional[str], filters: Optional[RecipeFilters] = None) -> List[Recipe]:
+        ...
+
+    def find_by_ingredients(
+        self, terms: Sequence[str], min_match: int = 1, limit: int = 50
+    ) -> List[Tuple[Recipe, IngredientMatch]]:
+        """Rank recipes by how many of their ingredients ``terms`` cover.
+
+        ``terms`` are normalized ingredient names (see ``normalize_terms``).
+        """
         ...
 
     def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
@@ -19,82 +71,303 @@ class RecipeRepository(Protocol):
     def create_recipe(self, payload: RecipeCreate) -> Recipe:
         ...
 
+    def create_recipes(self, payloads: Sequence[RecipeCreate]) -> List[Recipe]:
+        """Create several recipes atomically: either all are stored or none."""
+        ...
+
     def update_recipe(self, recipe_id: int, payload: RecipeCreate) -> Optional[Recipe]:
         ...
 
     def delete_recipe(self, recipe_id: int) -> bool:
         ...
 
+    def data_version(self) -> int:
+        """Return a counter that changes whenever recipe data is written."""
+        ...
+
 
 class InMemoryRecipeRepository:
     """In-memory implementation of RecipeRepository suitable for tests and dev.
 
     Designed so the data source can be swapped later with minimal changes.
+    Recipes are held in an id -> recipe dict next to a sorted id list, so
+    lookups and writes by id do not scan, and title search goes through a
+    trigram index. Safe for concurrent readers and writers.
     """
 
     def __init__(self, seed: Optional[List[Recipe]] = None) -> None:
-        self._recipes: List[Recipe] = list(seed) if seed else []
-        if self._recipes:
-            self._next_id: int = max(r.id for r in self._recipes) + 1
-        else:
-            self._next_id = 1
+        seed = sorted(seed or [], key=lambda r: r.id)
+        self._recipes: Dict[int, Recipe] = {recipe.id: recipe for recipe in seed}
+        # Ids in ascending order, for cursors and ordered iteration
+        self._order: List[int] = list(self._recipes)
+        first_id = self._order[-1] + 1 if self._order else 1
+        self._ids = count(first_id)
+        # Guards id allocation, self._recipes/self._order and the indexes;
+        # reentrant so readers can call each other while holding it
+        self._lock = threading.RLock()
+        self._version = 0
+        self._titles = TitleIndex()
+        self._ingredients = IngredientIndex()
+        # Facet value -> recipe ids, and parsed (prep, cook) minutes per id
+        self._buckets: Dict[str, Dict[str, Set[int]]] = {field: {} for field in FACET_FIELDS}
+        self._minutes: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+        for recipe in self._recipes.values():
+            self._index(recipe)
+
+    def _index(self, recipe: Recipe) -> None:
+        self._titles.add(recipe.id, recipe.title)
+        self._ingredients.add(recipe.id, recipe.ingredients)
+        for field, buckets in self._buckets.items():
+            buckets.setdefault(getattr(recipe, field), set()).add(recipe.id)
+        self._minutes[recipe.id] = (parse_minutes(recipe.prepTime), parse_minutes(recipe.cookTime))
+
+    def _unindex(self, recipe: Recipe) -> None:
+        self._titles.remove(recipe.id)
+        self._ingredients.remove(recipe.id)
+        for field, buckets in self._buckets.items():
+            ids = buckets.get(getattr(recipe, field))
+            if ids is not None:
+                ids.discard(recipe.id)
+                if not ids:
+                    del buckets[getattr(recipe, field)]
+        self._minutes.pop(recipe.id, None)
+
+    def _matching_ids(self, filters: Optional[RecipeFilters]) -> Optional[Set[int]]:
+        """Ids passing ``filters``, from the facet buckets; None if nothing is filtered."""
+        if filters is None or not filters.active:
+            return None
+        ids: Optional[Set[int]] = None
+        for field in FACET_FIELDS:
+            values = getattr(filters, field)
+            if values:
+                buckets = self._buckets[field]
+                matching = set().union(*(buckets.get(value, ()) for value in values))
+                ids = matching if ids is None else ids & matching
+        if ids is None:
+            ids = set(self._minutes)
+        time_filters = filters._replace(cuisine=(), difficulty=())
+        if time_filters.active:
+            ids = {i for i in ids if time_filters.matches_values("", "", *self._minutes[i])}
+        return ids
+
+    def list_recipes(
+        self, limit: Optional[int] = None, after: Optional[int] = None, filters: Optional[RecipeFilters] = None
+    ) -> List[Recipe]:
+        with self._lock:
+            order = self._order
+            start = bisect_right(order, after) if after is not None else 0
+            ids = self._matching_ids(filters)
+            if ids is None:
+                page = order[start:start + limit] if limit is not None else order[start:]
+            elif len(ids) < len(order) - start:
+                # Few matches: walk them rather than the whole tail of the table
+                page = list(islice(sorted(i for i in ids if after is None or i > after), limit))
+            else:
+                page = list(islice((order[k] for k in range(start, len(order)) if order[k] in ids), limit))
+            return [self._recipes[recipe_id] for recipe_id in page]
+
+    def list_recipe_fields(
+        self,
+        fields: Sequence[str],
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        filters: Optional[RecipeFilters] = None,
+    ) -> List[Dict[str, Any]]:
+        columns = _projected_fields(fields)
+        return [
+            {field: getattr(recipe, field) for field in columns}
+            for recipe in self.list_recipes(limit=limit, after=after, filters=filters)
+        ]
 
-    def list_recipes(self) -> List[Recipe]:
-        return list(self._recipes)
+    def facet_counts(self, filters: Optional[RecipeFilters] = None) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            ids = self._matching_ids(filters)
+            facets = {}
+            for field, buckets in self._buckets.items():
+                counts = {value: len(bucket if ids is None else bucket & ids) for value, bucket in buckets.items()}
+                facets[field] = {value: n for value, n in sorted(counts.items(), key=lambda item: -item[1]) if n}
+            return facets
 
-    def search_recipes(self, query: Optional[str]) -> List[Recipe]:
+    def iter_recipes(self, batch_size: int = 1000) -> Iterator[Recipe]:
+        # Page by id so the lock is only held for one batch at a time
+        after = None
+        while True:
+            batch = self.list_recipes(limit=batch_size, after=after)
+            if not batch:
+                return
+            yield from batch
+            after = batch[-1].id
+
+    def search_recipes(self, query: Optional[str], filters: Optional[RecipeFilters] = None) -> List[Recipe]:
         if not query:
             return []
-        q_lower = query.lower()
-        return [r for r in self._recipes if q_lower in r.title.lower()]
+        with self._lock:
+            ids = self._matching_ids(filters)
+            if len(query) >= GRAM_SIZE:
+                matched = self._titles.search(query)
+                if ids is not None:
+                    matched = [recipe_id for recipe_id in matched if recipe_id in ids]
+            else:
+                # Too short for the trigram index: scan the lowercased titles
+                matched = self._titles.search(query, sorted(ids) if ids is not None else self._order)
+            return [self._recipes[recipe_id] for recipe_id in matched]
+
+    def find_by_ingredients(
+        self, terms: Sequence[str], min_match: int = 1, limit: int = 50
+    ) -> List[Tuple[Recipe, IngredientMatch]]:
+        results = []
+        for recipe_id, match in self._ingredients.search(terms, min_match=min_match, limit=limit):
+            recipe = self.get_recipe(recipe_id)
+            if recipe is not None:
+                results.append((recipe, match))
+        return results
 
     def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
-        for recipe in self._recipes:
-            if recipe.id == recipe_id:
-                return recipe
-        return None
+        return self._recipes.get(recipe_id)
 
     def create_recipe(self, payload: RecipeCreate) -> Recipe:
-        new_recipe = Recipe(id=self._next_id, source="internal", **payload.model_dump())
-        self._recipes.append(new_recipe)
-        self._next_id += 1
-        return new_recipe
+        return self.create_recipes([payload])[0]
+
+    def create_recipes(self, payloads: Sequence[RecipeCreate]) -> List[Recipe]:
+        data = [payload.model_dump() for payload in payloads]
+        with self._lock:
+            new_recipes = [Recipe(id=next(self._ids), source="internal", **item) for item in data]
+            for recipe in new_recipes:
+                # Ids only grow, so appending keeps self._order sorted
+                self._recipes[recipe.id] = recipe
+                self._order.append(recipe.id)
+                self._index(recipe)
+            self._version += 1
+        return new_recipes
 
     def update_recipe(self, recipe_id: int, payload: RecipeCreate) -> Optional[Recipe]:
-        for index, recipe in enumerate(self._recipes):
-            if recipe.id == recipe_id:
-                updated = Recipe(id=recipe_id, source="internal", **payload.model_dump())
-                self._recipes[index] = updated
-                return updated
-        return None
+        updated = Recipe(id=recipe_id, source="internal", **payload.model_dump())
+        with self._lock:
+            recipe = self._recipes.get(recipe_id)
+            if recipe is None:
+                return None
+            self._recipes[recipe_id] = updated
+            self._unindex(recipe)
+            self._index(updated)
+            self._version += 1
+        return updated
 
     def delete_recipe(self, recipe_id: int) -> bool:
-        for index, recipe in enumerate(self._recipes):
-            if recipe.id == recipe_id:
-                del self._recipes[index]
-                return True
-        return False
+        with self._lock:
+            recipe = self._recipes.pop(recipe_id, None)
+            if recipe is None:
+                return False
+            del self._order[bisect_left(self._order, recipe_id)]
+            self._unindex(recipe)
+            self._version += 1
+        return True
+
+    def data_version(self) -> int:
+        return self._version
 
 
 class SQLiteRecipeRepository:
     """SQLite implementation of RecipeRepository for persistent storage."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, full_text: Optional[bool] = None):
+        """
+        Args:
+            db: Database session
+            full_text: Use the FTS5 index for search; defaults to whether the
+                index could be created on the application database
+        """
         self.db = db
+        self.full_text = database.fts_enabled() if full_text is None else full_text
 
-    def list_recipes(self) -> List[Recipe]:
-        db_recipes = self.db.query(RecipeDB).all()
-        return [self._db_to_model(recipe) for recipe in db_recipes]
+    def list_recipes(
+        self, limit: Optional[int] = None, after: Optional[int] = None, filters: Optional[RecipeFilters] = None
+    ) -> List[Recipe]:
+        query = _page_query(_filter_query(self.db.query(RecipeDB), filters), limit, after)
+        return [self._db_to_model(recipe) for recipe in query]
+
+    def list_recipe_fields(
+        self,
+        fields: Sequence[str],
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        filters: Optional[RecipeFilters] = None,
+    ) -> List[Dict[str, Any]]:
+        # Select only the requested columns so large JSON columns are never read
+        columns = _projected_fields(fields)
+        db_columns = [getattr(RecipeDB, field) for field in columns if field != "source"]
+        rows = _page_query(_filter_query(self.db.query(*db_columns), filters), limit, after)
+        results = []
+        for row in rows:
+            item = row._asdict()
+            if "source" in columns:
+                item["source"] = "internal"
+            results.append(item)
+        return results
+
+    def iter_recipes(self, batch_size: int = 1000) -> Iterator[Recipe]:
+        # Keyset batches rather than one long-lived cursor: memory stays
+        # bounded by batch_size (the session only weakly references loaded
+        # rows) and no read transaction is held open for the whole export.
+        after = None
+        while True:
+            batch = _page_query(self.db.query(RecipeDB), batch_size, after).all()
+            if not batch:
+                return
+            for db_recipe in batch:
+                yield self._db_to_model(db_recipe)
+            after = batch[-1].id
+            if len(batch) < batch_size:
+                return
 
-    def search_recipes(self, query: Optional[str]) -> List[Recipe]:
+    def facet_counts(self, filters: Optional[RecipeFilters] = None) -> Dict[str, Dict[str, int]]:
+        rows = self.db.execute(_facet_counts_query(filters))
+        return _facets_from_rows(rows)
+
+    def search_recipes(self, query: Optional[str], filters: Optional[RecipeFilters] = None) -> List[Recipe]:
         if not query:
             return []
-        q_lower = query.lower()
-        db_recipes = self.db.query(RecipeDB).filter(
-            RecipeDB.title.ilike(f"%{q_lower}%")
-        ).all()
+        if self.full_text:
+            # Ranked prefix search over title, ingredients, steps and cuisine
+            match = build_match_query(query)
+            if match is None:
+                return []
+            fts = fts_match_subquery(match)
+            db_recipes = _filter_query(
+                self.db.query(RecipeDB).join(fts, fts.c.id == RecipeDB.id), filters
+            ).order_by(fts.c.rank).all()
+        else:
+            q_lower = query.lower()
+            db_recipes = _filter_query(self.db.query(RecipeDB).filter(
+                RecipeDB.title.ilike(f"%{q_lower}%")
+            ), filters).all()
         return [self._db_to_model(recipe) for recipe in db_recipes]
 
+    def find_by_ingredients(
+        self, terms: Sequence[str], min_match: int = 1, limit: int = 50
+    ) -> List[Tuple[Recipe, IngredientMatch]]:
+        if not terms:
+            return []
+        # Rank in SQL over the term index, then load only the page of recipes
+        ranked = self.db.execute(
+            BY_INGREDIENTS_SQL, {"terms": list(terms), "min_match": min_match, "limit": limit}
+        ).all()
+        if not ranked:
+            return []
+        ids = [row.recipe_id for row in ranked]
+        recipes = {r.id: r for r in self.db.query(RecipeDB).filter(RecipeDB.id.in_(ids))}
+        names: Dict[int, List[str]] = {}
+        for recipe_id, name in self.db.query(RecipeIngredientDB.recipe_id, RecipeIngredientDB.name).filter(
+            RecipeIngredientDB.recipe_id.in_(ids), RecipeIngredientDB.term == RecipeIngredientDB.name
+        ).order_by(RecipeIngredientDB.id):
+            names.setdefault(recipe_id, []).append(name)
+
+        term_set = set(terms)
+        return [
+            (self._db_to_model(recipes[row.recipe_id]), describe_match(names[row.recipe_id], term_set, row.matched))
+            for row in ranked
+            if row.recipe_id in recipes
+        ]
+
     def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
         db_recipe = self.db.query(RecipeDB).filter(RecipeDB.id == recipe_id).first()
         if db_recipe:
@@ -102,24 +375,30 @@ class SQLiteRecipeRepository:
         return None
 
     def create_recipe(self, payload: RecipeCreate) -> Recipe:
-        # Get the next available ID
-        max_id_result = self.db.query(RecipeDB.id).order_by(RecipeDB.id.desc()).first()
-        next_id = (max_id_result[0] + 1) if max_id_result else 1
-        
-        db_recipe = RecipeDB(
-            id=next_id,
-            title=payload.title,
-            ingredients=payload.ingredients,
-            steps=payload.steps,
-            prepTime=payload.prepTime,
-            cookTime=payload.cookTime,
-            difficulty=payload.difficulty,
-            cuisine=payload.cuisine
-        )
-        self.db.add(db_recipe)
-        self.db.commit()
-        self.db.refresh(db_recipe)
-        return self._db_to_model(db_recipe)
+        # The database assigns the id (INTEGER PRIMARY KEY) inside the INSERT
+        # itself, so concurrent writers cannot collide and no max(id) read is needed
+        return self.create_recipes([payload])[0]
+
+    def create_recipes(self, payloads: Sequence[RecipeCreate]) -> List[Recipe]:
+        if not payloads:
+            return []
+        rows = [payload.model_dump() for payload in payloads]
+        # One multi-row INSERT ... RETURNING per batch, in a single transaction
+        try:
+            ids = self.db.scalars(
+                insert(RecipeDB).returning(RecipeDB.id, sort_by_parameter_order=True),
+                [{**row, **_minutes_columns(row["prepTime"], row["cookTime"])} for row in rows],
+            ).all()
+            self._index_ingredients(zip(ids, (row["ingredients"] for row in rows)))
+            self._bump_data_version()
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return [
+            Recipe(id=recipe_id, source="internal", **row)
+            for recipe_id, row in zip(ids, rows)
+        ]
 
     def update_recipe(self, recipe_id: int, payload: RecipeCreate) -> Optional[Recipe]:
         db_recipe = self.db.query(RecipeDB).filter(RecipeDB.id == recipe_id).first()
@@ -133,7 +412,12 @@ class SQLiteRecipeRepository:
         db_recipe.cookTime = payload.cookTime
         db_recipe.difficulty = payload.difficulty
         db_recipe.cuisine = payload.cuisine
+        db_recipe.prep_minutes = parse_minutes(payload.prepTime)
+        db_recipe.cook_minutes = parse_minutes(payload.cookTime)
         
+        self._unindex_ingredients(recipe_id)
+        self._index_ingredients([(recipe_id, payload.ingredients)])
+        self._bump_data_version()
         self.db.commit()
         self.db.refresh(db_recipe)
         return self._db_to_model(db_recipe)
@@ -143,10 +427,29 @@ class SQLiteRecipeRepository:
         if not db_recipe:
             return False
         
+        self._unindex_ingredients(recipe_id)
         self.db.delete(db_recipe)
+        self._bump_data_version()
         self.db.commit()
         return True
 
+    def data_version(self) -> int:
+        version = self.db.query(DataVersionDB.version).filter(DataVersionDB.id == 1).scalar()
+        return version or 0
+
+    def _index_ingredients(self, recipes: Iterable[Tuple[int, Sequence[str]]]) -> None:
+        """Write ``recipe_ingredients`` rows for ``(recipe_id, ingredients)`` pairs."""
+        rows = [row for recipe_id, ingredients in recipes for row in ingredient_rows(recipe_id, ingredients)]
+        if rows:
+            self.db.execute(insert(RecipeIngredientDB), rows)
+
+    def _unindex_ingredients(self, recipe_id: int) -> None:
+        self.db.execute(delete(RecipeIngredientDB).where(RecipeIngredientDB.recipe_id == recipe_id))
+
+    def _bump_data_version(self) -> None:
+        """Increment the data version inside the current write transaction."""
+        self.db.execute(_BUMP_DATA_VERSION_SQL)
+
     def _db_to_model(self, db_recipe: RecipeDB) -> Recipe:
         """Convert database model to Pydantic model."""
         return Recipe(
@@ -162,3 +465,409 @@ class SQLiteRecipeRepository:
         )
 
 
+class PostgresRecipeRepository(SQLiteRecipeRepository):
+    """PostgreSQL implementation of RecipeRepository, shared by all app containers.
+
+    Runs the same statements as ``SQLiteRecipeRepository`` (ingredients and
+    steps are JSONB columns there); only search differs. Title search is a
+    case-insensitive substring match that the pg_trgm GIN index answers
+    without scanning the table, best trigram similarity first.
+    """
+
+    def __init__(self, db: Session, trigram: Optional[bool] = None):
+        """
+        Args:
+            db: Database session
+            trigram: Rank search results by pg_trgm similarity; defaults to
+                whether the trigram index could be created on the application
+                database
+        """
+        super().__init__(db, full_text=False)
+        self.trigram = database.trigram_enabled() if trigram is None else trigram
+
+    def search_recipes(self, query: Optional[str], filters: Optional[RecipeFilters] = None) -> List[Recipe]:
+        if not query:
+            return []
+        db_query = _title_search_query(self.db.query(RecipeDB), query, filters, self.trigram)
+        return [self._db_to_model(recipe) for recipe in db_query]
+
+
+class AsyncSQLiteRecipeRepository:
+    """``SQLiteRecipeRepository`` over an ``AsyncSession``, for async drivers.
+
+    Every method is a coroutine (``iter_recipes`` is an async generator), so
+    queries run without blocking the event loop. Statements are shared with
+    the sync repository; the same code runs on aiosqlite and asyncpg, except
+    PostgreSQL title search (see ``AsyncPostgresRecipeRepository``).
+    """
+
+    def __init__(self, db: AsyncSession, full_text: Optional[bool] = None):
+        """
+        Args:
+            db: Async database session
+            full_text: Use the FTS5 index for search; defaults to whether the
+                index could be created on the application database
+        """
+        self.db = db
+        self.full_text = database.fts_enabled() if full_text is None else full_text
+
+    # Pure conversion, identical for both repositories
+    _db_to_model = SQLiteRecipeRepository._db_to_model
+
+    async def list_recipes(
+        self, limit: Optional[int] = None, after: Optional[int] = None, filters: Optional[RecipeFilters] = None
+    ) -> List[Recipe]:
+        db_recipes = await self.db.scalars(_page_query(_filter_query(select(RecipeDB), filters), limit, after))
+        return [self._db_to_model(recipe) for recipe in db_recipes]
+
+    async def list_recipe_fields(
+        self,
+        fields: Sequence[str],
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        filters: Optional[RecipeFilters] = None,
+    ) -> List[Dict[str, Any]]:
+        columns = _projected_fields(fields)
+        db_columns = [getattr(RecipeDB, field) for field in columns if field != "source"]
+        rows = await self.db.execute(_page_query(_filter_query(select(*db_columns), filters), limit, after))
+        results = []
+        for row in rows:
+            item = row._asdict()
+            if "source" in columns:
+                item["source"] = "internal"
+            results.append(item)
+        return results
+
+    async def iter_recipes(self, batch_size: int = 1000) -> AsyncIterator[Recipe]:
+        after = None
+        while True:
+            batch = (await self.db.scalars(_page_query(select(RecipeDB), batch_size, after))).all()
+            if not batch:
+                return
+            for db_recipe in batch:
+                yield self._db_to_model(db_recipe)
+            after = batch[-1].id
+            if len(batch) < batch_size:
+                return
+
+    async def facet_counts(self, filters: Optional[RecipeFilters] = None) -> Dict[str, Dict[str, int]]:
+        return _facets_from_rows(await self.db.execute(_facet_counts_query(filters)))
+
+    async def search_recipes(self, query: Optional[str], filters: Optional[RecipeFilters] = None) -> List[Recipe]:
+        if not query:
+            return []
+        if self.full_text:
+            match = build_match_query(query)
+            if match is None:
+                return []
+            fts = fts_match_subquery(match)
+            statement = _filter_query(
+                select(RecipeDB).join(fts, fts.c.id == RecipeDB.id), filters
+            ).order_by(fts.c.rank)
+        else:
+            statement = _filter_query(select(RecipeDB).filter(RecipeDB.title.ilike(f"%{query.lower()}%")), filters)
+        return [self._db_to_model(recipe) for recipe in await self.db.scalars(statement)]
+
+    async def find_by_ingredients(
+        self, terms: Sequence[str], min_match: int = 1, limit: int = 50
+    ) -> List[Tuple[Recipe, IngredientMatch]]:
+        if not terms:
+            return []
+        ranked = (await self.db.execute(
+            BY_INGREDIENTS_SQL, {"terms": list(terms), "min_match": min_match, "limit": limit}
+        )).all()
+        if not ranked:
+            return []
+        ids = [row.recipe_id for row in ranked]
+        recipes = {r.id: r for r in await self.db.scalars(select(RecipeDB).filter(RecipeDB.id.in_(ids)))}
+        names: Dict[int, List[str]] = {}
+        for recipe_id, name in await self.db.execute(
+            select(RecipeIngredientDB.recipe_id, RecipeIngredientDB.name).filter(
+                RecipeIngredientDB.recipe_id.in_(ids), RecipeIngredientDB.term == RecipeIngredientDB.name
+            ).order_by(RecipeIngredientDB.id)
+        ):
+            names.setdefault(recipe_id, []).append(name)
+
+        term_set = set(terms)
+        return [
+            (self._db_to_model(recipes[row.recipe_id]), describe_match(names[row.recipe_id], term_set, row.matched))
+            for row in ranked
+            if row.recipe_id in recipes
+        ]
+
+    async def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
+        db_recipe = await self.db.get(RecipeDB, recipe_id)
+        if db_recipe:
+            return self._db_to_model(db_recipe)
+        return None
+
+    async def create_recipe(self, payload: RecipeCreate) -> Recipe:
+        return (await self.create_recipes([payload]))[0]
+
+    async def create_recipes(self, payloads: Sequence[RecipeCreate]) -> List[Recipe]:
+        if not payloads:
+            return []
+        rows = [payload.model_dump() for payload in payloads]
+        try:
+            ids = (await self.db.scalars(
+                insert(RecipeDB).returning(RecipeDB.id, sort_by_parameter_order=True),
+                [{**row, **_minutes_columns(row["prepTime"], row["cookTime"])} for row in rows],
+            )).all()
+            await self._index_ingredients(zip(ids, (row["ingredients"] for row in rows)))
+            await self.db.execute(_BUMP_DATA_VERSION_SQL)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        return [
+            Recipe(id=recipe_id, source="internal", **row)
+            for recipe_id, row in zip(ids, rows)
+        ]
+
+    async def update_recipe(self, recipe_id: int, payload: RecipeCreate) -> Optional[Recipe]:
+        db_recipe = await self.db.get(RecipeDB, recipe_id)
+        if not db_recipe:
+            return None
+        
+        for field, value in payload.model_dump().items():
+            setattr(db_recipe, field, value)
+        db_recipe.prep_minutes = parse_minutes(payload.prepTime)
+        db_recipe.cook_minutes = parse_minutes(payload.cookTime)
+        
+        await self.db.execute(delete(RecipeIngredientDB).where(RecipeIngredientDB.recipe_id == recipe_id))
+        await self._index_ingredients([(recipe_id, payload.ingredients)])
+        await self.db.execute(_BUMP_DATA_VERSION_SQL)
+        await self.db.commit()
+        return self._db_to_model(db_recipe)
+
+    async def delete_recipe(self, recipe_id: int) -> bool:
+        db_recipe = await self.db.get(RecipeDB, recipe_id)
+        if not db_recipe:
+            return False
+        
+        await self.db.execute(delete(RecipeIngredientDB).where(RecipeIngredientDB.recipe_id == recipe_id))
+        await self.db.delete(db_recipe)
+        await self.db.execute(_BUMP_DATA_VERSION_SQL)
+        await self.db.commit()
+        return True
+
+    async def data_version(self) -> int:
+        version = await self.db.scalar(select(DataVersionDB.version).filter(DataVersionDB.id == 1))
+        return version or 0
+
+    async def _index_ingredients(self, recipes: Iterable[Tuple[int, Sequence[str]]]) -> None:
+        rows = [row for recipe_id, ingredients in recipes for row in ingredient_rows(recipe_id, ingredients)]
+        if rows:
+            await self.db.execute(insert(RecipeIngredientDB), rows)
+
+
+class AsyncPostgresRecipeRepository(AsyncSQLiteRecipeRepository):
+    """``PostgresRecipeRepository`` over an ``AsyncSession`` (asyncpg).
+
+    Title search is the same escaped ``ILIKE`` with trigram ranking as the
+    sync repository; everything else is ``AsyncSQLiteRecipeRepository``.
+    """
+
+    def __init__(self, db: AsyncSession, trigram: Optional[bool] = None):
+        """
+        Args:
+            db: Async database session
+            trigram: Rank search results by pg_trgm similarity; defaults to
+                whether the trigram index could be created on the application
+                database
+        """
+        super().__init__(db, full_text=False)
+        self.trigram = database.trigram_enabled() if trigram is None else trigram
+
+    async def search_recipes(self, query: Optional[str], filters: Optional[RecipeFilters] = None) -> List[Recipe]:
+        if not query:
+            return []
+        statement = _title_search_query(select(RecipeDB), query, filters, self.trigram)
+        return [self._db_to_model(recipe) for recipe in await self.db.scalars(statement)]
+
+
+class SnapshotRecipeRepository:
+    """Read replica serving reads from an in-memory ``RecipeSnapshot``.
+
+    Lists, lookups and title searches never touch the database or build ORM
+    objects; FTS searches only ask the index for ranked ids. Writes go
+    through ``writer`` and then publish a new snapshot via
+    ``SnapshotStore.refresh``. Writes made by other processes are not seen
+    until this process reloads.
+    """
+
+    def __init__(self, store: SnapshotStore, writer: SQLiteRecipeRepository) -> None:
+        self.store = store
+        self.writer = writer
+
+    def list_recipes(
+        self, limit: Optional[int] = None, after: Optional[int] = None, filters: Optional[RecipeFilters] = None
+    ) -> List[Recipe]:
+        return [record.to_recipe() for record in self.store.current.page(limit, after, filters)]
+
+    def list_recipes_json(
+        self, limit: Optional[int] = None, after: Optional[int] = None, filters: Optional[RecipeFilters] = None
+    ) -> List[Tuple[int, bytes]]:
+        """Like ``list_recipes`` but return ``(id, pre-encoded JSON)`` pairs."""
+        return [(record.id, record.json) for record in self.store.current.page(limit, after, filters)]
+
+    def list_recipe_fields(
+        self,
+        fields: Sequence[str],
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        filters: Optional[RecipeFilters] = None,
+    ) -> List[Dict[str, Any]]:
+        columns = _projected_fields(fields)
+        return [
+            {field: record.field(field) for field in columns}
+            for record in self.store.current.page(limit, after, filters)
+        ]
+
+    def facet_counts(self, filters: Optional[RecipeFilters] = None) -> Dict[str, Dict[str, int]]:
+        return self.store.current.facet_counts(filters)
+
+    def iter_recipes(self, batch_size: int = 1000) -> Iterator[Recipe]:
+        # One snapshot for the whole iteration, so the export is consistent
+        for record in self.store.current.records:
+            yield record.to_recipe()
+
+    def search_recipes(self, query: Optional[str], filters: Optional[RecipeFilters] = None) -> List[Recipe]:
+        if not query:
+            return []
+        snapshot = self.store.current
+        if not self.writer.full_text:
+            return [record.to_recipe() for record in snapshot.search_titles(query, filters)]
+        match = build_match_query(query)
+        if match is None:
+            return []
+        # Same matching and bm25 ranking as SQLiteRecipeRepository, but only
+        # ids come back from the database
+        ranked = self.writer.db.execute(text(MATCH_SQL + " ORDER BY rank"), {"match": match}).all()
+        results = []
+        for row in ranked:
+            record = snapshot.by_id.get(row.id)
+            if record is not None and record.matches(filters):
+                results.append(record.to_recipe())
+        return results
+
+    def find_by_ingredients(
+        self, terms: Sequence[str], min_match: int = 1, limit: int = 50
+    ) -> List[Tuple[Recipe, IngredientMatch]]:
+        return self.writer.find_by_ingredients(terms, min_match=min_match, limit=limit)
+
+    def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
+        record = self.store.current.by_id.get(recipe_id)
+        return record.to_recipe() if record is not None else None
+
+    def get_recipe_json(self, recipe_id: int) -> Optional[bytes]:
+        """The pre-encoded JSON body of a recipe, or None if it does not exist."""
+        record = self.store.current.by_id.get(recipe_id)
+        return record.json if record is not None else None
+
+    def create_recipe(self, payload: RecipeCreate) -> Recipe:
+        return self.create_recipes([payload])[0]
+
+    def create_recipes(self, payloads: Sequence[RecipeCreate]) -> List[Recipe]:
+        created = self.writer.create_recipes(payloads)
+        if created:
+            self.store.refresh(self.writer.db, [recipe.id for recipe in created])
+        return created
+
+    def update_recipe(self, recipe_id: int, payload: RecipeCreate) -> Optional[Recipe]:
+        updated = self.writer.update_recipe(recipe_id, payload)
+        if updated is not None:
+            self.store.refresh(self.writer.db, [recipe_id])
+        return updated
+
+    def delete_recipe(self, recipe_id: int) -> bool:
+        deleted = self.writer.delete_recipe(recipe_id)
+        if deleted:
+            self.store.refresh(self.writer.db, [recipe_id])
+        return deleted
+
+    def data_version(self) -> int:
+        return self.store.current.version
+
+
+# Upsert so databases created before the counter existed need no seeding
+_BUMP_DATA_VERSION_SQL = text(
+    "INSERT INTO data_version (id, version) VALUES (1, 1) "
+    "ON CONFLICT (id) DO UPDATE SET version = data_version.version + 1"
+)
+
+
+def _minutes_columns(prep_time: str, cook_time: str) -> Dict[str, Optional[int]]:
+    """Parsed time columns stored next to the free-text prepTime/cookTime."""
+    return {"prep_minutes": parse_minutes(prep_time), "cook_minutes": parse_minutes(cook_time)}
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so ``value`` matches literally (escape character ``\\``)."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _title_search_query(query, search: str, filters: Optional[RecipeFilters], trigram: bool):
+    """Recipes whose title contains ``search`` (case-insensitive, wildcards literal).
+
+    With ``trigram`` the best pg_trgm similarity comes first; ties and the
+    non-trigram case are ordered by id. Works on a ``Query`` or a ``select()``.
+    """
+    query = _filter_query(query.filter(RecipeDB.title.ilike(f"%{_escape_like(search)}%", escape="\\")), filters)
+    if trigram:
+        query = query.order_by(func.similarity(RecipeDB.title, search).desc())
+    return query.order_by(RecipeDB.id)
+
+
+def _filter_query(query, filters: Optional[RecipeFilters]):
+    """Push ``filters`` down into the WHERE clause of a query on recipes."""
+    if filters is None:
+        return query
+    if filters.cuisine:
+        query = query.filter(RecipeDB.cuisine.in_(filters.cuisine))
+    if filters.difficulty:
+        query = query.filter(RecipeDB.difficulty.in_(filters.difficulty))
+    if filters.max_prep_minutes is not None:
+        query = query.filter(RecipeDB.prep_minutes <= filters.max_prep_minutes)
+    if filters.max_cook_minutes is not None:
+        query = query.filter(RecipeDB.cook_minutes <= filters.max_cook_minutes)
+    if filters.max_total_minutes is not None:
+        query = query.filter(RecipeDB.prep_minutes + RecipeDB.cook_minutes <= filters.max_total_minutes)
+    return query
+
+
+def _page_query(query, limit: Optional[int], after: Optional[int]):
+    """Apply keyset pagination on the primary key to a query."""
+    query = query.order_by(RecipeDB.id)
+    if after is not None:
+        query = query.filter(RecipeDB.id > after)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def _facet_counts_query(filters: Optional[RecipeFilters]):
+    # One GROUP BY over the (cuisine, difficulty) index covers both facets
+    return _filter_query(
+        select(RecipeDB.cuisine, RecipeDB.difficulty, func.count(RecipeDB.id)), filters
+    ).group_by(RecipeDB.cuisine, RecipeDB.difficulty)
+
+
+def _facets_from_rows(rows: Iterable[Tuple[str, str, int]]) -> Dict[str, Dict[str, int]]:
+    """Per-facet counts, most common first, from (cuisine, difficulty, count) rows."""
+    facets: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS}
+    for cuisine, difficulty, n in rows:
+        facets["cuisine"][cuisine] = facets["cuisine"].get(cuisine, 0) + n
+        facets["difficulty"][difficulty] = facets["difficulty"].get(difficulty, 0) + n
+    return {
+        field: dict(sorted(counts.items(), key=lambda item: -item[1]))
+        for field, counts in facets.items()
+    }
+
+
+def _projected_fields(fields: Sequence[str]) -> List[str]:
+    """Return the projection for ``fields``: "id" first, then the rest, deduplicated."""
+    unknown = set(fields) - set(RECIPE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown recipe fields: {', '.join(sorted(unknown))}")
+    return ["id"] + [field for field in dict.fromkeys(fields) if field != "id"]
@@ -0,0 +1,155 @@
+"""Opt-in capture of served requests as JSON lines, for traffic replay.
+
+``RequestLogMiddleware`` turns each request into one line like::
+
+    {"ts": 1760000000.123, "method": "GET", "path": "/recipes/search",
+     "query": "q=chicken", "route": "/recipes/search", "status": 200,
+     "duration_ms": 3.1, "cache": "HIT"}
+
+``ts`` is the Unix time the request arrived, which is what the replay tool
+(``python -m benchmarks.replay``) uses to reproduce inter-arrival times;
+``cache`` is the ``X-Cache`` response header, when there is one. Request
+bodies are only kept up to a configured size (off by default), as
+``body``.
+
+Lines are handed to a ``RequestLog``, whose writer thread appends them to
+the file in batches, so the request path never waits on disk. Each batch
+is a single append, so several workers can share one file.
+"""
+import json
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+_STOP = object()
+
+
+class RequestLog:
+    """Appends records to a JSONL file from a background thread.
+
+    Args:
+        path: File to append to (created if missing)
+        flush_seconds: Longest a record waits before it is written
+    """
+
+    def __init__(self, path: str, flush_seconds: float = 1.0) -> None:
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="request-log-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Queue ``record`` for writing; never blocks."""
+        self._queue.put(record)
+
+    def close(self) -> None:
+        """Write everything queued so far and stop the writer thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                batch: List[Dict[str, Any]] = []
+                stop = False
+                try:
+                    item = self._queue.get(timeout=self.flush_seconds)
+                    while True:
+                        if item is _STOP:
+                            stop = True
+                            break
+                        batch.append(item)
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                if batch:
+                    f.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch))
+                    f.flush()
+                    self.written += len(batch)
+                if stop:
+                    return
+
+
+class RequestLogMiddleware:
+    """ASGI middleware recording requests into a ``RequestLog``.
+
+    Args:
+        app: The wrapped ASGI app
+        log: Where records go
+        sample_rate: Fraction of requests recorded
+        max_body_bytes: Request bodies up to this size are recorded (0
+            disables); larger ones are marked ``"body_truncated": true``
+        rng: Source of uniform [0, 1) numbers, for tests
+    """
+
+    def __init__(
+        self,
+        app,
+        log: RequestLog,
+        sample_rate: float = 1.0,
+        max_body_bytes: int = 0,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.app = app
+        self.log = log
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+        self._random = rng
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or (self.sample_rate < 1.0 and self._random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        cache_status: Optional[str] = None
+        body = bytearray()
+        body_truncated = False
+
+        async def receive_with_body():
+            nonlocal body_truncated
+            message = await receive()
+            if message["type"] == "http.request" and not body_truncated:
+                chunk = message.get("body", b"")
+                if len(body) + len(chunk) > self.max_body_bytes:
+                    body_truncated = True
+                    body.clear()
+                else:
+                    body.extend(chunk)
+            return message
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code, cache_status
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name.lower() == b"x-cache":
+                        cache_status = value.decode("latin-1")
+            await send(message)
+
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_with_body if self.max_body_bytes > 0 else receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            record: Dict[str, Any] = {
+                "ts": round(started_at, 6),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "route": route.path if route is not None else None,
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+            if cache_status is not None:
+                record["cache"] = cache_status
+            if body:
+                record["body"] = body.decode("utf-8", errors="replace")
+            elif body_truncated:
+                record["body_truncated"] = True
+            self.log.add(record)
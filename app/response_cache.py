@@ -0,0 +1,88 @@
+import hashlib
+import json
+import time
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from app.local_cache import TTLCache
+
+
+class RenderedResponse(NamedTuple):
+    """A response body serialized once, with its entity tag."""
+
+    body: bytes
+    etag: str
+
+
+def render_json(content: Any) -> bytes:
+    """Serialize ``content`` exactly like FastAPI's default ``JSONResponse``."""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def make_etag(body: bytes) -> str:
+    """Strong entity tag derived from the body bytes."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def render(content: Any) -> RenderedResponse:
+    """Serialize ``content`` and tag it, without caching it."""
+    body = render_json(content)
+    return RenderedResponse(body, make_etag(body))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an ``If-None-Match`` header against ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """In-process cache of rendered JSON responses.
+
+    Callers put a data version in the key, so entries for old data are
+    never served again and simply age out of the LRU.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[RenderedResponse]:
+        rendered = self._cache.get(key)
+        if rendered is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return rendered
+
+    def put(self, key: Hashable, content: Any) -> RenderedResponse:
+        """Render ``content``, store it under ``key`` and return it."""
+        rendered = render(content)
+        self._cache.set(key, rendered)
+        return rendered
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "size": len(self._cache),
+        }
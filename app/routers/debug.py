@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from app.profiling import ProfileStore
+
+router = APIRouter(prefix="/debug", include_in_schema=False)
+
+
+def get_profile_store(request: Request) -> ProfileStore:
+    """Dependency provider for this process's request profiles (404 unless PROFILING_ENABLED)."""
+    store = getattr(request.app.state, "request_profiles", None)
+    if store is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Request profiling is disabled")
+    return store
+
+
+@router.get("/profiles")
+async def list_profiles(store: ProfileStore = Depends(get_profile_store)):
+    """Sampled and slow requests still in the buffer, newest first, with their spans."""
+    return {"profiles": store.summaries()}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: int,
+    limit: int = Query(default=40, ge=1, le=500, description="Functions to list, by cumulative time"),
+    store: ProfileStore = Depends(get_profile_store),
+):
+    """One buffered request, with its cProfile output if it was sampled."""
+    profile = store.get(profile_id, limit=limit)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return profile
@@ -1,7 +1,32 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response
+from app import metrics
+from app.mealdb_client import MealDBClient
+from app.response_cache import ResponseCache
+from app.routers.recipes import get_mealdb_client, get_search_response_cache
 
 router = APIRouter()
 
 @router.get("/ping")
 async def ping():
-    return "pong"
\ No newline at end of file
+    return "pong"
+
+@router.get("/cache/stats")
+async def cache_stats(
+    mealdb_client: MealDBClient = Depends(get_mealdb_client),
+    response_cache: ResponseCache = Depends(get_search_response_cache),
+):
+    """Search cache counters for this worker process."""
+    redis_client = mealdb_client.redis_client
+    return {
+        "search": redis_client.stats.snapshot(),
+        "tiers": mealdb_client.tier_stats.snapshot(),
+        "l1_size": len(mealdb_client.local_cache),
+        "redis_circuit": redis_client.breaker.state,
+        "responses": response_cache.snapshot(),
+    }
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, stage and cache metrics for this worker process, in the Prometheus text format."""
+    # Set as a header: a text/ media_type would get a second charset appended
+    return Response(metrics.render_metrics(), headers={"Content-Type": metrics.CONTENT_TYPE})
@@ -1,66 +1,554 @@
-from fastapi import APIRouter, HTTPException, Response, status, Query, Depends
-from typing import List, Optional
+import asyncio
+import inspect
+import json
+import time
+import zlib
+from contextlib import AbstractContextManager, asynccontextmanager, closing, contextmanager
+from fastapi import APIRouter, HTTPException, Request, Response, status, Query, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from app import config, metrics, profiling
+from app.facets import RecipeFilters, count_facets
+from app.ingredients import match_sort_key, normalize_terms
 from app.models import Recipe, RecipeCreate
-from app.repositories import RecipeRepository, SQLiteRecipeRepository
-from app.database import get_db, Session
+from app.repositories import (
+    AsyncPostgresRecipeRepository,
+    AsyncSQLiteRecipeRepository,
+    PostgresRecipeRepository,
+    RecipeRepository,
+    SnapshotRecipeRepository,
+    SQLiteRecipeRepository,
+)
+from app import database
+from app.database import get_async_db, get_db, AsyncSession, Session
+from app.local_cache import TTLCache
 from app.mealdb_client import MealDBClient
+from app.redis_client import normalize_query
+from app.response_cache import RenderedResponse, ResponseCache, etag_matches, render, render_json
 
 router = APIRouter()
 
 
-def get_repository(db: Session = Depends(get_db)) -> RecipeRepository:
-    """Dependency provider that returns a SQLite repository instance."""
-    return SQLiteRecipeRepository(db)
+# An async DATABASE_URL gives handlers an AsyncSession; the snapshot mode
+# always writes through a sync session
+_get_session = get_async_db if database.ASYNC_DATABASE and config.REPOSITORY_MODE != "snapshot" else get_db
+
+
+def get_repository(request: Request, db: Union[Session, AsyncSession] = Depends(_get_session)) -> RecipeRepository:
+    """Dependency provider that returns the repository for ``REPOSITORY_MODE``.
+
+    ``sqlite`` reads and writes through a session (an ``AsyncSession`` when
+    ``DATABASE_URL`` names an async driver) on SQLite or, for a
+    ``postgresql://`` URL, PostgreSQL; ``snapshot`` serves reads from the
+    in-memory snapshot loaded in the app lifespan and writes through the
+    database.
+    """
+    if isinstance(db, AsyncSession):
+        return AsyncPostgresRecipeRepository(db) if database.POSTGRES else AsyncSQLiteRecipeRepository(db)
+    repo = PostgresRecipeRepository(db) if database.POSTGRES else SQLiteRecipeRepository(db)
+    if config.REPOSITORY_MODE == "snapshot":
+        return SnapshotRecipeRepository(request.app.state.recipe_snapshots, repo)
+    return repo
+
+
+def get_repository_opener(request: Request) -> Callable[[], Any]:
+    """Dependency provider for streamed responses: opens repositories on their own session.
+
+    Returns a function that gives a context manager (an async one for an
+    async ``DATABASE_URL``) yielding a ``get_repository`` repository and
+    closing its session on exit. A ``StreamingResponse`` body may run after
+    the request's yield dependencies, and with them its session, are closed
+    (FastAPI 0.106+), so it opens its own.
+    """
+    if _get_session is get_async_db:
+        @asynccontextmanager
+        async def open_async_repository() -> AsyncIterator[RecipeRepository]:
+            async with database.get_async_sessionmaker()() as db:
+                yield get_repository(request, db)
+
+        return open_async_repository
+
+    @contextmanager
+    def open_repository() -> Iterator[RecipeRepository]:
+        with closing(database.get_sessionmaker()()) as db:
+            yield get_repository(request, db)
+
+    return open_repository
+
+
+async def call_repository(method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call a repository method without blocking the event loop.
+
+    Async repository methods are awaited; sync ones run in the threadpool.
+    Both are recorded as the ``db_query`` stage, including any wait for a
+    threadpool slot, and as a ``repo.<method>`` span of a profiled request.
+    """
+    started = time.perf_counter()
+    metrics.DB_QUERIES_IN_FLIGHT.inc()
+    try:
+        if inspect.iscoroutinefunction(method):
+            return await method(*args, **kwargs)
+        return await run_in_threadpool(method, *args, **kwargs)
+    finally:
+        metrics.DB_QUERIES_IN_FLIGHT.dec()
+        metrics.DB_QUERY.observe_since(started)
+        profiling.record_span(f"repo.{method.__name__}", started)
+
+
+def get_mealdb_client(request: Request) -> MealDBClient:
+    """Dependency provider that returns the process-wide MealDB client.
+
+    The client is created once in the app lifespan (see ``main.py``).
+    """
+    return request.app.state.mealdb_client
+
+
+def get_search_response_cache(request: Request) -> ResponseCache:
+    """Dependency provider that returns the process-wide rendered search cache.
+
+    The cache is normally created in the app lifespan; apps served without
+    it (tests, benchmarks) get one on first use.
+    """
+    response_cache = getattr(request.app.state, "search_response_cache", None)
+    if response_cache is None:
+        response_cache = ResponseCache(
+            maxsize=config.SEARCH_RESPONSE_CACHE_MAXSIZE,
+            ttl=config.SEARCH_RESPONSE_CACHE_TTL_SECONDS,
+        )
+        request.app.state.search_response_cache = response_cache
+    return response_cache
+
+
+def get_facet_cache(request: Request) -> TTLCache:
+    """Dependency provider that returns the process-wide facet count cache.
+
+    Like the search response cache, it is created on first use when the
+    app lifespan did not create it.
+    """
+    facet_cache = getattr(request.app.state, "facet_cache", None)
+    if facet_cache is None:
+        facet_cache = TTLCache(config.FACET_CACHE_MAXSIZE, config.FACET_CACHE_TTL_SECONDS)
+        request.app.state.facet_cache = facet_cache
+    return facet_cache
+
+
+def _csv(value: Optional[str]) -> Tuple[str, ...]:
+    """Split a comma-separated query parameter, dropping blanks."""
+    if not value:
+        return ()
+    return tuple(dict.fromkeys(item.strip() for item in value.split(",") if item.strip()))
+
+
+def get_recipe_filters(
+    cuisine: Optional[str] = Query(default=None, description="Comma-separated cuisines, e.g. Italian,Indian"),
+    difficulty: Optional[str] = Query(default=None, description="Comma-separated difficulties, e.g. Easy,Medium"),
+    max_prep_minutes: Optional[int] = Query(default=None, ge=0),
+    max_cook_minutes: Optional[int] = Query(default=None, ge=0),
+    max_total_minutes: Optional[int] = Query(default=None, ge=0, description="Limit on prep plus cook time"),
+) -> RecipeFilters:
+    """Dependency that collects the recipe filter query parameters."""
+    return RecipeFilters(
+        cuisine=_csv(cuisine),
+        difficulty=_csv(difficulty),
+        max_prep_minutes=max_prep_minutes,
+        max_cook_minutes=max_cook_minutes,
+        max_total_minutes=max_total_minutes,
+    )
+
+
+def _rendered_response(rendered: RenderedResponse, request: Request, cache_status: str) -> Response:
+    """Send pre-rendered JSON, or 304 if the client already has this version."""
+    headers = {"ETag": rendered.etag, "X-Cache": cache_status}
+    if etag_matches(request.headers.get("if-none-match"), rendered.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=rendered.body, media_type="application/json", headers=headers)
+
+
+async def _facet_counts(
+    repo: RecipeRepository, filters: RecipeFilters, facet_cache: TTLCache
+) -> Dict[str, Dict[str, int]]:
+    """Facet counts for ``filters``, cached per data version."""
+    key = (await call_repository(repo.data_version), filters)
+    counts = facet_cache.get(key)
+    if counts is None:
+        counts = await call_repository(repo.facet_counts, filters)
+        facet_cache.set(key, counts)
+    return counts
 
 @router.get("/recipes")
-async def get_all_recipes(repo: RecipeRepository = Depends(get_repository)):
-    return {"recipes": [recipe.model_dump() for recipe in repo.list_recipes()]}
+async def get_all_recipes(
+    limit: int = Query(default=config.RECIPES_DEFAULT_PAGE_SIZE, ge=1, le=config.RECIPES_MAX_PAGE_SIZE),
+    after: Optional[int] = Query(default=None, description="Cursor: return recipes with id greater than this"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return, e.g. id,title"),
+    facets: bool = Query(default=False, description="Include facet counts for the filtered set"),
+    filters: RecipeFilters = Depends(get_recipe_filters),
+    repo: RecipeRepository = Depends(get_repository),
+    facet_cache: TTLCache = Depends(get_facet_cache),
+):
+    """
+    List recipes ordered by id, one page at a time, optionally filtered.
+    Pass the returned ``next_cursor`` as ``after`` to fetch the next page;
+    it is null on the last page.
+    """
+    # Fetch one extra row to know whether another page exists
+    if fields:
+        try:
+            items = await call_repository(
+                repo.list_recipe_fields,
+                [f.strip() for f in fields.split(",") if f.strip()],
+                limit=limit + 1,
+                after=after,
+                filters=filters,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    elif isinstance(repo, SnapshotRecipeRepository):
+        # Splice the snapshot's pre-encoded recipes into the body as-is
+        encoded = repo.list_recipes_json(limit=limit + 1, after=after, filters=filters)
+        next_cursor = encoded[limit - 1][0] if len(encoded) > limit else None
+        body = b'{"recipes":[' + b",".join(item for _, item in encoded[:limit]) + b'],"next_cursor":'
+        body += render_json(next_cursor)
+        if facets:
+            body += b',"facets":' + render_json(await _facet_counts(repo, filters, facet_cache))
+        return Response(content=body + b"}", media_type="application/json")
+    else:
+        recipes = await call_repository(repo.list_recipes, limit=limit + 1, after=after, filters=filters)
+        items = [recipe.model_dump() for recipe in recipes]
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1]["id"]
+    response = {"recipes": items, "next_cursor": next_cursor}
+    if facets:
+        response["facets"] = await _facet_counts(repo, filters, facet_cache)
+    return response
 
 @router.get("/recipes/search")
-async def search_recipes(q: Optional[str] = Query(default=None), repo: RecipeRepository = Depends(get_repository)):
+async def search_recipes(
+    request: Request,
+    q: Optional[str] = Query(default=None),
+    facets: bool = Query(default=False, description="Include facet counts for the results"),
+    filters: RecipeFilters = Depends(get_recipe_filters),
+    repo: RecipeRepository = Depends(get_repository),
+    mealdb_client: MealDBClient = Depends(get_mealdb_client),
+    response_cache: ResponseCache = Depends(get_search_response_cache),
+):
     """
     Search for recipes in both internal database and TheMealDB.
     Returns combined results with source field indicating origin.
+    
+    Responses are rendered once per query and internal data version, sent
+    with an ETag, and answered with 304 when ``If-None-Match`` matches.
+    While TheMealDB is failing the response is not cached (``X-Cache:
+    BYPASS``), so the outage does not outlive it.
     """
     if not q or not q.strip():
         return {"recipes": []}
+    query = normalize_query(q)
     
-    # Search internal recipes
-    internal_recipes = repo.search_recipes(q)
+    # Read the version before searching: a write that lands mid-search only
+    # leaves an entry under the old version, which is never looked up again
+    version = await call_repository(repo.data_version)
+    key = (query, version, filters, facets)
+    rendered = response_cache.get(key)
+    if rendered is not None:
+        metrics.RESPONSE_CACHE_HIT.inc()
+        return _rendered_response(rendered, request, "HIT")
+    metrics.RESPONSE_CACHE_MISS.inc()
     
-    # Search external recipes from MealDB
-    mealdb_client = MealDBClient()
-    external_recipes = mealdb_client.search_recipes(q)
+    # Search internal recipes (blocking DB call, run off the event loop)
+    # and external recipes from MealDB concurrently
+    internal_recipes, external = await asyncio.gather(
+        call_repository(repo.search_recipes, query, filters),
+        profiling.traced("mealdb_client.search_recipes", mealdb_client.search(query)),
+    )
+    external_recipes = external.recipes
+    # Internal filters ran in the database; MealDB results are filtered here
+    if filters.active:
+        external_recipes = [r for r in external_recipes if filters.matches(r)]
     
     # Combine results
     all_recipes = internal_recipes + external_recipes
     
     # Convert to dict format for JSON response
+    serializing = time.perf_counter()
     matches = [r.model_dump() for r in all_recipes]
     
-    return {"recipes": matches}
+    content = {"recipes": matches}
+    if facets:
+        content["facets"] = count_facets(all_recipes)
+    if external.complete:
+        rendered, cache_status = response_cache.put(key, content), "MISS"
+    else:
+        rendered, cache_status = render(content), "BYPASS"
+    metrics.SERIALIZE.observe_since(serializing)
+    profiling.record_span("serialize", serializing)
+    return _rendered_response(rendered, request, cache_status)
+
+def _ndjson_chunks(recipes: Iterable[Recipe], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Serialize recipes one per line, grouped into chunks of roughly chunk_size bytes."""
+    buffer = bytearray()
+    for recipe in recipes:
+        buffer += recipe.model_dump_json().encode()
+        buffer += b"\n"
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gzip a byte stream on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def _ndjson_chunks_async(recipes: AsyncIterable[Recipe], chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """``_ndjson_chunks`` for recipes streamed by an async repository."""
+    buffer = bytearray()
+    async for recipe in recipes:
+        buffer += recipe.model_dump_json().encode()
+        buffer += b"\n"
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def _gzip_chunks_async(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """``_gzip_chunks`` for an async byte stream."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+@router.get("/recipes/export")
+def export_recipes(
+    format: str = Query(default="ndjson", pattern="^ndjson$"),
+    gzip: bool = Query(default=False, description="Gzip the stream on the fly"),
+    open_repository: Callable[[], Any] = Depends(get_repository_opener),
+):
+    """
+    Stream the whole internal catalogue as NDJSON, one recipe per line.
+    Memory use is bounded by the export batch size, not the table size.
+    The stream reads through its own session, open until the last line.
+    """
+    opened = open_repository()
+    headers = {"Content-Disposition": 'attachment; filename="recipes.ndjson"'}
+    if not isinstance(opened, AbstractContextManager):
+        async def recipes_async() -> AsyncIterator[Recipe]:
+            async with opened as repo:
+                async for recipe in repo.iter_recipes(batch_size=config.EXPORT_BATCH_SIZE):
+                    yield recipe
+
+        body = _ndjson_chunks_async(recipes_async())
+        if gzip:
+            body = _gzip_chunks_async(body)
+    else:
+        def recipes() -> Iterator[Recipe]:
+            with opened as repo:
+                yield from repo.iter_recipes(batch_size=config.EXPORT_BATCH_SIZE)
+
+        body = _ndjson_chunks(recipes())
+        if gzip:
+            body = _gzip_chunks(body)
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+@router.get("/recipes/by-ingredients")
+async def find_recipes_by_ingredients(
+    have: str = Query(description="Comma-separated ingredients you have, e.g. egg,bacon"),
+    min_match: int = Query(default=1, ge=1, description="Minimum number of your ingredients a recipe must use"),
+    limit: int = Query(default=config.INGREDIENT_SEARCH_DEFAULT_LIMIT, ge=1, le=config.INGREDIENT_SEARCH_MAX_LIMIT),
+    repo: RecipeRepository = Depends(get_repository),
+    mealdb_client: MealDBClient = Depends(get_mealdb_client),
+):
+    """
+    "What can I cook": internal and cached MealDB recipes ranked by the
+    share of their ingredients you have, with the ones you are missing.
+    """
+    terms = normalize_terms(have.split(","))
+    if not terms:
+        return {"recipes": []}
+    
+    internal = await call_repository(repo.find_by_ingredients, terms, min_match, limit)
+    external = mealdb_client.find_by_ingredients(terms, min_match=min_match, limit=limit)
+    ranked = sorted(internal + external, key=lambda item: match_sort_key(item[1]))[:limit]
+    return {
+        "recipes": [
+            {
+                **recipe.model_dump(),
+                "matched": match.matched,
+                "coverage": match.coverage,
+                "missing": list(match.missing),
+            }
+            for recipe, match in ranked
+        ]
+    }
+
+_INTERNAL_ID = TypeAdapter(int)
+
+
+def _internal_recipe_id(recipe_id: str) -> int:
+    """``recipe_id`` parsed like the ``int`` path parameter of PUT and DELETE, same 422 included."""
+    try:
+        return _INTERNAL_ID.validate_python(recipe_id)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("path", "recipe_id")} for error in e.errors()]) from e
+
 
 @router.get("/recipes/{recipe_id}")
-async def get_recipe(recipe_id: int, repo: RecipeRepository = Depends(get_repository)):
-    recipe = repo.get_recipe(recipe_id)
+async def get_recipe(
+    recipe_id: str,
+    source: str = Query(default="internal", pattern="^(internal|mealdb)$"),
+    repo: RecipeRepository = Depends(get_repository),
+    mealdb_client: MealDBClient = Depends(get_mealdb_client),
+):
+    """
+    Get a single recipe. Internal recipes have integer ids; pass
+    ``source=mealdb`` to look up a TheMealDB recipe by its ``idMeal``.
+    """
+    if source == "mealdb":
+        recipe = await mealdb_client.get_recipe_by_id(recipe_id)
+    else:
+        internal_id = _internal_recipe_id(recipe_id)
+        if isinstance(repo, SnapshotRecipeRepository):
+            body = repo.get_recipe_json(internal_id)
+            if body is None:
+                raise HTTPException(status_code=404, detail="Recipe not found")
+            return Response(content=body, media_type="application/json")
+        recipe = await call_repository(repo.get_recipe, internal_id)
     if recipe is None:
         raise HTTPException(status_code=404, detail="Recipe not found")
     return recipe
 
 @router.post("/recipes", status_code=status.HTTP_201_CREATED)
 async def create_recipe(payload: RecipeCreate, repo: RecipeRepository = Depends(get_repository)):
-    return repo.create_recipe(payload)
+    return await call_repository(repo.create_recipe, payload)
+
+
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+
+
+def _parse_json_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+
+
+async def _read_bulk_items(request: Request) -> AsyncIterator[Any]:
+    """Yield raw items from a JSON array body or, incrementally, from an NDJSON stream.
+
+    Lines that are not valid JSON are yielded as ValueError instances so they
+    can be reported per item.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_MEDIA_TYPES:
+        pending = b""
+        async for chunk in request.stream():
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _parse_json_line(line)
+        if pending.strip():
+            yield _parse_json_line(pending)
+        return
+
+    try:
+        items = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Body must be a JSON array of recipes or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="Body must be a JSON array of recipes or NDJSON")
+    for item in items:
+        yield item
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}" for err in error.errors()
+    )
+
+
+async def _aenumerate(items: AsyncIterator[Any]) -> AsyncIterator[Tuple[int, Any]]:
+    index = 0
+    async for item in items:
+        yield index, item
+        index += 1
+
+
+@router.post("/recipes/bulk")
+async def bulk_create_recipes(
+    request: Request,
+    batch_size: int = Query(default=config.BULK_BATCH_SIZE, ge=1, le=config.BULK_MAX_BATCH_SIZE),
+    repo: RecipeRepository = Depends(get_repository),
+):
+    """
+    Create many recipes from a JSON array or an NDJSON stream
+    (Content-Type: application/x-ndjson).
+
+    Valid items are inserted in batches of ``batch_size``, one transaction per
+    batch. Returns one result per input item, in input order, holding either
+    the new ``id`` or an ``error``.
+    """
+    results: List[Dict[str, Any]] = []
+    batch: List[Tuple[int, RecipeCreate]] = []
+
+    async def flush() -> None:
+        try:
+            created = await call_repository(repo.create_recipes, [payload for _, payload in batch])
+        except SQLAlchemyError as e:
+            results.extend({"index": index, "error": f"Insert failed: {e.__class__.__name__}"} for index, _ in batch)
+        else:
+            results.extend({"index": index, "id": recipe.id} for (index, _), recipe in zip(batch, created))
+        batch.clear()
+
+    async for index, item in _aenumerate(_read_bulk_items(request)):
+        if isinstance(item, ValueError):
+            results.append({"index": index, "error": str(item)})
+            continue
+        try:
+            batch.append((index, RecipeCreate.model_validate(item)))
+        except ValidationError as e:
+            results.append({"index": index, "error": _validation_message(e)})
+            continue
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    results.sort(key=lambda result: result["index"])
+    created = sum(1 for result in results if "id" in result)
+    return {"created": created, "failed": len(results) - created, "results": results}
+
 
 @router.put("/recipes/{recipe_id}")
 async def update_recipe(recipe_id: int, payload: RecipeCreate, repo: RecipeRepository = Depends(get_repository)):
-    updated = repo.update_recipe(recipe_id, payload)
+    updated = await call_repository(repo.update_recipe, recipe_id, payload)
     if updated is None:
         raise HTTPException(status_code=404, detail="Recipe not found")
     return updated
 
 @router.delete("/recipes/{recipe_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_recipe(recipe_id: int, repo: RecipeRepository = Depends(get_repository)):
-    deleted = repo.delete_recipe(recipe_id)
+    deleted = await call_repository(repo.delete_recipe, recipe_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Recipe not found")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
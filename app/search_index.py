@@ -0,0 +1,163 @@
+"""SQLite FTS5 full-text index over the recipes table.
+
+The index is an external-content FTS5 table (``recipes_fts``) that mirrors
+``title``, ``ingredients``, ``steps`` and ``cuisine`` of ``recipes`` and is
+kept in sync by triggers, so every write path (ORM, bulk inserts, raw SQL)
+updates it without extra repository code.
+
+Existing databases can be migrated/backfilled with::
+
+    python -m app.search_index rebuild
+"""
+import argparse
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import Float, Integer, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "recipes_fts"
+
+# bm25 column weights, in FTS column order: title, ingredients, steps, cuisine
+BM25_WEIGHTS = (10.0, 2.0, 1.0, 4.0)
+
+_FTS_COLUMNS = "title, ingredients, steps, cuisine"
+
+_CREATE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_FTS_COLUMNS},
+        content='recipes',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_ai AFTER INSERT ON recipes BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.title, new.ingredients, new.steps, new.cuisine);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_ad AFTER DELETE ON recipes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.title, old.ingredients, old.steps, old.cuisine);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_au AFTER UPDATE ON recipes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.title, old.ingredients, old.steps, old.cuisine);
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.title, new.ingredients, new.steps, new.cuisine);
+    END
+    """,
+]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+MATCH_SQL = f"""
+    SELECT rowid AS id, bm25({FTS_TABLE}, {", ".join(str(w) for w in BM25_WEIGHTS)}) AS rank
+    FROM {FTS_TABLE}
+    WHERE {FTS_TABLE} MATCH :match
+"""
+
+
+def fts_match_subquery(match: str):
+    """Subquery of ``(id, rank)`` for recipes matching ``match``; lower rank is better.
+
+    Join it to ``recipes`` so other filters can be applied in the same query.
+    """
+    return text(MATCH_SQL).bindparams(match=match).columns(id=Integer, rank=Float).subquery("fts_match")
+
+
+def fts_index_exists(engine: Engine) -> bool:
+    """Return True if the FTS table is present in the database."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+    return row is not None
+
+
+def ensure_fts_index(engine: Engine) -> bool:
+    """Create the FTS table and sync triggers if missing, backfilling once.
+
+    Args:
+        engine: SQLAlchemy engine bound to a database with a ``recipes`` table
+
+    Returns:
+        True if full-text search is available, False if the database is not
+        SQLite or SQLite was built without FTS5
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+
+    existed = fts_index_exists(engine)
+    try:
+        with engine.begin() as conn:
+            for statement in _CREATE_STATEMENTS:
+                conn.execute(text(statement))
+    except OperationalError as e:
+        logger.warning(f"FTS5 unavailable, falling back to LIKE search: {e}")
+        return False
+
+    if not existed:
+        rebuild_fts_index(engine)
+    return True
+
+
+def rebuild_fts_index(engine: Engine) -> None:
+    """Rebuild the FTS index from the current contents of ``recipes``."""
+    with engine.begin() as conn:
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    logger.info("Rebuilt recipe full-text index")
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn free-text user input into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term and all terms must match, so
+    ``"chick tikka"`` finds "Chicken Tikka Masala". FTS operators in the
+    input are treated as plain words.
+
+    Args:
+        query: Raw search string
+
+    Returns:
+        MATCH expression, or None if the query has no searchable words
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the recipe full-text index")
+    parser.add_argument(
+        "command",
+        choices=["ensure", "rebuild"],
+        help="ensure: create the index if missing; rebuild: create and repopulate from recipes",
+    )
+    args = parser.parse_args()
+
+    from app.database import get_engine
+
+    engine = get_engine()
+    if not ensure_fts_index(engine):
+        raise SystemExit("Full-text search is not supported by this database")
+    if args.command == "rebuild":
+        rebuild_fts_index(engine)
+    print(f"{FTS_TABLE} ready")
+
+
+if __name__ == "__main__":
+    main()
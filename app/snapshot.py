@@ -0,0 +1,190 @@
+"""Immutable in-memory snapshots of the recipes table.
+
+A ``RecipeSnapshot`` holds every internal recipe as a compact tuple record
+with its JSON response body pre-encoded, sorted by id. Snapshots are never
+mutated: after a write, ``SnapshotStore.refresh`` re-reads the written rows,
+builds a new snapshot sharing all other records with the old one, and swaps
+it in (copy-on-write). Readers that grabbed the old snapshot keep a
+consistent view until they finish.
+"""
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+
+from app.database import DataVersionDB, RecipeDB
+from app.facets import FACET_FIELDS, RecipeFilters, parse_minutes
+from app.models import Recipe
+from app.response_cache import render_json
+
+
+class RecipeRecord(NamedTuple):
+    """One recipe as stored in a snapshot."""
+
+    id: int
+    title: str
+    ingredients: Tuple[str, ...]
+    steps: Tuple[str, ...]
+    prepTime: str
+    cookTime: str
+    difficulty: str
+    cuisine: str
+    prep_minutes: Optional[int]
+    cook_minutes: Optional[int]
+    # Lowercased title, for substring search
+    title_key: str
+    # The recipe rendered exactly as a JSON response would render it
+    json: bytes
+
+    @classmethod
+    def from_row(cls, row: Any) -> "RecipeRecord":
+        """Build a record from a ``recipes`` row (or any object with its columns)."""
+        ingredients = tuple(row.ingredients or ())
+        steps = tuple(row.steps or ())
+        body = render_json({
+            "title": row.title,
+            "ingredients": list(ingredients),
+            "steps": list(steps),
+            "prepTime": row.prepTime,
+            "cookTime": row.cookTime,
+            "difficulty": row.difficulty,
+            "cuisine": row.cuisine,
+            "id": row.id,
+            "source": "internal",
+        })
+        return cls(
+            row.id, row.title, ingredients, steps, row.prepTime, row.cookTime, row.difficulty, row.cuisine,
+            parse_minutes(row.prepTime), parse_minutes(row.cookTime), row.title.lower(), body,
+        )
+
+    def to_recipe(self) -> Recipe:
+        # Stored data was validated on the way in; skip validation
+        return Recipe.model_construct(
+            id=self.id,
+            title=self.title,
+            ingredients=list(self.ingredients),
+            steps=list(self.steps),
+            prepTime=self.prepTime,
+            cookTime=self.cookTime,
+            difficulty=self.difficulty,
+            cuisine=self.cuisine,
+            source="internal",
+        )
+
+    def field(self, name: str) -> Any:
+        """Value of a ``Recipe`` field, for projections."""
+        if name == "source":
+            return "internal"
+        value = getattr(self, name)
+        return list(value) if isinstance(value, tuple) else value
+
+    def matches(self, filters: Optional[RecipeFilters]) -> bool:
+        return filters is None or filters.matches_values(
+            self.cuisine, self.difficulty, self.prep_minutes, self.cook_minutes
+        )
+
+
+class RecipeSnapshot:
+    """An immutable, id-ordered set of recipe records."""
+
+    __slots__ = ("records", "ids", "by_id", "version")
+
+    def __init__(self, records: Iterable[RecipeRecord], version: int = 0) -> None:
+        self.records: Tuple[RecipeRecord, ...] = tuple(sorted(records, key=lambda record: record.id))
+        self.ids: Tuple[int, ...] = tuple(record.id for record in self.records)
+        self.by_id: Dict[int, RecipeRecord] = {record.id: record for record in self.records}
+        # Starts at the database data version and goes up by one per
+        # published snapshot; two snapshots never share a version
+        self.version = version
+
+    def page(
+        self, limit: Optional[int] = None, after: Optional[int] = None, filters: Optional[RecipeFilters] = None
+    ) -> List[RecipeRecord]:
+        """Records ordered by id, optionally only those with id > ``after``."""
+        start = bisect_right(self.ids, after) if after is not None else 0
+        if filters is None or not filters.active:
+            end = start + limit if limit is not None else None
+            return list(self.records[start:end])
+        page = []
+        for index in range(start, len(self.records)):
+            record = self.records[index]
+            if record.matches(filters):
+                page.append(record)
+                if limit is not None and len(page) >= limit:
+                    break
+        return page
+
+    def search_titles(self, query: str, filters: Optional[RecipeFilters] = None) -> List[RecipeRecord]:
+        """Records whose title contains ``query`` (case-insensitive), in id order."""
+        query = query.lower()
+        return [record for record in self.records if query in record.title_key and record.matches(filters)]
+
+    def facet_counts(self, filters: Optional[RecipeFilters] = None) -> Dict[str, Dict[str, int]]:
+        facets: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS}
+        active = filters is not None and filters.active
+        for record in self.records:
+            if active and not record.matches(filters):
+                continue
+            for field in FACET_FIELDS:
+                counts = facets[field]
+                value = getattr(record, field)
+                counts[value] = counts.get(value, 0) + 1
+        return {field: dict(sorted(counts.items(), key=lambda item: -item[1])) for field, counts in facets.items()}
+
+    def replace(self, records: Sequence[RecipeRecord], deleted: Iterable[int]) -> "RecipeSnapshot":
+        """The next snapshot, with ``records`` upserted and ``deleted`` ids removed."""
+        by_id = dict(self.by_id)
+        for recipe_id in deleted:
+            by_id.pop(recipe_id, None)
+        for record in records:
+            by_id[record.id] = record
+        # Nearly sorted already (new ids come last), so the sort is ~linear
+        return RecipeSnapshot(by_id.values(), self.version + 1)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class SnapshotStore:
+    """Holds the current ``RecipeSnapshot`` and publishes new ones after writes."""
+
+    def __init__(self, snapshot: RecipeSnapshot) -> None:
+        self._snapshot = snapshot
+        # Serializes refreshes; readers never take it
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, bind: Engine) -> "SnapshotStore":
+        """Read the whole recipes table into a first snapshot."""
+        with bind.connect() as conn:
+            rows = conn.execute(select(RecipeDB.__table__)).all()
+            version = conn.execute(select(DataVersionDB.version).where(DataVersionDB.id == 1)).scalar() or 0
+        return cls(RecipeSnapshot((RecipeRecord.from_row(row) for row in rows), version))
+
+    @property
+    def current(self) -> RecipeSnapshot:
+        return self._snapshot
+
+    def refresh(self, conn: Connection, recipe_ids: Sequence[int]) -> RecipeSnapshot:
+        """Re-read ``recipe_ids`` after a committed write and publish a new snapshot.
+
+        Rows are re-read under the lock rather than taken from the writer, so
+        when two writes to the same recipe race, the last refresh still
+        publishes what the database holds.
+
+        Args:
+            conn: Connection or session to read the committed rows with
+            recipe_ids: Recipes that were created, updated or deleted
+
+        Returns:
+            The newly published snapshot
+        """
+        with self._lock:
+            rows = conn.execute(select(RecipeDB.__table__).where(RecipeDB.id.in_(list(recipe_ids)))).all()
+            records = [RecipeRecord.from_row(row) for row in rows]
+            found = {record.id for record in records}
+            deleted = [recipe_id for recipe_id in recipe_ids if recipe_id not in found]
+            self._snapshot = self._snapshot.replace(records, deleted)
+            return self._snapshot
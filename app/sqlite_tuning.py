@@ -0,0 +1,162 @@
+"""SQLite connection profiles: pragmas applied on connect and a read/write split.
+
+``SQLITE_PROFILE=default`` keeps SQLite's defaults (rollback journal,
+``synchronous=FULL``) on one engine shared by readers and writers, where a
+writer locks readers out for the length of its transaction.
+
+``SQLITE_PROFILE=tuned`` switches the database to WAL, so readers and the
+writer no longer block each other, and sets the pragmas below on every
+connection. With ``SQLITE_READ_POOL_SIZE > 0`` it also splits connections:
+all writes in the process go through a single writer connection (writers
+queue on the pool instead of spinning on SQLITE_BUSY), and reads use a pool
+of read-only connections. ``ReadWriteSession`` routes each statement.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+from app import config
+
+PROFILES = ("default", "tuned")
+
+# First keywords of raw SQL statements that must run on the writer
+_WRITE_KEYWORDS = {"INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER"}
+
+
+def tuned_pragmas(read_only: bool = False) -> List[str]:
+    """Pragmas for the ``tuned`` profile, from the SQLITE_* settings.
+
+    Args:
+        read_only: Pragmas for a read-pool connection: no journal mode
+            change (a read-only connection cannot make it) and query_only on
+
+    Returns:
+        PRAGMA statements to run on each new connection
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {config.SQLITE_BUSY_TIMEOUT_MS}",
+        # Safe in WAL mode: a crash can lose the last commits, not corrupt the file
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA mmap_size = {config.SQLITE_MMAP_SIZE}",
+        # Negative values are KiB rather than pages
+        f"PRAGMA cache_size = -{config.SQLITE_CACHE_SIZE_KB}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+    return pragmas
+
+
+def install_pragmas(engine: Engine, pragmas: List[str]) -> None:
+    """Run ``pragmas`` on every connection ``engine`` opens."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def read_only_url(url: URL) -> URL:
+    """``sqlite:///path`` as a read-only URI (``file:path?mode=ro``)."""
+    return url.set(database=f"file:{url.database}", query={**url.query, "mode": "ro", "uri": "true"})
+
+
+def create_sqlite_engines(url: URL, profile: str, read_pool_size: int) -> Tuple[Engine, Optional[Engine]]:
+    """Create the engines for a connection profile.
+
+    Args:
+        url: Database URL; non-SQLite URLs get a plain engine
+        profile: ``default`` or ``tuned``
+        read_pool_size: Read-only connections to pool; 0 shares one engine
+            for reads and writes
+
+    Returns:
+        ``(engine, read_engine)``. ``engine`` takes writes (and everything
+        when ``read_engine`` is None); it is the engine to use for schema
+        work.
+
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown SQLite profile: {profile}")
+    if url.get_backend_name() != "sqlite":
+        return create_engine(url), None
+
+    connect_args = {"check_same_thread": False}
+    if profile == "default":
+        return create_engine(url, connect_args=connect_args), None
+
+    split = read_pool_size > 0 and url.database not in (None, "", ":memory:")
+    writer_pool = {"pool_size": 1, "max_overflow": 0, "pool_timeout": config.SQLITE_WRITER_TIMEOUT_SECONDS}
+    engine = create_engine(url, connect_args=connect_args, **(writer_pool if split else {}))
+    install_pragmas(engine, tuned_pragmas())
+    if not split:
+        return engine, None
+
+    # Create the file and switch it to WAL before opening it read-only
+    with engine.connect():
+        pass
+    read_engine = create_engine(
+        read_only_url(url), connect_args=connect_args, pool_size=read_pool_size, max_overflow=read_pool_size
+    )
+    install_pragmas(read_engine, tuned_pragmas(read_only=True))
+    return engine, read_engine
+
+
+def _is_write(clause) -> bool:
+    if isinstance(clause, UpdateBase):
+        return True
+    if isinstance(clause, TextClause):
+        words = clause.text.split(None, 1)
+        return bool(words) and words[0].upper() in _WRITE_KEYWORDS
+    return False
+
+
+class ReadWriteSession(Session):
+    """Session that sends writes to ``writer`` and reads to ``reader``.
+
+    Flushes, INSERT/UPDATE/DELETE statements and write-looking raw SQL go to
+    the writer. Once a transaction has written, the rest of it stays on the
+    writer so it reads its own changes.
+    """
+
+    def __init__(self, *args, writer: Engine, reader: Engine, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.writer = writer
+        self.reader = reader
+        self._writing = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        if self._writing or self._flushing or _is_write(clause):
+            self._writing = True
+            return self.writer
+        return self.reader
+
+    def commit(self) -> None:
+        try:
+            super().commit()
+        finally:
+            self._writing = False
+
+    def rollback(self) -> None:
+        try:
+            super().rollback()
+        finally:
+            self._writing = False
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._writing = False
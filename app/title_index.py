@@ -0,0 +1,84 @@
+"""Trigram index for case-insensitive substring search over recipe titles.
+
+Each lowercased title is split into overlapping three-character grams, and
+each gram maps to a sorted array of the ids whose title contains it. A
+query of three or more characters only has to check the ids under its
+rarest gram, and those come out already in id order. Shorter queries fall
+back to scanning the precomputed lowercased titles.
+"""
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set
+
+GRAM_SIZE = 3
+
+
+def title_grams(title: str) -> Set[str]:
+    """Distinct trigrams of an already lowercased title."""
+    return {title[i:i + GRAM_SIZE] for i in range(len(title) - GRAM_SIZE + 1)}
+
+
+class TitleIndex:
+    """Trigram index from title substrings to recipe ids.
+
+    Not thread-safe on its own; ``InMemoryRecipeRepository`` guards it with
+    its lock.
+    """
+
+    def __init__(self) -> None:
+        self._titles: Dict[int, str] = {}
+        # Sorted id arrays take a fraction of the memory of sets of ints
+        self._postings: Dict[str, array] = {}
+
+    def add(self, recipe_id: int, title: str) -> None:
+        """Index (or re-index) ``recipe_id`` under ``title``."""
+        self.remove(recipe_id)
+        title = title.lower()
+        self._titles[recipe_id] = title
+        for gram in title_grams(title):
+            ids = self._postings.get(gram)
+            if ids is None:
+                self._postings[gram] = array("q", (recipe_id,))
+            elif ids[-1] < recipe_id:
+                # New recipes get the highest id, so this is the common case
+                ids.append(recipe_id)
+            else:
+                insort(ids, recipe_id)
+
+    def remove(self, recipe_id: int) -> None:
+        title = self._titles.pop(recipe_id, None)
+        if title is None:
+            return
+        for gram in title_grams(title):
+            ids = self._postings[gram]
+            index = bisect_left(ids, recipe_id)
+            if index < len(ids) and ids[index] == recipe_id:
+                del ids[index]
+            if not ids:
+                del self._postings[gram]
+
+    def search(self, query: str, candidates: Optional[Iterable[int]] = None) -> List[int]:
+        """Ids whose title contains ``query`` (case-insensitive), in id order.
+
+        Args:
+            query: Substring to look for
+            candidates: Ids in ascending order to check instead of the index
+                postings, e.g. when a filter has already narrowed them down
+
+        Returns:
+            Matching ids, ascending
+        """
+        query = query.lower()
+        titles = self._titles
+        if candidates is None:
+            if len(query) < GRAM_SIZE:
+                candidates = sorted(titles)
+            else:
+                postings = [self._postings.get(gram) for gram in title_grams(query)]
+                if not all(postings):
+                    return []
+                candidates = min(postings, key=len)
+        return [recipe_id for recipe_id in candidates if query in titles.get(recipe_id, "")]
+
+    def __len__(self) -> int:
+        return len(self._titles)
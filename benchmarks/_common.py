@@ -0,0 +1,127 @@
+"""Shared helpers for the benchmark scripts."""
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, RecipeDB
+from app.search_index import ensure_fts_index
+
+CUISINES = ["Italian", "Indian", "Mexican", "Japanese", "French", "Thai", "Greek", "American"]
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+INGREDIENTS = [
+    "chicken", "beef", "pasta", "rice", "eggs", "bacon", "cheese", "tomato", "onion", "garlic",
+    "butter", "flour", "milk", "potato", "carrot", "lemon", "basil", "chili", "ginger", "tofu",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (pct in 0-100)."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def fake_recipe_rows(count: int, start_id: int = 1, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Yield deterministic, realistically sized recipe rows for the recipes table."""
+    rng = random.Random(seed)
+    for recipe_id in range(start_id, start_id + count):
+        ingredients = rng.sample(INGREDIENTS, 6)
+        yield {
+            "id": recipe_id,
+            "title": f"{ingredients[0].title()} {rng.choice(CUISINES)} Special {recipe_id}",
+            "ingredients": ingredients,
+            "steps": [f"Step {n}: prepare the {ing} carefully and season to taste" for n, ing in enumerate(ingredients, 1)],
+            "prepTime": f"{rng.randint(5, 60)} minutes",
+            "cookTime": f"{rng.randint(5, 120)} minutes",
+            "difficulty": rng.choice(DIFFICULTIES),
+            "cuisine": rng.choice(CUISINES),
+        }
+
+
+def create_temp_database(path: str, rows: int, batch_size: int = 10_000) -> Engine:
+    """Create a SQLite database at ``path`` with the app schema and ``rows`` fake recipes."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    ensure_fts_index(engine)
+    batch: List[Dict[str, Any]] = []
+    with engine.begin() as conn:
+        for row in fake_recipe_rows(rows):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.execute(RecipeDB.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(RecipeDB.__table__.insert(), batch)
+    return engine
+
+
+def session_dependency(engine: Engine):
+    """Build a get_db-style dependency bound to ``engine``."""
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def _get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    return _get_db
+
+
+def load_mealdb_meals() -> List[Dict[str, Any]]:
+    """Meals from the TheMealDB-format fixture file."""
+    with open(os.path.join(FIXTURES_DIR, "mealdb_meals.json"), encoding="utf-8") as f:
+        return json.load(f)["meals"]
+
+
+def search_mealdb_meals(meals: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+    """Filter fixture meals the way TheMealDB's ``search.php?s=`` does (name substring)."""
+    query = query.strip().lower()
+    return [meal for meal in meals if query in meal["strMeal"].lower()]
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit, with ``-dirty`` for local changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+        return commit + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(name: str, results: Dict[str, Any], params: Dict[str, Any], path: str = "") -> str:
+    """Write benchmark results as JSON and return the file path.
+
+    The file records the commit and interpreter next to ``results`` so runs
+    from different commits can be compared with ``benchmarks.compare``.
+    The default path is ``results/<name>-<commit>.json``.
+    """
+    commit = git_commit()
+    path = path or os.path.join(RESULTS_DIR, f"{name}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    document = {
+        "benchmark": name,
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    return path
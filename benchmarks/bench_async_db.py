@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: request throughput with the sync vs the async database session.
+
+Runs the app in-process over ASGI against a temporary SQLite database and
+drives it with N concurrent clients, each looping over a mix of
+GET /recipes pages, GET /recipes/{id} and GET /recipes/search. Modes:
+  * sync  - SQLiteRecipeRepository on a Session, calls run in the threadpool
+  * async - AsyncSQLiteRecipeRepository on an aiosqlite AsyncSession
+
+Usage:
+    python -m benchmarks.bench_async_db [--rows 20000] [--clients 64] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Callable, List
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks._common import create_temp_database, percentile, session_dependency
+from main import app
+from app.local_cache import TTLCache
+from app.mealdb_client import MealDBClient
+from app.repositories import AsyncSQLiteRecipeRepository, SQLiteRecipeRepository
+from app.response_cache import ResponseCache
+from app.routers import recipes as recipes_router
+
+
+def _request_mix(rows: int, seed: int) -> Callable[[], str]:
+    rng = random.Random(seed)
+
+    def next_url() -> str:
+        kind = rng.random()
+        if kind < 0.4:
+            return f"/recipes?limit=50&after={rng.randint(0, rows)}"
+        if kind < 0.8:
+            return f"/recipes/{rng.randint(1, rows)}"
+        # Fake titles end in their id, so this matches a handful of rows
+        return f"/recipes/search?q=special%20{rng.randint(1, rows)}"
+
+    return next_url
+
+
+async def _drive(clients: int, seconds: float, rows: int) -> List[float]:
+    latencies: List[float] = []
+    deadline = time.perf_counter() + seconds
+    transport = httpx.ASGITransport(app=app)
+
+    async def worker(n: int) -> None:
+        next_url = _request_mix(rows, seed=n)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get(next_url())
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.text
+
+    await asyncio.gather(*(worker(n) for n in range(clients)))
+    return latencies
+
+
+async def run(rows: int, clients: int, seconds: float) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "recipes.db")
+        engine = create_temp_database(path, rows)
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+        get_sync_db = session_dependency(engine)
+
+        def sync_repository():
+            for db in get_sync_db():
+                yield SQLiteRecipeRepository(db, full_text=True)
+
+        async def async_repository():
+            async with AsyncSessionLocal() as db:
+                yield AsyncSQLiteRecipeRepository(db, full_text=True)
+
+        mealdb_client = MealDBClient(
+            redis_url="redis://127.0.0.1:1",
+            http_client=httpx.AsyncClient(
+                transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"meals": None}))
+            ),
+        )
+        app.dependency_overrides[recipes_router.get_mealdb_client] = lambda: mealdb_client
+        app.dependency_overrides[recipes_router.get_facet_cache] = lambda: TTLCache(maxsize=1, ttl=0.001)
+
+        print(f"{rows} recipes, {clients} concurrent clients, {seconds:.0f} s per mode")
+        for label, dependency in (("sync", sync_repository), ("async", async_repository)):
+            app.dependency_overrides[recipes_router.get_repository] = dependency
+            # Fresh, tiny response cache so searches hit the database
+            app.dependency_overrides[recipes_router.get_search_response_cache] = lambda: ResponseCache(1, 0.001)
+            latencies = await _drive(clients, seconds, rows)
+            print(
+                f"{label:>6}: {len(latencies) / seconds:8.1f} req/s  "
+                f"p50={percentile(latencies, 50):.1f}ms p99={percentile(latencies, 99):.1f}ms"
+            )
+
+        app.dependency_overrides.clear()
+        await mealdb_client.aclose()
+        await async_engine.dispose()
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.clients, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recipe import throughput (rows/sec).
+
+Compares, on a fresh temporary SQLite database each time:
+  * single   - POST /recipes once per recipe
+  * bulk     - POST /recipes/bulk with a JSON array
+  * ndjson   - POST /recipes/bulk with an NDJSON body
+at several batch sizes. Requests go through the app in-process, without
+its startup, so ./recipes.db is never opened.
+
+Usage:
+    python -m benchmarks.bench_bulk_import [--rows 5000] [--single-rows 1000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from fastapi.testclient import TestClient
+
+from benchmarks._common import create_temp_database, fake_recipe_rows, session_dependency
+from main import app
+from app.repositories import SQLiteRecipeRepository
+from app.routers import recipes as recipes_router
+
+
+def _payloads(count: int) -> List[Dict[str, Any]]:
+    payloads = []
+    for row in fake_recipe_rows(count):
+        row.pop("id")
+        payloads.append(row)
+    return payloads
+
+
+def _timed(label: str, tmp: str, rows: int, send) -> None:
+    db_path = os.path.join(tmp, f"{label}.db")
+    engine = create_temp_database(db_path, 0)
+    get_db = session_dependency(engine)
+
+    def repository():
+        for db in get_db():
+            yield SQLiteRecipeRepository(db, full_text=True)
+
+    app.dependency_overrides[recipes_router.get_repository] = repository
+    # Not used as a context manager: the lifespan (migrations on the app
+    # database, Redis listener) is not run
+    client = TestClient(app)
+    start = time.perf_counter()
+    send(client)
+    elapsed = time.perf_counter() - start
+    app.dependency_overrides.clear()
+    engine.dispose()
+    print(f"{label:>22}: {rows / elapsed:10.0f} rows/sec ({rows} rows in {elapsed:.2f}s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--single-rows", type=int, default=1000, help="rows for the one-request-per-row baseline")
+    args = parser.parse_args()
+
+    payloads = _payloads(args.rows)
+    ndjson = "\n".join(json.dumps(p) for p in payloads)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def single(client):
+            for payload in payloads[: args.single_rows]:
+                assert client.post("/recipes", json=payload).status_code == 201
+
+        _timed("single", tmp, args.single_rows, single)
+
+        for batch_size in (100, 500, 2000):
+            def bulk(client, batch_size=batch_size):
+                data = client.post(f"/recipes/bulk?batch_size={batch_size}", json=payloads).json()
+                assert data["created"] == args.rows, data["failed"]
+
+            def stream(client, batch_size=batch_size):
+                data = client.post(
+                    f"/recipes/bulk?batch_size={batch_size}",
+                    content=ndjson,
+                    headers={"Content-Type": "application/x-ndjson"},
+                ).json()
+                assert data["created"] == args.rows, data["failed"]
+
+            _timed(f"bulk batch={batch_size}", tmp, args.rows, bulk)
+            _timed(f"ndjson batch={batch_size}", tmp, args.rows, stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Redis value codecs for cached MealDB recipes.
+
+Encodes the converted fixture recipes with each available codec setting and
+reports bytes per key and encode/decode time. Two shapes are measured:
+  * meal   - one recipe per key (what RedisClient stores per mealdb_meal:<id>)
+  * search - a whole result list in one value (the pre-codec, pre-split layout),
+             for the "chicken" search
+
+The baseline is ``json.dumps`` text, i.e. what was stored before the codec.
+
+Usage:
+    python -m benchmarks.bench_cache_codec [--rounds 2000]
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, List
+
+from benchmarks._common import load_mealdb_meals, search_mealdb_meals
+from app.cache_codec import CacheCodec, msgpack, zstandard
+from app.mealdb_client import MealDBClient
+
+
+def _per_op_us(fn: Callable[[], Any], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def _codecs() -> List[CacheCodec]:
+    serializers = ["json"] + (["msgpack"] if msgpack is not None else [])
+    compressions = ["none", "zlib"] + (["zstd"] if zstandard is not None else [])
+    return [CacheCodec(serializer=s, compression=c, compress_threshold=1024) for s in serializers for c in compressions]
+
+
+def _report(label: str, values: List[Any], rounds: int) -> None:
+    print(f"\n{label} ({len(values)} value(s))")
+    print(f"{'codec':>16} {'bytes/key':>10} {'ratio':>6} {'encode us':>10} {'decode us':>10}")
+
+    legacy = [json.dumps(value) for value in values]
+    base_bytes = sum(len(text.encode()) for text in legacy) / len(values)
+    encode_us = sum(_per_op_us(lambda v=v: json.dumps(v), rounds) for v in values) / len(values)
+    decode_us = sum(_per_op_us(lambda t=t: json.loads(t), rounds) for t in legacy) / len(values)
+    print(f"{'legacy json':>16} {base_bytes:10.0f} {1.0:6.2f} {encode_us:10.1f} {decode_us:10.1f}")
+
+    for codec in _codecs():
+        encoded = [codec.encode(value) for value in values]
+        assert [codec.decode(data) for data in encoded] == values
+        size = sum(len(data) for data in encoded) / len(values)
+        encode_us = sum(_per_op_us(lambda v=v: codec.encode(v), rounds) for v in values) / len(values)
+        decode_us = sum(_per_op_us(lambda d=d: codec.decode(d), rounds) for d in encoded) / len(values)
+        name = f"{codec.serializer}+{codec.compression}"
+        print(f"{name:>16} {size:10.0f} {size / base_bytes:6.2f} {encode_us:10.1f} {decode_us:10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    meals = load_mealdb_meals()
+    converter = MealDBClient(redis_url="redis://127.0.0.1:1")
+    recipes = [converter.convert_mealdb_to_recipe(meal).model_dump() for meal in meals]
+    chicken = [converter.convert_mealdb_to_recipe(meal).model_dump() for meal in search_mealdb_meals(meals, "chicken")]
+
+    _report("meal", recipes, args.rounds)
+    _report("search 'chicken'", [chicken], max(1, args.rounds // 4))
+
+
+if __name__ == "__main__":
+    main()
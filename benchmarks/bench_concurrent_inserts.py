@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark / stress test: concurrent recipe inserts from several processes.
+
+Each worker process opens its own engine on a shared temporary SQLite file
+(like separate uvicorn workers) and creates recipes as fast as it can.
+
+  * legacy  - the old allocation: SELECT max(id), then INSERT with id+1
+  * current - SQLiteRecipeRepository.create_recipe (id assigned by the INSERT)
+
+Reports throughput, failed inserts (duplicate-key collisions) and verifies
+that every stored id is unique.
+
+Usage:
+    python -m benchmarks.bench_concurrent_inserts [--workers 4] [--per-worker 300]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+
+def _worker(db_path: str, mode: str, count: int, start_event, results) -> None:
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import SQLAlchemyError
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import RecipeDB
+    from app.models import RecipeCreate
+    from app.repositories import SQLiteRecipeRepository
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False, "timeout": 30})
+    session = sessionmaker(bind=engine)()
+    repo = SQLiteRecipeRepository(session, full_text=True)
+    payload = RecipeCreate(
+        title="Stress", ingredients=["x"], steps=["y"], prepTime="1 minute",
+        cookTime="1 minute", difficulty="Easy", cuisine="Test",
+    )
+
+    failures = 0
+    start_event.wait()
+    for _ in range(count):
+        try:
+            if mode == "legacy":
+                max_id = session.query(RecipeDB.id).order_by(RecipeDB.id.desc()).first()
+                session.add(RecipeDB(id=(max_id[0] + 1) if max_id else 1, **payload.model_dump()))
+                session.commit()
+            else:
+                repo.create_recipe(payload)
+        except SQLAlchemyError:
+            session.rollback()
+            failures += 1
+    session.close()
+    engine.dispose()
+    results.put(failures)
+
+
+def _run(mode: str, workers: int, per_worker: int) -> None:
+    from sqlalchemy import func, select
+
+    from benchmarks._common import create_temp_database
+    from app.database import RecipeDB
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "stress.db")
+        engine = create_temp_database(db_path, 0)
+
+        start_event = ctx.Event()
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=_worker, args=(db_path, mode, per_worker, start_event, results))
+            for _ in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+        time.sleep(1.0)  # let workers finish importing
+        begin = time.perf_counter()
+        start_event.set()
+        failures = sum(results.get() for _ in procs)
+        elapsed = time.perf_counter() - begin
+        for proc in procs:
+            proc.join()
+
+        with engine.connect() as conn:
+            stored, distinct = conn.execute(
+                select(func.count(RecipeDB.id), func.count(func.distinct(RecipeDB.id)))
+            ).one()
+        engine.dispose()
+
+    attempted = workers * per_worker
+    print(
+        f"{mode:>8}: {stored / elapsed:8.0f} inserts/sec  "
+        f"stored={stored}/{attempted} failed={failures} unique={'yes' if stored == distinct else 'NO'}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--per-worker", type=int, default=300)
+    args = parser.parse_args()
+    for mode in ("legacy", "current"):
+        _run(mode, args.workers, args.per_worker)
+
+
+if __name__ == "__main__":
+    main()
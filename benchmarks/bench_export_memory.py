@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: peak RSS of the streaming NDJSON export vs. a full JSON listing.
+
+Seeds a temporary SQLite database, then for each mode starts a fresh
+uvicorn server process, downloads the whole catalogue over HTTP (the
+client discards the body as it arrives) and reports how much the server's
+peak RSS grew. "list" fetches GET /recipes with the page size raised to
+the table size, i.e. the pre-pagination behaviour.
+
+Usage:
+    python -m benchmarks.bench_export_memory [--rows 50000]
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import resource
+import socket
+import tempfile
+import threading
+import time
+
+# Seconds to wait for the server process to start or to report its RSS
+STARTUP_TIMEOUT = 60
+REPORT_TIMEOUT = 60
+
+MODES = {
+    "list": "/recipes?limit={rows}",
+    "export": "/recipes/export?format=ndjson",
+    "export-gzip": "/recipes/export?format=ndjson&gzip=true",
+}
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(db_path: str, rows: int, port: int, control) -> None:
+    # Set before the app is imported: app.config reads them once, and the
+    # startup migrations must run on the benchmark database, not ./recipes.db
+    os.environ["RECIPES_MAX_PAGE_SIZE"] = str(rows)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    import uvicorn
+    from sqlalchemy import create_engine
+
+    from benchmarks._common import session_dependency
+    from app.database import get_db
+    from main import app
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    app.dependency_overrides[get_db] = session_dependency(engine)
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError(f"server on port {port} did not start")
+        time.sleep(0.01)
+
+    control.put(_max_rss_mb())
+    control.get()  # wait until the client is done
+    control.put(_max_rss_mb())
+    server.should_exit = True
+    thread.join()
+
+
+def _receive(control, proc, timeout: float):
+    """Next message from the server process; fails if it exits or goes quiet."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return control.get(timeout=0.5)
+        except queue.Empty:
+            if not proc.is_alive():
+                raise RuntimeError(f"server process exited with code {proc.exitcode}") from None
+            if time.monotonic() > deadline:
+                proc.terminate()
+                raise RuntimeError(f"no answer from the server process within {timeout}s") from None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    import httpx
+
+    from benchmarks._common import create_temp_database
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        create_temp_database(db_path, args.rows).dispose()
+        print(f"{args.rows} recipes")
+        for mode, path in MODES.items():
+            port = _free_port()
+            control = ctx.Queue()
+            proc = ctx.Process(target=_serve, args=(db_path, args.rows, port, control), daemon=True)
+            proc.start()
+            baseline = _receive(control, proc, STARTUP_TIMEOUT)
+
+            received = 0
+            start = time.perf_counter()
+            url = f"http://127.0.0.1:{port}{path.format(rows=args.rows)}"
+            with httpx.stream("GET", url, timeout=None) as response:
+                assert response.status_code == 200, response.status_code
+                for chunk in response.iter_raw():
+                    received += len(chunk)
+            elapsed = time.perf_counter() - start
+
+            control.put("done")
+            peak = _receive(control, proc, REPORT_TIMEOUT)
+            proc.join()
+            print(
+                f"{mode:>12}: peak RSS +{peak - baseline:7.1f} MiB  "
+                f"{received / 1024 / 1024:7.1f} MiB sent  {elapsed:6.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: indexed InMemoryRecipeRepository vs the previous list-based one.
+
+Loads the same fake recipes into both and times, per operation:
+  * get      - get_recipe for random ids
+  * update   - update_recipe for random ids
+  * search   - title substring search (rare word, common word, 2 characters)
+  * page     - one 50-recipe page of list_recipes from a cursor halfway in
+  * delete   - delete_recipe for random ids
+
+``ListRecipeRepository`` below is the list-scanning implementation the
+repository used before it was indexed, kept here as the baseline.
+
+Usage:
+    python -m benchmarks.bench_in_memory_repository [--recipes 200000] [--ops 200]
+"""
+import argparse
+import random
+import time
+from itertools import count, islice
+from typing import Callable, List, Optional
+
+from benchmarks._common import fake_recipe_rows
+from app.models import Recipe, RecipeCreate
+from app.repositories import InMemoryRecipeRepository
+
+SEARCHES = ["special 1234", "chicken", "sp"]
+
+
+class ListRecipeRepository:
+    """The list-based in-memory repository, before ids and titles were indexed."""
+
+    def __init__(self, seed: List[Recipe]) -> None:
+        self._recipes = list(seed)
+        self._ids = count(max(r.id for r in self._recipes) + 1)
+
+    def list_recipes(self, limit: Optional[int] = None, after: Optional[int] = None) -> List[Recipe]:
+        recipes = sorted(self._recipes, key=lambda r: r.id)
+        if after is not None:
+            recipes = (r for r in recipes if r.id > after)
+        return list(islice(recipes, limit))
+
+    def search_recipes(self, query: str) -> List[Recipe]:
+        q_lower = query.lower()
+        return [r for r in self._recipes if q_lower in r.title.lower()]
+
+    def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
+        for recipe in self._recipes:
+            if recipe.id == recipe_id:
+                return recipe
+        return None
+
+    def update_recipe(self, recipe_id: int, payload: RecipeCreate) -> Optional[Recipe]:
+        updated = Recipe(id=recipe_id, source="internal", **payload.model_dump())
+        for index, recipe in enumerate(self._recipes):
+            if recipe.id == recipe_id:
+                self._recipes[index] = updated
+                return updated
+        return None
+
+    def delete_recipe(self, recipe_id: int) -> bool:
+        for index, recipe in enumerate(self._recipes):
+            if recipe.id == recipe_id:
+                del self._recipes[index]
+                return True
+        return False
+
+
+def _per_op_us(fn: Callable[[int], object], args: List[int]) -> float:
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+
+def _run(label: str, repo, recipes: int, ops: int, seed: int) -> List[float]:
+    rng = random.Random(seed)
+    ids = rng.sample(range(1, recipes + 1), ops)
+    payload = RecipeCreate(
+        title="Updated Special", ingredients=["salt"], steps=["Cook it"],
+        prepTime="5 minutes", cookTime="10 minutes", difficulty="Easy", cuisine="Test",
+    )
+    search_rounds = max(1, ops // 20)
+    return [
+        _per_op_us(repo.get_recipe, ids),
+        _per_op_us(lambda i: repo.update_recipe(i, payload), ids),
+        sum(_per_op_us(lambda _, q=q: repo.search_recipes(q), list(range(search_rounds))) for q in SEARCHES)
+        / len(SEARCHES),
+        _per_op_us(lambda _: repo.list_recipes(limit=50, after=recipes // 2), list(range(search_rounds))),
+        _per_op_us(repo.delete_recipe, ids),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=200_000)
+    parser.add_argument("--ops", type=int, default=200)
+    args = parser.parse_args()
+
+    seed = [Recipe(source="internal", **row) for row in fake_recipe_rows(args.recipes)]
+
+    print(f"{args.recipes} recipes, {args.ops} ops per operation (us per op)")
+    print(f"{'repository':>10} {'load s':>8} {'get':>10} {'update':>10} {'search':>10} {'page':>10} {'delete':>10}")
+    for label, factory in (("list", ListRecipeRepository), ("indexed", InMemoryRecipeRepository)):
+        start = time.perf_counter()
+        repo = factory(seed=seed)
+        load = time.perf_counter() - start
+        timings = _run(label, repo, args.recipes, args.ops, seed=7)
+        print(f"{label:>10} {load:8.2f} " + " ".join(f"{t:10.1f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
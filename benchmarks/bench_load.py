@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Load test: throughput and latency percentiles per endpoint, written as JSON.
+
+Runs offline by default: the app is called in-process over ASGI with
+TheMealDB replaced by the fixture-backed stand-in (benchmarks/fake_mealdb.py)
+and Redis by an in-process fake (see benchmarks/offline_app.py). Each
+scenario runs at every concurrency level, against freshly wired caches,
+after a warm-up of ``--warmup`` requests:
+  * ping            - GET /ping
+  * search_hot      - GET /recipes/search?q=chicken (response cache hits)
+  * search_mixed    - fixture meal words plus never-seen queries, so the
+                      MealDB cache tiers, negative caching and the stand-in
+                      are all exercised
+  * recipe          - GET /recipes/{id} for random internal ids
+  * mealdb_recipe   - GET /recipes/{idMeal}?source=mealdb
+  * page            - GET /recipes?limit=20&after=<random id>
+  * by_ingredients  - GET /recipes/by-ingredients?have=chicken,garlic
+
+Results are keyed ``<scenario>@c<concurrency>`` with req/s, p50/p95/p99 in
+ms, the error rate (non-2xx/304 answers and transport errors) and, in
+process, the number of calls that reached the TheMealDB stand-in.
+
+With ``--url`` a running server is driven over HTTP instead (start it with
+MEALDB_BASE_URL pointing at ``python -m benchmarks.fake_mealdb`` to keep it
+offline); ``--rows`` must then match the recipes it holds.
+
+Usage:
+    python -m benchmarks.bench_load [--concurrency 1,8,32] [--requests 500]
+        [--scenarios ping,search_hot] [--repository sqlite|memory] [--rows 5000]
+        [--mealdb-latency-ms 50] [--mealdb-error-rate 0] [--redis-url redis://...]
+        [--url http://127.0.0.1:8000] [--output results.json]
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks._common import load_mealdb_meals, percentile, write_results
+from benchmarks.offline_app import add_offline_arguments, offline_app_from_args
+
+OK_STATUSES = {200, 201, 204, 304}
+
+
+def _scenarios(rows: int) -> Dict[str, Callable[[random.Random], str]]:
+    meals = load_mealdb_meals()
+    words = sorted({word.lower() for meal in meals for word in meal["strMeal"].split() if len(word) > 3})
+    meal_ids = [meal["idMeal"] for meal in meals]
+
+    def search_mixed(rng: random.Random) -> str:
+        # One in four queries is unknown to TheMealDB; a few hundred distinct
+        # ones, so they repeat and negative caching has something to do
+        if rng.random() < 0.25:
+            return f"/recipes/search?q=nomatch{rng.randint(1, 300)}"
+        return f"/recipes/search?q={rng.choice(words)}"
+
+    return {
+        "ping": lambda rng: "/ping",
+        "search_hot": lambda rng: "/recipes/search?q=chicken",
+        "search_mixed": search_mixed,
+        "recipe": lambda rng: f"/recipes/{rng.randint(1, rows)}",
+        "mealdb_recipe": lambda rng: f"/recipes/{rng.choice(meal_ids)}?source=mealdb",
+        "page": lambda rng: f"/recipes?limit=20&after={rng.randint(0, rows)}",
+        "by_ingredients": lambda rng: "/recipes/by-ingredients?have=chicken,garlic",
+    }
+
+
+async def drive(
+    client: httpx.AsyncClient, next_url: Callable[[random.Random], str], requests: int, concurrency: int, seed: int
+) -> Dict[str, float]:
+    """Send ``requests`` GETs from ``concurrency`` workers and summarize them."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(n: int) -> None:
+        nonlocal errors, remaining
+        rng = random.Random(seed * 1000 + n)
+        while remaining > 0:
+            remaining -= 1
+            url = next_url(rng)
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                ok = response.status_code in OK_STATUSES
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if not latencies:
+        return {"requests": 0}
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "error_rate": errors / len(latencies),
+    }
+
+
+async def _run_case(
+    args: argparse.Namespace, next_url: Callable[[random.Random], str], concurrency: int
+) -> Dict[str, float]:
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+            await drive(client, next_url, args.warmup, concurrency, seed=-1)
+            return await drive(client, next_url, args.requests, concurrency, seed=args.seed)
+
+    async with offline_app_from_args(args, seed=args.seed) as offline:
+        transport = httpx.ASGITransport(app=offline.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+            await drive(client, next_url, args.warmup, concurrency, seed=-1)
+            calls = offline.upstream_calls()
+            summary = await drive(client, next_url, args.requests, concurrency, seed=args.seed)
+            summary["upstream_calls"] = offline.upstream_calls() - calls
+            return summary
+
+
+async def run(args: argparse.Namespace, scenarios: List[str], levels: List[int]) -> Dict[str, Dict[str, float]]:
+    available = _scenarios(args.rows)
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'case':<24} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name in scenarios:
+        for concurrency in levels:
+            summary = await _run_case(args, available[name], concurrency)
+            key = f"{name}@c{concurrency}"
+            results[key] = summary
+            print(
+                f"{key:<24} {summary['rps']:9.1f} {summary['p50_ms']:8.2f} {summary['p95_ms']:8.2f} "
+                f"{summary['p99_ms']:8.2f} {summary['error_rate']:7.1%}"
+            )
+    return results
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(_scenarios(1)))
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario and level")
+    parser.add_argument("--warmup", type=int, default=50)
+    add_offline_arguments(parser)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="", help="result file (default: benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    scenarios = _csv(args.scenarios)
+    unknown = set(scenarios) - set(_scenarios(1))
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in _csv(args.concurrency)]
+    results = asyncio.run(run(args, scenarios, levels))
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    print(f"\nwrote {write_results('load', results, params, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
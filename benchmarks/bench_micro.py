@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks of the hot per-request helpers, written as JSON.
+
+Cases (time per call, over the fixture meals or random recipe ids):
+  * mealdb.clean_instructions   - MealDBClient._clean_instructions
+  * mealdb.extract_ingredients  - MealDBClient._extract_ingredients_and_measures
+  * mealdb.convert              - MealDBClient.convert_mealdb_to_recipe
+  * codec.{encode,decode}_meal  - the configured cache codec, one recipe
+  * codec.{encode,decode}_search - the same codec, the "chicken" result list
+  * repo.memory.*               - InMemoryRecipeRepository get/search/page/by_ingredients
+  * repo.sqlite.*               - SQLiteRecipeRepository get/search/page on a temp database
+
+Each case runs ``--repeat`` times; ``us_per_op`` is the median repeat and
+``min_us`` the fastest. Compare two result files with benchmarks.compare.
+
+Usage:
+    python -m benchmarks.bench_micro [--recipes 20000] [--repeat 7] [--output results.json]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks._common import (
+    create_temp_database,
+    fake_recipe_rows,
+    load_mealdb_meals,
+    search_mealdb_meals,
+    write_results,
+)
+from app import config
+from app.cache_codec import CacheCodec
+from app.ingredients import normalize_terms
+from app.mealdb_client import MealDBClient
+from app.models import Recipe
+from app.repositories import InMemoryRecipeRepository, SQLiteRecipeRepository
+
+SEARCHES = ["special 1234", "chicken", "sp"]
+
+
+def _measure(fn: Callable[[Any], Any], inputs: Sequence[Any], repeat: int) -> Dict[str, float]:
+    """Time ``fn`` over ``inputs`` ``repeat`` times, in microseconds per call."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for value in inputs:
+            fn(value)
+        runs.append((time.perf_counter() - start) / len(inputs) * 1e6)
+    return {"us_per_op": statistics.median(runs), "min_us": min(runs), "ops": len(inputs)}
+
+
+def _mealdb_cases(repeat: int, rounds: int) -> Dict[str, Dict[str, float]]:
+    meals = load_mealdb_meals()
+    client = MealDBClient(redis_url="redis://127.0.0.1:1")
+    inputs = meals * rounds
+    codec = CacheCodec(
+        serializer=config.REDIS_CACHE_SERIALIZER,
+        compression=config.REDIS_CACHE_COMPRESSION,
+        compress_threshold=config.REDIS_CACHE_COMPRESS_THRESHOLD,
+    )
+    recipes = [client.convert_mealdb_to_recipe(meal).model_dump() for meal in meals]
+    chicken = [client.convert_mealdb_to_recipe(meal).model_dump() for meal in search_mealdb_meals(meals, "chicken")]
+    return {
+        "mealdb.clean_instructions": _measure(
+            client._clean_instructions, [meal["strInstructions"] for meal in inputs], repeat
+        ),
+        "mealdb.extract_ingredients": _measure(client._extract_ingredients_and_measures, inputs, repeat),
+        "mealdb.convert": _measure(client.convert_mealdb_to_recipe, inputs, repeat),
+        "codec.encode_meal": _measure(codec.encode, recipes * rounds, repeat),
+        "codec.decode_meal": _measure(codec.decode, [codec.encode(r) for r in recipes] * rounds, repeat),
+        "codec.encode_search": _measure(codec.encode, [chicken] * rounds, repeat),
+        "codec.decode_search": _measure(codec.decode, [codec.encode(chicken)] * rounds, repeat),
+    }
+
+
+def _repository_cases(prefix: str, repo: Any, recipes: int, ops: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    rng = random.Random(7)
+    ids = [rng.randint(1, recipes) for _ in range(ops)]
+    rounds = max(1, ops // 20)
+    cases = {
+        f"{prefix}.get": _measure(repo.get_recipe, ids, repeat),
+        f"{prefix}.search": _measure(repo.search_recipes, SEARCHES * rounds, repeat),
+        f"{prefix}.page": _measure(
+            lambda after: repo.list_recipes(limit=50, after=after), [recipes // 2] * rounds, repeat
+        ),
+    }
+    if isinstance(repo, InMemoryRecipeRepository):
+        terms = normalize_terms(["chicken", "garlic", "onion"])
+        cases[f"{prefix}.by_ingredients"] = _measure(lambda _: repo.find_by_ingredients(terms), range(rounds), repeat)
+    return cases
+
+
+def run(recipes: int, ops: int, repeat: int, rounds: int) -> Dict[str, Dict[str, float]]:
+    results = _mealdb_cases(repeat, rounds)
+
+    seed: List[Recipe] = [Recipe(source="internal", **row) for row in fake_recipe_rows(recipes)]
+    results.update(_repository_cases("repo.memory", InMemoryRecipeRepository(seed=seed), recipes, ops, repeat))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_temp_database(os.path.join(tmp, "recipes.db"), recipes)
+        db = sessionmaker(bind=engine)()
+        try:
+            repo = SQLiteRecipeRepository(db, full_text=True)
+            results.update(_repository_cases("repo.sqlite", repo, recipes, ops, repeat))
+        finally:
+            db.close()
+            engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=20_000)
+    parser.add_argument("--ops", type=int, default=500, help="repository calls per repeat")
+    parser.add_argument("--rounds", type=int, default=50, help="passes over the fixture meals per repeat")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--output", default="", help="result file (default: benchmarks/results/micro-<commit>.json)")
+    args = parser.parse_args()
+
+    results = run(args.recipes, args.ops, args.repeat, args.rounds)
+    print(f"{'case':<32} {'us/op':>10} {'min us':>10}")
+    for name, values in results.items():
+        print(f"{name:<32} {values['us_per_op']:10.2f} {values['min_us']:10.2f}")
+    params = {"recipes": args.recipes, "ops": args.ops, "rounds": args.rounds, "repeat": args.repeat}
+    print(f"\nwrote {write_results('micro', results, params, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /ping latency while /recipes/search is stalled upstream.
+
+Runs the app in-process over ASGI with a MealDB client whose transport
+sleeps before answering, then measures /ping latency percentiles with and
+without stalled searches in flight. With a non-blocking search path the
+two distributions should be indistinguishable.
+
+Usage:
+    python -m benchmarks.bench_ping_during_stall [--stall 2.0] [--pings 500]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+from benchmarks._common import percentile
+from main import app
+from app.mealdb_client import MealDBClient
+from app.repositories import InMemoryRecipeRepository
+from app.database import initial_recipes
+from app.routers import recipes as recipes_router
+
+
+def _make_stalled_client(stall_seconds: float) -> MealDBClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(stall_seconds)
+        return httpx.Response(200, json={"meals": None})
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return MealDBClient(redis_url="redis://127.0.0.1:1", http_client=http_client)
+
+
+async def _measure_pings(client: httpx.AsyncClient, count: int) -> List[float]:
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get("/ping")
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    return latencies
+
+
+async def run(stall_seconds: float, pings: int, concurrent_searches: int) -> None:
+    repo = InMemoryRecipeRepository(seed=initial_recipes)
+    app.dependency_overrides[recipes_router.get_repository] = lambda: repo
+    mealdb_client = _make_stalled_client(stall_seconds)
+    app.dependency_overrides[recipes_router.get_mealdb_client] = lambda: mealdb_client
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            baseline = await _measure_pings(client, pings)
+
+            searches = [
+                asyncio.create_task(client.get("/recipes/search", params={"q": f"stall{i}"}, timeout=None))
+                for i in range(concurrent_searches)
+            ]
+            await asyncio.sleep(0.05)  # let the searches reach the stalled upstream
+            stalled = await _measure_pings(client, pings)
+            await asyncio.gather(*searches)
+    finally:
+        app.dependency_overrides.clear()
+        await mealdb_client.aclose()
+        # Passed in, so not closed by MealDBClient.aclose()
+        await mealdb_client.http_client.aclose()
+
+    for label, samples in (("baseline", baseline), ("during stall", stalled)):
+        print(
+            f"{label:>13}: p50={percentile(samples, 50):.2f}ms "
+            f"p99={percentile(samples, 99):.2f}ms "
+            f"max={max(samples):.2f}ms mean={statistics.mean(samples):.2f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stall", type=float, default=2.0, help="upstream stall in seconds")
+    parser.add_argument("--pings", type=int, default=500, help="pings per phase")
+    parser.add_argument("--searches", type=int, default=20, help="concurrent stalled searches")
+    args = parser.parse_args()
+    asyncio.run(run(args.stall, args.pings, args.searches))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of ProfilingMiddleware per request.
+
+Calls the ASGI app directly (no HTTP client in the measurement) for GET
+/ping and a cached GET /recipes/search, in these setups:
+  * off       - no profiling middleware (the default deployment)
+  * idle      - middleware installed, nothing sampled, slow threshold 1 s:
+                spans are collected and dropped
+  * sample-1% - PROFILE_SAMPLE_RATE=0.01
+  * sample-all - every request under cProfile (the cost of one sampled request)
+
+Rounds alternate between setups so drift affects them equally.
+
+Usage:
+    python -m benchmarks.bench_profiling_overhead [--requests 2000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks._common import percentile
+from app.database import initial_recipes
+from app.mealdb_client import MealDBClient
+from app.profiling import ProfileStore, ProfilingMiddleware
+from app.repositories import InMemoryRecipeRepository
+from app.response_cache import ResponseCache
+from app.routers import health, recipes as recipes_router
+
+SETUPS = {"off": None, "idle": 0.0, "sample-1%": 0.01, "sample-all": 1.0}
+PATHS = {"ping": ("/ping", b""), "search": ("/recipes/search", b"q=chicken")}
+
+
+def _make_app(sample_rate: Optional[float]) -> FastAPI:
+    app = FastAPI()
+    if sample_rate is not None:
+        app.add_middleware(ProfilingMiddleware, store=ProfileStore(50), sample_rate=sample_rate, slow_ms=1000)
+    app.include_router(health.router)
+    app.include_router(recipes_router.router)
+    repo = InMemoryRecipeRepository(seed=initial_recipes)
+    mealdb_client = MealDBClient(
+        redis_url="redis://127.0.0.1:1",
+        http_client=httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"meals": None}))
+        ),
+    )
+    response_cache = ResponseCache(maxsize=64, ttl=3600)
+    app.dependency_overrides[recipes_router.get_repository] = lambda: repo
+    app.dependency_overrides[recipes_router.get_mealdb_client] = lambda: mealdb_client
+    app.dependency_overrides[recipes_router.get_search_response_cache] = lambda: response_cache
+    return app
+
+
+async def _call(app: FastAPI, path: str, query_string: bytes) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query_string, "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    assert status == 200, status
+
+
+async def run(requests: int, rounds: int) -> None:
+    apps = {label: _make_app(rate) for label, rate in SETUPS.items()}
+    samples: Dict[str, Dict[str, List[float]]] = {name: {label: [] for label in SETUPS} for name in PATHS}
+    for app in apps.values():
+        # Warm up routes and fill the search response cache
+        for path, query in PATHS.values():
+            for _ in range(50):
+                await _call(app, path, query)
+    for _ in range(rounds):
+        for name, (path, query) in PATHS.items():
+            for label, app in apps.items():
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    await _call(app, path, query)
+                    samples[name][label].append((time.perf_counter() - start) * 1e6)
+
+    for name, by_setup in samples.items():
+        print(f"GET {PATHS[name][0]}:")
+        base = percentile(by_setup["off"], 50)
+        for label, values in by_setup.items():
+            p50 = percentile(values, 50)
+            print(
+                f"  {label:>10}: p50={p50:7.1f}us  p99={percentile(values, 99):7.1f}us  "
+                f"overhead={p50 - base:+6.1f}us ({(p50 - base) / base:+.1%})"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per setup, path and round")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark: mixed read/write throughput per SQLite connection profile.
+
+Reader threads loop over get_recipe and 50-row list pages while writer
+threads create and update recipes, all through SQLiteRecipeRepository on a
+temporary database (a copy per profile), for a fixed duration. Profiles:
+  * default - SQLite defaults, one shared engine
+  * tuned   - WAL and the tuned pragmas, one shared engine
+  * split   - tuned, plus one writer connection and a read-only pool
+
+Usage:
+    python -m benchmarks.bench_sqlite_profiles [--rows 20000] [--readers 8] [--writers 2] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks._common import create_temp_database, percentile
+from app.models import RecipeCreate
+from app.repositories import SQLiteRecipeRepository
+from app.sqlite_tuning import ReadWriteSession, create_sqlite_engines
+
+PROFILES = {"default": ("default", 0), "tuned": ("tuned", 0), "split": ("tuned", 8)}
+
+
+def _run_profile(path: str, profile: str, read_pool_size: int, rows: int, readers: int, writers: int,
+                 seconds: float) -> Dict[str, object]:
+    engine, read_engine = create_sqlite_engines(make_url(f"sqlite:///{path}"), profile, read_pool_size)
+    if read_engine is not None:
+        factory = sessionmaker(class_=ReadWriteSession, writer=engine, reader=read_engine)
+    else:
+        factory = sessionmaker(bind=engine)
+    payload = RecipeCreate(
+        title="Bench Special", ingredients=["salt", "pepper"], steps=["Cook it"],
+        prepTime="5 minutes", cookTime="10 minutes", difficulty="Easy", cuisine="Test",
+    )
+    read_latencies: List[float] = []
+    write_latencies: List[float] = []
+    errors = [0]
+    deadline = time.perf_counter() + seconds
+
+    def reader(n: int) -> None:
+        rng = random.Random(n)
+        session = factory()
+        repo = SQLiteRecipeRepository(session, full_text=True)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if rng.random() < 0.5:
+                    repo.get_recipe(rng.randint(1, rows))
+                else:
+                    repo.list_recipes(limit=50, after=rng.randint(0, rows))
+                # End the read transaction, like a request's session would
+                session.commit()
+            except SQLAlchemyError:
+                session.rollback()
+                errors[0] += 1
+            read_latencies.append((time.perf_counter() - start) * 1000)
+        session.close()
+
+    def writer(n: int) -> None:
+        rng = random.Random(1000 + n)
+        session = factory()
+        repo = SQLiteRecipeRepository(session, full_text=True)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if rng.random() < 0.5:
+                    repo.create_recipe(payload)
+                else:
+                    repo.update_recipe(rng.randint(1, rows), payload)
+            except SQLAlchemyError:
+                session.rollback()
+                errors[0] += 1
+            write_latencies.append((time.perf_counter() - start) * 1000)
+        session.close()
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if read_engine is not None:
+        read_engine.dispose()
+    engine.dispose()
+    return {"reads": read_latencies, "writes": write_latencies, "errors": errors[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.db")
+        create_temp_database(template, args.rows).dispose()
+
+        print(f"{args.rows} recipes, {args.readers} readers, {args.writers} writers, {args.seconds:.0f} s each")
+        print(f"{'profile':>8} {'reads/s':>9} {'read p99':>9} {'writes/s':>9} {'write p99':>10} {'errors':>7}")
+        for label, (profile, read_pool_size) in PROFILES.items():
+            path = os.path.join(tmp, f"{label}.db")
+            shutil.copyfile(template, path)
+            result = _run_profile(
+                path, profile, read_pool_size, args.rows, args.readers, args.writers, args.seconds
+            )
+            reads, writes = result["reads"], result["writes"]
+            print(
+                f"{label:>8} {len(reads) / args.seconds:9.0f} {percentile(reads, 99):7.1f}ms "
+                f"{len(writes) / args.seconds:9.0f} {percentile(writes, 99):8.1f}ms {result['errors']:7d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
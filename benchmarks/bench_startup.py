@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start, from ``import main`` to the first request served.
+
+Each run is a fresh interpreter that imports the app, runs its lifespan
+(migrations, caches, MealDB client) and serves GET /recipes?limit=10, and
+reports the time spent in each phase. Scenarios, on a temporary SQLite
+database:
+  * new      - empty database: every migration plus the seed
+  * current  - already migrated database
+  * no-migrate - current database with MIGRATE_ON_STARTUP=false
+  * workers  - --workers interpreters starting together on a new database,
+               as uvicorn workers would (reports the slowest)
+
+Redis is pointed at a closed port; nothing on this path needs it.
+--app-dir runs the same measurement against another checkout (e.g. an
+older release in a git worktree) for comparison.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--workers 4] [--app-dir PATH]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+from benchmarks._common import percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import json, time
+start = time.perf_counter()
+import main
+from fastapi.testclient import TestClient
+imported = time.perf_counter()
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    response = client.get("/recipes?limit=10")
+    served = time.perf_counter()
+assert response.status_code == 200, response.text
+print(json.dumps({
+    "import": (imported - start) * 1000,
+    "startup": (started - imported) * 1000,
+    "first_request": (served - started) * 1000,
+    "total": (served - start) * 1000,
+}))
+"""
+
+PHASES = ("import", "startup", "first_request", "total")
+
+
+def _spawn(app_dir: str, db_path: str, workdir: str, migrate: bool = True) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "PYTHONPATH": app_dir,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "REDIS_URL": "redis://127.0.0.1:1",
+        "MIGRATE_ON_STARTUP": "true" if migrate else "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-c", _CHILD], cwd=workdir, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+
+
+def _result(process: subprocess.Popen) -> Optional[Dict[str, float]]:
+    """Phase timings of a finished child, or None if the app failed to start."""
+    stdout, _ = process.communicate()
+    if process.returncode != 0:
+        return None
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def _cold_start(app_dir: str, db_path: str, workdir: str, migrate: bool = True) -> Dict[str, float]:
+    """Start one interpreter on its own and return its phase timings."""
+    result = _result(_spawn(app_dir, db_path, workdir, migrate))
+    if result is None:
+        raise SystemExit("App failed to start")
+    return result
+
+
+def _report(label: str, results: List[Dict[str, float]]) -> None:
+    cells = "  ".join(f"{phase}={percentile([r[phase] for r in results], 50):7.1f}ms" for phase in PHASES)
+    print(f"{label:>10}: {cells}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--app-dir", default=REPO_ROOT, help="Checkout to import main from")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        new_runs = [_cold_start(args.app_dir, os.path.join(tmp, f"new-{run}.db"), tmp) for run in range(args.runs)]
+        current = os.path.join(tmp, "new-0.db")
+        current_runs = [_cold_start(args.app_dir, current, tmp) for _ in range(args.runs)]
+        no_migrate_runs = [_cold_start(args.app_dir, current, tmp, migrate=False) for _ in range(args.runs)]
+
+        worker_runs = []
+        failed = 0
+        seeded = set()
+        for run in range(args.runs):
+            db_path = os.path.join(tmp, f"workers-{run}.db")
+            processes = [_spawn(args.app_dir, db_path, tmp) for _ in range(args.workers)]
+            results = [result for result in map(_result, processes) if result is not None]
+            failed += len(processes) - len(results)
+            if results:
+                worker_runs.append({phase: max(r[phase] for r in results) for phase in PHASES})
+            with sqlite3.connect(db_path) as conn:
+                seeded.add(conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0])
+
+    print(f"median of {args.runs} cold starts each, app from {args.app_dir}")
+    _report("new", new_runs)
+    _report("current", current_runs)
+    _report("no-migrate", no_migrate_runs)
+    _report("workers", worker_runs)
+    print(
+        f"{args.workers} workers started together {args.runs} times: {failed} failed to start, "
+        f"recipes afterwards: {sorted(seeded)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
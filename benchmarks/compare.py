@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark result files (bench_micro or bench_load JSON).
+
+For every case present in both files, prints the change of each known
+metric and marks a regression when it got worse by more than
+``--threshold`` (a fraction; default 0.10). Exits with status 1 if any
+metric regressed, so it can gate a CI job.
+
+Usage:
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 0.1]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+# Metric name -> True if a larger value is better
+METRICS = {
+    "us_per_op": False,
+    "rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "error_rate": False,
+}
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(
+    baseline: Dict[str, Dict[str, float]], candidate: Dict[str, Dict[str, float]], threshold: float
+) -> List[Dict[str, Any]]:
+    """Per-metric changes for the cases both result sets have."""
+    rows = []
+    for case in baseline:
+        if case not in candidate:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old: Optional[float] = baseline[case].get(metric)
+            new: Optional[float] = candidate[case].get(metric)
+            if old is None or new is None:
+                continue
+            if old:
+                change = (new - old) / old
+            else:
+                # e.g. an error rate going from 0 to anything is a regression
+                change = float("inf") if new else 0.0
+            worse = -change if higher_is_better else change
+            rows.append({
+                "case": case,
+                "metric": metric,
+                "baseline": old,
+                "candidate": new,
+                "change": change,
+                "regression": worse > threshold,
+            })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    baseline, candidate = _load(args.baseline), _load(args.candidate)
+    if baseline["benchmark"] != candidate["benchmark"]:
+        parser.error(f"cannot compare {baseline['benchmark']!r} results with {candidate['benchmark']!r}")
+    if baseline["params"] != candidate["params"]:
+        print("warning: the runs used different parameters", file=sys.stderr)
+
+    rows = compare(baseline["results"], candidate["results"], args.threshold)
+    print(f"{baseline['commit']} -> {candidate['commit']} ({baseline['benchmark']})")
+    print(f"{'case':<32} {'metric':<10} {'baseline':>12} {'candidate':>12} {'change':>8}")
+    for row in rows:
+        mark = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['case']:<32} {row['metric']:<10} {row['baseline']:12.3f} {row['candidate']:12.3f} "
+            f"{row['change']:+8.1%}{mark}"
+        )
+    regressions = sum(row["regression"] for row in rows)
+    print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
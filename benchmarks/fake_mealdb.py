@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Local TheMealDB stand-in serving the recorded fixtures.
+
+Answers ``search.php?s=`` and ``lookup.php?i=`` under ``/api/json/v1/1``
+from ``fixtures/mealdb_meals.json``, after a configurable delay, and fails
+a configurable fraction of requests. Load tests use it in-process through
+``httpx.ASGITransport``; run standalone, it lets a real server be tested
+offline:
+
+    python -m benchmarks.fake_mealdb --port 9000 --latency-ms 80 --jitter-ms 40
+    MEALDB_BASE_URL=http://127.0.0.1:9000/api/json/v1/1 uvicorn main:app
+
+GET /stats returns the number of requests and injected errors so far.
+"""
+import argparse
+import asyncio
+import random
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+from benchmarks._common import load_mealdb_meals, search_mealdb_meals
+
+API_PREFIX = "/api/json/v1/1"
+BASE_URL = f"http://fake-mealdb{API_PREFIX}"
+
+
+def create_app(
+    meals: Optional[List[Dict[str, Any]]] = None,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    seed: int = 0,
+) -> FastAPI:
+    """Build the stand-in app.
+
+    Args:
+        meals: Meals to serve (the fixture file when omitted)
+        latency_ms: Fixed delay before every response
+        jitter_ms: Extra uniformly distributed delay, 0 to ``jitter_ms``
+        error_rate: Fraction of requests answered with ``error_status``
+        error_status: HTTP status used for injected errors
+        seed: Seed for the jitter and error draws, for repeatable runs
+    """
+    meals = load_mealdb_meals() if meals is None else meals
+    by_id = {meal["idMeal"]: meal for meal in meals}
+    rng = random.Random(seed)
+    app = FastAPI()
+    app.state.stats = {"search": 0, "lookup": 0, "errors": 0}
+
+    async def _respond(kind: str, found: List[Dict[str, Any]]) -> JSONResponse:
+        app.state.stats[kind] += 1
+        delay = latency_ms + rng.uniform(0, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if error_rate and rng.random() < error_rate:
+            app.state.stats["errors"] += 1
+            return JSONResponse({"error": "injected"}, status_code=error_status)
+        # TheMealDB answers "no results" with null, not an empty list
+        return JSONResponse({"meals": found or None})
+
+    @app.get(f"{API_PREFIX}/search.php")
+    async def search(s: str = Query(default="")):
+        return await _respond("search", search_mealdb_meals(meals, s) if s.strip() else [])
+
+    @app.get(f"{API_PREFIX}/lookup.php")
+    async def lookup(i: str = Query(default="")):
+        meal = by_id.get(i)
+        return await _respond("lookup", [meal] if meal else [])
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.stats
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    app = create_app(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
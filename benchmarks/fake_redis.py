@@ -0,0 +1,104 @@
+"""In-process stand-in for the redis.asyncio commands RedisClient uses.
+
+Lets load tests exercise the real ``RedisClient`` code paths (codec, MGET
+of meals, refill leases, breaker bookkeeping) without a Redis server. Keys
+expire like in Redis, but there is no network hop, so cache hits come out
+faster than against a real server; pass ``--redis-url`` to the benchmarks
+to measure a local Redis instead. Pub/sub is not implemented, so the L1
+invalidation listener must not be started.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.redis_client import RedisClient
+
+
+class FakeRedis:
+    """Dict-backed async Redis with per-key expiry."""
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self.commands = 0
+
+    def _get(self, key: str) -> Any:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Any:
+        self.commands += 1
+        return self._get(key)
+
+    async def mget(self, keys: List[str]) -> List[Any]:
+        self.commands += 1
+        return [self._get(key) for key in keys]
+
+    async def setex(self, key: str, ttl: int, value: Any) -> bool:
+        self.commands += 1
+        self.data[key] = (value, time.monotonic() + ttl)
+        return True
+
+    async def set(self, key: str, value: Any, nx: bool = False, px: Optional[int] = None) -> Optional[bool]:
+        self.commands += 1
+        if nx and self._get(key) is not None:
+            return None
+        self.data[key] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    async def eval(self, script: str, numkeys: int, key: str, token: str) -> int:
+        # Only the release-lock script is used: delete if the token matches
+        self.commands += 1
+        if self._get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    async def publish(self, channel: str, message: str) -> int:
+        self.commands += 1
+        return 0
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class FakePipeline:
+    """Buffers SETEX commands until ``execute``, like a non-transactional pipeline."""
+
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+        self.queued: List[Tuple[str, int, Any]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> bool:
+        return False
+
+    def setex(self, key: str, ttl: int, value: Any) -> "FakePipeline":
+        self.queued.append((key, ttl, value))
+        return self
+
+    async def execute(self) -> List[bool]:
+        self.redis.commands += 1
+        for key, ttl, value in self.queued:
+            self.redis.data[key] = (value, time.monotonic() + ttl)
+        results = [True] * len(self.queued)
+        self.queued = []
+        return results
+
+
+def make_redis_client(redis_url: Optional[str] = None) -> RedisClient:
+    """A RedisClient on ``redis_url``, or on a FakeRedis when no URL is given."""
+    if redis_url:
+        return RedisClient(redis_url)
+    client = RedisClient("redis://127.0.0.1:1")
+    client.redis_client = FakeRedis()
+    return client
@@ -0,0 +1,150 @@
+"""The application wired to local stand-ins, for offline load tests.
+
+``offline_app`` returns ``main.app`` with its dependencies overridden so
+that nothing leaves the process: TheMealDB is ``benchmarks.fake_mealdb``
+(called through ``httpx.ASGITransport``, or over HTTP when a URL is given),
+Redis is ``benchmarks.fake_redis`` unless a Redis URL is given, and recipes
+come from a temporary SQLite database or an in-memory repository filled
+with deterministic fake rows. The app lifespan is not run.
+"""
+import argparse
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks import fake_mealdb
+from benchmarks._common import create_temp_database, fake_recipe_rows, session_dependency
+from benchmarks.fake_redis import make_redis_client
+from main import app
+from app import config
+from app.local_cache import TTLCache
+from app.mealdb_client import MealDBClient
+from app.models import Recipe
+from app.repositories import InMemoryRecipeRepository, SQLiteRecipeRepository
+from app.response_cache import ResponseCache
+from app.routers import recipes as recipes_router
+
+
+@dataclass
+class OfflineApp:
+    """The wired app plus the stand-ins behind it, for reading their counters."""
+
+    app: FastAPI
+    mealdb_client: MealDBClient
+    response_cache: ResponseCache
+    # The in-process TheMealDB stand-in; None when an external URL is used
+    fake_mealdb: Optional[FastAPI]
+
+    def upstream_calls(self) -> int:
+        """Requests the in-process TheMealDB stand-in has answered so far."""
+        if self.fake_mealdb is None:
+            return 0
+        stats = self.fake_mealdb.state.stats
+        return stats["search"] + stats["lookup"]
+
+
+@asynccontextmanager
+async def offline_app(
+    rows: int = 5000,
+    repository: str = "sqlite",
+    mealdb_latency_ms: float = 50.0,
+    mealdb_jitter_ms: float = 0.0,
+    mealdb_error_rate: float = 0.0,
+    mealdb_url: str = "",
+    redis_url: str = "",
+    seed: int = 0,
+) -> AsyncIterator[OfflineApp]:
+    """Wire ``main.app`` to the stand-ins for the duration of the block.
+
+    Args:
+        rows: Number of fake internal recipes (ids 1..rows)
+        repository: "sqlite" (temporary database, a session per request)
+            or "memory" (InMemoryRecipeRepository)
+        mealdb_latency_ms: Fixed delay of the in-process TheMealDB stand-in
+        mealdb_jitter_ms: Extra random delay of the stand-in, 0 to this value
+        mealdb_error_rate: Fraction of stand-in requests that fail with 503
+        mealdb_url: Base URL of a running TheMealDB (stand-in) to use instead
+            of the in-process one
+        redis_url: Redis to use instead of the in-process fake
+        seed: Seed for the stand-in's latency and error draws
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = None
+        if repository == "memory":
+            repo = InMemoryRecipeRepository(seed=[Recipe(source="internal", **row) for row in fake_recipe_rows(rows)])
+            app.dependency_overrides[recipes_router.get_repository] = lambda: repo
+        elif repository == "sqlite":
+            engine = create_temp_database(os.path.join(tmp, "recipes.db"), rows)
+            get_db = session_dependency(engine)
+
+            def sqlite_repository():
+                for db in get_db():
+                    yield SQLiteRecipeRepository(db, full_text=True)
+
+            app.dependency_overrides[recipes_router.get_repository] = sqlite_repository
+        else:
+            raise ValueError(f"Unknown repository {repository!r}")
+
+        fake = None
+        if mealdb_url:
+            mealdb_client = MealDBClient(redis_client=make_redis_client(redis_url))
+            mealdb_client.BASE_URL = mealdb_url
+        else:
+            fake = fake_mealdb.create_app(
+                latency_ms=mealdb_latency_ms,
+                jitter_ms=mealdb_jitter_ms,
+                error_rate=mealdb_error_rate,
+                seed=seed,
+            )
+            mealdb_client = MealDBClient(
+                http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake)),
+                redis_client=make_redis_client(redis_url),
+            )
+            mealdb_client.BASE_URL = fake_mealdb.BASE_URL
+        response_cache = ResponseCache(
+            maxsize=config.SEARCH_RESPONSE_CACHE_MAXSIZE, ttl=config.SEARCH_RESPONSE_CACHE_TTL_SECONDS
+        )
+        facet_cache = TTLCache(config.FACET_CACHE_MAXSIZE, config.FACET_CACHE_TTL_SECONDS)
+        app.dependency_overrides[recipes_router.get_mealdb_client] = lambda: mealdb_client
+        app.dependency_overrides[recipes_router.get_search_response_cache] = lambda: response_cache
+        app.dependency_overrides[recipes_router.get_facet_cache] = lambda: facet_cache
+        try:
+            yield OfflineApp(app, mealdb_client, response_cache, fake)
+        finally:
+            app.dependency_overrides.clear()
+            await mealdb_client.aclose()
+            if fake is not None:
+                await mealdb_client.http_client.aclose()
+            if engine is not None:
+                engine.dispose()
+
+
+def add_offline_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the ``offline_app`` options (and ``--url``) to a benchmark's parser."""
+    parser.add_argument("--repository", choices=["sqlite", "memory"], default="sqlite")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--mealdb-latency-ms", type=float, default=50.0)
+    parser.add_argument("--mealdb-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--mealdb-error-rate", type=float, default=0.0)
+    parser.add_argument("--mealdb-url", default="", help="running TheMealDB stand-in instead of the in-process one")
+    parser.add_argument("--redis-url", default="", help="local Redis instead of the in-process fake")
+    parser.add_argument("--url", default="", help="drive a running server over HTTP instead")
+
+
+def offline_app_from_args(args: argparse.Namespace, seed: int = 0):
+    """``offline_app`` configured from the options of ``add_offline_arguments``."""
+    return offline_app(
+        rows=args.rows,
+        repository=args.repository,
+        mealdb_latency_ms=args.mealdb_latency_ms,
+        mealdb_jitter_ms=args.mealdb_jitter_ms,
+        mealdb_error_rate=args.mealdb_error_rate,
+        mealdb_url=args.mealdb_url,
+        redis_url=args.redis_url,
+        seed=seed,
+    )
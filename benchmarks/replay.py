@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Replay recorded requests against the app and report how it coped.
+
+Reads JSON lines with at least ``method`` and ``path`` (and usually
+``query``, ``ts`` and ``body``), as written by the request log middleware
+(REQUEST_LOG_PATH, see app/request_log.py). By default the app runs
+in-process with the offline stand-ins of benchmarks/offline_app.py; with
+``--url`` a running server is replayed against over HTTP.
+
+Timing:
+  * --speed 1    - send each request at its recorded offset from the first
+                   (open loop: a slow server does not slow the arrivals)
+  * --speed 4    - the same arrivals four times faster (any factor > 0)
+  * --speed 0    - ignore timestamps; ``--concurrency`` workers send the
+                   requests back to back (closed loop), for peak throughput
+
+Reported, overall and per route: req/s, p50/p95/p99 latency and the error
+rate (non-2xx/304 answers and transport errors), plus the rendered-search
+cache hit ratio (``X-Cache``) and the share of MealDB searches served from
+the L1 or Redis cache (the change in GET /cache/stats; over HTTP that is
+one worker's view). ``lag`` is how late requests went out against their
+schedule; if its p99 is large, the replaying process, not the server, was
+the bottleneck.
+
+Only GET requests are replayed unless ``--methods`` says otherwise; writes
+need their bodies, which the log keeps only when REQUEST_LOG_MAX_BODY_BYTES
+is set.
+
+Usage:
+    REQUEST_LOG_PATH=traffic.jsonl uvicorn main:app          # capture
+    python -m benchmarks.replay traffic.jsonl [--speed 1] [--concurrency 32]
+        [--methods GET,POST] [--limit 10000] [--url http://127.0.0.1:8000]
+        [--repository sqlite|memory] [--rows 5000] [--mealdb-latency-ms 50]
+        [--output results.json]
+
+benchmarks/fixtures/traffic.jsonl is a small synthetic log to start from.
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import httpx
+
+from benchmarks._common import percentile, write_results
+from benchmarks.bench_load import OK_STATUSES
+from benchmarks.offline_app import add_offline_arguments, offline_app_from_args
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+class Sample(NamedTuple):
+    route: str
+    latency_ms: float
+    status: int  # 0 for transport errors
+    cache: Optional[str]
+    lag_ms: float
+
+
+def load_records(path: str, methods: List[str], limit: int = 0) -> List[Dict[str, Any]]:
+    """Records of ``path`` with one of ``methods``, in arrival order."""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: not JSON: {e}") from e
+            if "method" not in record or "path" not in record:
+                raise ValueError(f"{path}:{line_number}: missing method or path")
+            if record["method"].upper() in methods:
+                records.append(record)
+    records.sort(key=lambda record: record.get("ts", 0.0))
+    return records[:limit] if limit else records
+
+
+def route_of(record: Dict[str, Any]) -> str:
+    """``METHOD /route`` for grouping: the logged route template, else the path with ids folded."""
+    route = record.get("route") or _NUMERIC_SEGMENT.sub("/{id}", record["path"])
+    return f"{record['method'].upper()} {route}"
+
+
+async def _send(client: httpx.AsyncClient, record: Dict[str, Any], lag_ms: float) -> Sample:
+    url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+    body = record.get("body")
+    headers = {"content-type": "application/json"} if body is not None else None
+    start = time.perf_counter()
+    try:
+        response = await client.request(
+            record["method"].upper(), url, content=body.encode() if body is not None else None, headers=headers
+        )
+        status, cache = response.status_code, response.headers.get("x-cache")
+    except httpx.HTTPError:
+        status, cache = 0, None
+    return Sample(route_of(record), (time.perf_counter() - start) * 1000, status, cache, lag_ms)
+
+
+async def replay(
+    client: httpx.AsyncClient, records: List[Dict[str, Any]], speed: float, concurrency: int, max_in_flight: int
+) -> List[Sample]:
+    """Send ``records`` on their recorded schedule (``speed`` > 0) or back to back."""
+    samples: List[Sample] = []
+    if speed <= 0:
+        pending = iter(records)
+
+        async def worker() -> None:
+            for record in pending:
+                samples.append(await _send(client, record, 0.0))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return samples
+
+    first_ts = records[0].get("ts", 0.0)
+    in_flight = asyncio.Semaphore(max_in_flight)
+    tasks = []
+    started = time.perf_counter()
+
+    async def send_one(record: Dict[str, Any], lag_ms: float) -> None:
+        try:
+            samples.append(await _send(client, record, lag_ms))
+        finally:
+            in_flight.release()
+
+    for record in records:
+        due = (record.get("ts", first_ts) - first_ts) / speed
+        delay = due - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await in_flight.acquire()
+        lag_ms = max(0.0, (time.perf_counter() - started - due) * 1000)
+        tasks.append(asyncio.ensure_future(send_one(record, lag_ms)))
+    await asyncio.gather(*tasks)
+    return samples
+
+
+def _summarize(samples: List[Sample], elapsed: float) -> Dict[str, float]:
+    latencies = [sample.latency_ms for sample in samples]
+    errors = sum(sample.status not in OK_STATUSES for sample in samples)
+    return {
+        "requests": len(samples),
+        "rps": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "error_rate": errors / len(samples),
+    }
+
+
+async def _cache_stats(client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+    try:
+        response = await client.get("/cache/stats")
+    except httpx.HTTPError:
+        return None
+    return response.json() if response.status_code == 200 else None
+
+
+def report(samples: List[Sample], elapsed: float, before: Optional[dict], after: Optional[dict]) -> Dict[str, Any]:
+    """Overall and per-route summaries plus cache hit ratios."""
+    results: Dict[str, Any] = {"all": _summarize(samples, elapsed)}
+    results["all"]["lag_p99_ms"] = percentile([sample.lag_ms for sample in samples], 99)
+    results["all"]["statuses"] = dict(Counter(str(sample.status) for sample in samples))
+    by_route: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        by_route.setdefault(sample.route, []).append(sample)
+    for route, route_samples in sorted(by_route.items()):
+        results[route] = _summarize(route_samples, elapsed)
+
+    cache_statuses = Counter(sample.cache for sample in samples if sample.cache)
+    rendered_lookups = cache_statuses["HIT"] + cache_statuses["MISS"]
+    cache: Dict[str, Any] = {
+        "response_cache_hit_ratio": cache_statuses["HIT"] / rendered_lookups if rendered_lookups else None,
+    }
+    if before is not None and after is not None:
+        # MealDB searches served per tier: in-process L1, Redis, or TheMealDB
+        served = {
+            tier: after["tiers"].get(tier, {}).get("served", 0) - before["tiers"].get(tier, {}).get("served", 0)
+            for tier in ("l1", "l2", "upstream")
+        }
+        total = sum(served.values())
+        cache["mealdb_searches"] = served
+        cache["mealdb_cache_hit_ratio"] = (served["l1"] + served["l2"]) / total if total else None
+    results["cache"] = cache
+    return results
+
+
+async def run(args: argparse.Namespace, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def measure(client: httpx.AsyncClient) -> Dict[str, Any]:
+        before = await _cache_stats(client)
+        started = time.perf_counter()
+        samples = await replay(client, records, args.speed, args.concurrency, args.max_in_flight)
+        elapsed = time.perf_counter() - started
+        return report(samples, elapsed, before, await _cache_stats(client))
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+            return await measure(client)
+
+    async with offline_app_from_args(args) as offline:
+        transport = httpx.ASGITransport(app=offline.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=30) as client:
+            calls = offline.upstream_calls()
+            results = await measure(client)
+            results["cache"]["upstream_calls"] = offline.upstream_calls() - calls
+            return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="JSONL request log")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale; 0 sends back to back")
+    parser.add_argument("--concurrency", type=int, default=32, help="workers when --speed is 0")
+    parser.add_argument("--max-in-flight", type=int, default=1024, help="cap on open requests when timed")
+    parser.add_argument("--methods", default="GET", help="comma-separated methods to replay")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N requests")
+    add_offline_arguments(parser)
+    parser.add_argument("--output", default="", help="result file (default: benchmarks/results/replay-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    methods = [method.strip().upper() for method in args.methods.split(",") if method.strip()]
+    records = load_records(args.log, methods, args.limit)
+    if not records:
+        parser.error(f"no {'/'.join(methods)} requests in {args.log}")
+    results = asyncio.run(run(args, records))
+
+    print(f"{'route':<40} {'requests':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for route, summary in results.items():
+        if route == "cache":
+            continue
+        print(
+            f"{route:<40} {summary['requests']:8d} {summary['rps']:9.1f} {summary['p50_ms']:8.2f} "
+            f"{summary['p95_ms']:8.2f} {summary['p99_ms']:8.2f} {summary['error_rate']:7.1%}"
+        )
+    print(f"\nschedule lag p99: {results['all']['lag_p99_ms']:.1f} ms")
+    print(f"cache: {json.dumps(results['cache'])}")
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    print(f"\nwrote {write_results('replay', results, params, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
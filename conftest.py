@@ -0,0 +1,17 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# app.config reads the environment at import time, so this has to happen
+# before any test module imports the app: tests that start the app (and so
+# run the startup migrations) get a throwaway database, never ./recipes.db
+_DATABASE_DIR = tempfile.mkdtemp(prefix="recipes-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DATABASE_DIR, 'recipes.db')}"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _remove_test_database():
+    yield
+    shutil.rmtree(_DATABASE_DIR, ignore_errors=True)
@@ -1,8 +1,65 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import health, recipes
+from starlette.concurrency import run_in_threadpool
+from app import config
+from app.local_cache import TTLCache
+from app.database import get_engine
+from app.mealdb_client import MealDBClient
+from app.metrics import MetricsMiddleware
+from app.profiling import ProfileStore, ProfilingMiddleware
+from app.request_log import RequestLog, RequestLogMiddleware
+from app.migrations import migrate
+from app.response_cache import ResponseCache
+from app.snapshot import SnapshotStore
+from app.routers import debug, health, recipes
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes happen here, once, rather than when app.database is
+    # imported; workers starting together wait on the migration lock, in a
+    # worker thread so the wait does not block the event loop
+    if config.MIGRATE_ON_STARTUP:
+        await run_in_threadpool(migrate, get_engine())
+    # One MealDB client per process: shares the Redis pool and keep-alive
+    # HTTP connections to TheMealDB across all requests
+    app.state.mealdb_client = MealDBClient(redis_url=config.REDIS_URL)
+    app.state.mealdb_client.start_invalidation_listener()
+    if config.REPOSITORY_MODE == "snapshot":
+        app.state.recipe_snapshots = SnapshotStore.load(get_engine())
+    app.state.facet_cache = TTLCache(config.FACET_CACHE_MAXSIZE, config.FACET_CACHE_TTL_SECONDS)
+    app.state.search_response_cache = ResponseCache(
+        maxsize=config.SEARCH_RESPONSE_CACHE_MAXSIZE,
+        ttl=config.SEARCH_RESPONSE_CACHE_TTL_SECONDS,
+    )
+    try:
+        yield
+    finally:
+        await app.state.mealdb_client.aclose()
+        if config.REQUEST_LOG_PATH:
+            app.state.request_log.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+if config.PROFILING_ENABLED:
+    app.state.request_profiles = ProfileStore(config.PROFILE_BUFFER_SIZE)
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=app.state.request_profiles,
+        sample_rate=config.PROFILE_SAMPLE_RATE,
+        slow_ms=config.PROFILE_SLOW_REQUEST_MS,
+    )
+if config.REQUEST_LOG_PATH:
+    app.state.request_log = RequestLog(config.REQUEST_LOG_PATH)
+    app.add_middleware(
+        RequestLogMiddleware,
+        log=app.state.request_log,
+        sample_rate=config.REQUEST_LOG_SAMPLE_RATE,
+        max_body_bytes=config.REQUEST_LOG_MAX_BODY_BYTES,
+    )
 
 # Include routers
 app.include_router(health.router)
-app.include_router(recipes.router)
\ No newline at end of file
+app.include_router(recipes.router)
+app.include_router(debug.router)
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from app.cache_codec import CacheCodec, CodecError, msgpack, zstandard
+
+RECIPE = {
+    "id": "52795",
+    "title": "Chicken Handi",
+    "ingredients": ["1.2 kg Chicken", "5 thinly sliced Onion"],
+    "instructions": "Take a large pot or wok. " * 40,
+    "cuisine": "Indian",
+    "difficulty": "Medium",
+}
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_round_trip_json(compression):
+    codec = CacheCodec(serializer="json", compression=compression)
+    assert codec.decode(codec.encode(RECIPE)) == RECIPE
+
+
+@pytest.mark.skipif(msgpack is None or zstandard is None, reason="msgpack/zstandard not installed")
+def test_round_trip_msgpack_zstd():
+    codec = CacheCodec(serializer="msgpack", compression="zstd")
+    assert codec.decode(codec.encode(RECIPE)) == RECIPE
+
+
+def test_small_values_are_not_compressed():
+    codec = CacheCodec(compression="zlib", compress_threshold=1024)
+    small = codec.encode({"ids": ["1"]})
+    large = codec.encode(RECIPE)
+    assert small[0] == 0x81
+    assert large[0] == 0x91
+    assert len(large) < len(json.dumps(RECIPE))
+
+
+def test_reads_values_written_with_other_settings():
+    written = CacheCodec(serializer="json", compression="zlib").encode(RECIPE)
+    assert CacheCodec(serializer="json", compression="none").decode(written) == RECIPE
+
+
+def test_reads_legacy_json():
+    codec = CacheCodec()
+    assert codec.decode(json.dumps(RECIPE).encode()) == RECIPE
+    assert codec.decode(json.dumps([RECIPE])) == [RECIPE]
+
+
+def test_rejects_corrupt_and_unknown_values():
+    codec = CacheCodec()
+    with pytest.raises(CodecError):
+        codec.decode(b"\x91not zlib")
+    with pytest.raises(CodecError):
+        codec.decode(b"\x8fdata")
+
+
+def test_rejects_unknown_settings():
+    with pytest.raises(ValueError):
+        CacheCodec(serializer="pickle")
+    with pytest.raises(ValueError):
+        CacheCodec(compression="lz4")
@@ -0,0 +1,46 @@
+import pytest
+
+from app.facets import RecipeFilters, count_facets, parse_minutes
+from app.models import Recipe
+
+
+@pytest.mark.parametrize(
+    "text, minutes",
+    [
+        ("10 minutes", 10),
+        ("1 hour 30 minutes", 90),
+        ("1.5 hrs", 90),
+        ("1h 15m", 75),
+        ("45", 45),
+        ("10-15 minutes", 15),
+        ("Not specified", None),
+        ("", None),
+    ],
+)
+def test_parse_minutes(text, minutes):
+    assert parse_minutes(text) == minutes
+
+
+def make_recipe(cuisine, difficulty, prep="10 minutes", cook="20 minutes"):
+    return Recipe(
+        id=1, title="T", ingredients=[], steps=[], prepTime=prep, cookTime=cook,
+        difficulty=difficulty, cuisine=cuisine,
+    )
+
+
+def test_filters_match_recipes():
+    recipe = make_recipe("Italian", "Easy")
+    assert not RecipeFilters().active
+    assert RecipeFilters(cuisine=("Italian", "French")).matches(recipe)
+    assert not RecipeFilters(difficulty=("Hard",)).matches(recipe)
+    assert RecipeFilters(max_total_minutes=30).matches(recipe)
+    assert not RecipeFilters(max_cook_minutes=15).matches(recipe)
+    assert not RecipeFilters(max_prep_minutes=60).matches(make_recipe("Thai", "Easy", prep="Not specified"))
+
+
+def test_count_facets_most_common_first():
+    recipes = [make_recipe("Thai", "Easy"), make_recipe("Italian", "Easy"), make_recipe("Italian", "Hard")]
+    assert count_facets(recipes) == {
+        "cuisine": {"Italian": 2, "Thai": 1},
+        "difficulty": {"Easy": 2, "Hard": 1},
+    }
@@ -0,0 +1,61 @@
+import pytest
+
+from app.ingredients import IngredientIndex, ingredient_terms, normalize_ingredient, normalize_terms
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("3/4 cup soy sauce", "soy sauce"),
+        ("5 thinly sliced Onion", "onion"),
+        ("2 finely chopped Tomatoes", "tomato"),
+        ("1 (12 oz.) stir-fry vegetables", "stir-fry vegetable"),
+        ("500g lean minced beef", "beef"),
+        ("To taste Salt", "salt"),
+        ("Pinch Sea Salt", "sea salt"),
+        ("1 1/2 tsp Garlic Powder", "garlic powder"),
+        ("6 leaves basil", "basil"),
+        ("2 cups Berries", "berry"),
+        ("1 tin Couscous", "couscous"),
+        ("Eggs", "egg"),
+        ("2 tbsp", ""),
+    ],
+)
+def test_normalize_ingredient(line, expected):
+    assert normalize_ingredient(line) == expected
+
+
+def test_normalize_terms_drops_blanks_and_duplicates():
+    assert normalize_terms(["Eggs", " egg ", "", "bacon"]) == ["egg", "bacon"]
+
+
+def test_terms_include_words():
+    assert ingredient_terms("chicken breast") == {"chicken breast", "chicken", "breast"}
+
+
+class TestIngredientIndex:
+    def test_ranks_by_coverage_and_reports_missing(self):
+        index = IngredientIndex()
+        index.add(1, ["2 eggs", "4 slices bacon"])
+        index.add(2, ["2 eggs", "100g bacon", "1 cup flour", "1 cup milk"])
+        index.add(3, ["1 cup rice"])
+
+        results = index.search(["egg", "bacon"])
+        assert [key for key, _ in results] == [1, 2]
+        assert results[0][1].coverage == 1.0
+        assert results[1][1].missing == ("flour", "milk")
+
+    def test_min_match_and_words(self):
+        index = IngredientIndex()
+        index.add(1, ["2 chicken breasts", "1 lemon"])
+        index.add(2, ["1 lemon"])
+        assert [key for key, _ in index.search(["chicken", "lemon"], min_match=2)] == [1]
+
+    def test_readd_and_remove(self):
+        index = IngredientIndex()
+        index.add(1, ["egg"])
+        index.add(1, ["rice"])
+        assert index.search(["egg"]) == []
+        index.remove(1)
+        assert index.search(["rice"]) == []
+        assert len(index) == 0
@@ -1,9 +1,23 @@
+from contextlib import nullcontext
+
+import httpx
 import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 from main import app
-from app.models import Recipe
-from app.repositories import InMemoryRecipeRepository, RecipeRepository
+from app import config
+from app.database import Base
+from app.local_cache import TTLCache
+from app.mealdb_client import MealDBClient
+from app.models import Recipe, RecipeCreate
+from app.repositories import InMemoryRecipeRepository, RecipeRepository, SnapshotRecipeRepository, SQLiteRecipeRepository
+from app.response_cache import ResponseCache
+from app.routers import health as health_router
 from app.routers import recipes as recipes_router
+from app.search_index import ensure_fts_index
+from app.snapshot import SnapshotStore
 
 # Provide a fresh in-memory repository per test via dependency override
 @pytest.fixture(autouse=True)
@@ -39,7 +53,21 @@ def override_repo_dependency():
     def _get_test_repo() -> RecipeRepository:
         return repo_instance
 
+    # Offline MealDB client: TheMealDB answers "no meals" and Redis is unreachable
+    mealdb_client = MealDBClient(
+        redis_url="redis://127.0.0.1:1",
+        http_client=httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"meals": None}))
+        ),
+    )
+
     app.dependency_overrides[recipes_router.get_repository] = _get_test_repo
+    app.dependency_overrides[recipes_router.get_repository_opener] = lambda: lambda: nullcontext(repo_instance)
+    app.dependency_overrides[recipes_router.get_mealdb_client] = lambda: mealdb_client
+    response_cache = ResponseCache(maxsize=64, ttl=60)
+    app.dependency_overrides[recipes_router.get_search_response_cache] = lambda: response_cache
+    facet_cache = TTLCache(maxsize=64, ttl=60)
+    app.dependency_overrides[recipes_router.get_facet_cache] = lambda: facet_cache
     yield
     app.dependency_overrides.clear()
 
@@ -60,6 +88,14 @@ class TestIntegration:
         assert response.status_code == 200
         assert response.text == '"pong"'
 
+    def test_cache_stats_endpoint(self):
+        """Test GET /cache/stats exposes search cache counters"""
+        with TestClient(app) as lifespan_client:
+            response = lifespan_client.get("/cache/stats")
+        assert response.status_code == 200
+        stats = response.json()["search"]
+        assert set(stats) == {"hits", "negative_hits", "misses", "errors", "hit_ratio"}
+
     def test_get_all_recipes(self):
         """Test GET /recipes endpoint"""
         response = client.get("/recipes")
@@ -70,6 +106,91 @@ class TestIntegration:
         assert data["recipes"][0]["title"] == "Spaghetti Carbonara"
         assert data["recipes"][1]["title"] == "Chicken Tikka Masala"
 
+    def test_get_all_recipes_keyset_pagination(self):
+        """Test GET /recipes pages with limit/after and reports next_cursor"""
+        first = client.get("/recipes?limit=1").json()
+        assert [r["id"] for r in first["recipes"]] == [1]
+        assert first["next_cursor"] == 1
+
+        second = client.get(f"/recipes?limit=1&after={first['next_cursor']}").json()
+        assert [r["id"] for r in second["recipes"]] == [2]
+        assert second["next_cursor"] is None
+
+        assert client.get("/recipes").json()["next_cursor"] is None
+        assert client.get("/recipes?limit=0").status_code == 422
+
+    def test_get_all_recipes_field_projection(self):
+        """Test GET /recipes?fields= returns only the requested fields plus id"""
+        response = client.get("/recipes?fields=title,cuisine")
+        assert response.status_code == 200
+        assert response.json()["recipes"] == [
+            {"id": 1, "title": "Spaghetti Carbonara", "cuisine": "Italian"},
+            {"id": 2, "title": "Chicken Tikka Masala", "cuisine": "Indian"},
+        ]
+
+        response = client.get("/recipes?fields=title,calories")
+        assert response.status_code == 422
+
+    def test_export_recipes_ndjson(self):
+        """Test GET /recipes/export streams one JSON recipe per line"""
+        import json
+
+        response = client.get("/recipes/export?format=ndjson")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.splitlines()
+        assert [json.loads(line)["title"] for line in lines] == ["Spaghetti Carbonara", "Chicken Tikka Masala"]
+
+    def test_export_reads_through_a_session_open_until_the_stream_ends(self, tmp_path, monkeypatch):
+        """Test GET /recipes/export keeps its own session open for the whole stream"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'export.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            SQLiteRecipeRepository(db, full_text=False).create_recipes([
+                RecipeCreate(
+                    title=f"Recipe {n}", ingredients=["salt"], steps=["Cook"], prepTime="5 minutes",
+                    cookTime="5 minutes", difficulty="Easy", cuisine="Test",
+                )
+                for n in range(6)
+            ])
+
+        events = []
+
+        class TrackingSession(Session):
+            def close(self):
+                events.append("close")
+                super().close()
+
+        @event.listens_for(TrackingSession, "do_orm_execute")
+        def record_query(state):
+            events.append("query")
+
+        monkeypatch.setattr(
+            recipes_router.database, "get_sessionmaker", lambda: sessionmaker(bind=engine, class_=TrackingSession)
+        )
+        monkeypatch.setattr(recipes_router, "get_repository", lambda request, db: SQLiteRecipeRepository(db, full_text=False))
+        monkeypatch.setattr(config, "EXPORT_BATCH_SIZE", 2)
+        del app.dependency_overrides[recipes_router.get_repository_opener]
+
+        response = client.get("/recipes/export")
+        assert len(response.text.splitlines()) == 6
+        # Batches of 2 (plus the empty one that ends the scan), then one close
+        assert events == ["query"] * 4 + ["close"]
+        engine.dispose()
+
+    def test_export_recipes_gzip(self):
+        """Test GET /recipes/export?gzip=true compresses the stream"""
+        import gzip
+        import json
+
+        with client.stream("GET", "/recipes/export?gzip=true") as response:
+            assert response.headers["content-encoding"] == "gzip"
+            raw = b"".join(response.iter_raw())
+        lines = gzip.decompress(raw).decode().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [1, 2]
+
+        assert client.get("/recipes/export?format=csv").status_code == 422
+
     def test_get_recipe_by_id_success(self):
         """Test GET /recipes/{id} endpoint with valid ID"""
         response = client.get("/recipes/1")
@@ -86,6 +207,21 @@ class TestIntegration:
         data = response.json()
         assert data["detail"] == "Recipe not found"
 
+    def test_internal_ids_are_parsed_alike_by_get_put_and_delete(self):
+        """Test GET, PUT and DELETE /recipes/{id} answer negative and non-numeric ids the same way"""
+        payload = client.get("/recipes/1").json()
+        del payload["id"], payload["source"]
+        for recipe_id in ("-1", "0"):
+            assert client.get(f"/recipes/{recipe_id}").status_code == 404
+            assert client.put(f"/recipes/{recipe_id}", json=payload).status_code == 404
+            assert client.delete(f"/recipes/{recipe_id}").status_code == 404
+
+        invalid = client.get("/recipes/abc")
+        assert invalid.status_code == 422
+        assert invalid.json() == client.delete("/recipes/abc").json()
+        assert invalid.json() == client.put("/recipes/abc", json=payload).json()
+        assert client.get("/recipes/1.5").json() == client.delete("/recipes/1.5").json()
+
     def test_search_recipes_with_query(self):
         """Test GET /recipes/search endpoint with search query"""
         response = client.get("/recipes/search?q=chicken")
@@ -144,6 +280,51 @@ class TestIntegration:
         data = response.json()
         assert len(data["recipes"]) == 0
 
+    def test_routes_without_startup_create_their_caches(self):
+        """Apps served without the lifespan get the search and facet caches on first use"""
+        bare_app = FastAPI()
+        bare_app.include_router(health_router.router)
+        bare_app.include_router(recipes_router.router)
+        bare_app.dependency_overrides = {
+            key: value for key, value in app.dependency_overrides.items()
+            if key not in (recipes_router.get_search_response_cache, recipes_router.get_facet_cache)
+        }
+        bare_client = TestClient(bare_app)
+        first = bare_client.get("/recipes/search?q=chicken")
+        second = bare_client.get("/recipes/search?q=chicken")
+        assert (first.status_code, first.headers["X-Cache"]) == (200, "MISS")
+        assert (second.status_code, second.headers["X-Cache"]) == (200, "HIT")
+        assert isinstance(bare_app.state.search_response_cache, ResponseCache)
+        stats = bare_client.get("/cache/stats")
+        assert stats.status_code == 200
+        assert stats.json()["responses"]["hits"] == 1
+        assert bare_client.get("/recipes?facets=true").status_code == 200
+        assert isinstance(bare_app.state.facet_cache, TTLCache)
+
+    def test_get_mealdb_recipe_by_id(self):
+        """Test GET /recipes/{id}?source=mealdb looks the meal up in TheMealDB"""
+        meal = {"idMeal": "52772", "strMeal": "Teriyaki Chicken Casserole", "strArea": "Japanese"}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.url.path.endswith("/lookup.php")
+            found = request.url.params["i"] == meal["idMeal"]
+            return httpx.Response(200, json={"meals": [meal] if found else None})
+
+        mealdb_client = MealDBClient(
+            redis_url="redis://127.0.0.1:1",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        app.dependency_overrides[recipes_router.get_mealdb_client] = lambda: mealdb_client
+
+        response = client.get("/recipes/52772?source=mealdb")
+        assert response.status_code == 200
+        assert response.json()["title"] == "Teriyaki Chicken Casserole"
+        assert response.json()["source"] == "mealdb"
+
+        assert client.get("/recipes/1?source=mealdb").status_code == 404
+        assert client.get("/recipes/abc").status_code == 422
+        assert client.get("/recipes/1?source=other").status_code == 422
+
     def test_create_recipe(self):
         """Test POST /recipes endpoint"""
         new_recipe = {
@@ -173,6 +354,54 @@ class TestIntegration:
         response = client.post("/recipes", json=invalid_recipe)
         assert response.status_code == 422  # Validation error
 
+    def test_bulk_create_recipes_json_array(self):
+        """Test POST /recipes/bulk with a JSON array reports per-item results"""
+        valid = {
+            "title": "Bulk Soup",
+            "ingredients": ["water"],
+            "steps": ["Boil"],
+            "prepTime": "1 minute",
+            "cookTime": "5 minutes",
+            "difficulty": "Easy",
+            "cuisine": "Test",
+        }
+        payload = [valid, {"title": "Missing fields"}, dict(valid, title="Bulk Stew")]
+
+        response = client.post("/recipes/bulk?batch_size=1", json=payload)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["failed"] == 1
+        assert data["results"][0] == {"index": 0, "id": 3}
+        assert data["results"][1]["index"] == 1
+        assert "ingredients" in data["results"][1]["error"]
+        assert data["results"][2] == {"index": 2, "id": 4}
+        assert client.get("/recipes/4").json()["title"] == "Bulk Stew"
+
+    def test_bulk_create_recipes_ndjson(self):
+        """Test POST /recipes/bulk with an NDJSON body"""
+        import json
+
+        recipe = {
+            "title": "Line Recipe",
+            "ingredients": ["x"],
+            "steps": ["y"],
+            "prepTime": "1 minute",
+            "cookTime": "1 minute",
+            "difficulty": "Easy",
+            "cuisine": "Test",
+        }
+        body = "\n".join([json.dumps(recipe), "{not json", "", json.dumps(recipe)]) + "\n"
+        response = client.post(
+            "/recipes/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+        data = response.json()
+        assert data["created"] == 2
+        assert [r.get("id") for r in data["results"]] == [3, None, 4]
+        assert data["results"][1]["error"].startswith("Invalid JSON")
+
+        assert client.post("/recipes/bulk", json={"title": "not a list"}).status_code == 422
+
     def test_update_recipe_success(self):
         """Test PUT /recipes/{id} endpoint with valid ID"""
         updated_recipe = {
@@ -321,3 +550,165 @@ class TestIntegration:
         
         # Test DELETE endpoint
         assert client.delete("/recipes/1").status_code == 204
+
+    def test_search_merges_external_results(self):
+        """Test GET /recipes/search awaits MealDB and merges its results"""
+        meal = {
+            "idMeal": "52772",
+            "strMeal": "Teriyaki Chicken Casserole",
+            "strArea": "Japanese",
+            "strCategory": "Chicken",
+            "strInstructions": "Preheat oven to 350 degrees. Combine soy sauce and sugar in a pan.",
+            "strIngredient1": "soy sauce",
+            "strMeasure1": "3/4 cup",
+        }
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.url.params["s"] == "chicken"
+            return httpx.Response(200, json={"meals": [meal]})
+
+        mealdb_client = MealDBClient(
+            redis_url="redis://127.0.0.1:1",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        app.dependency_overrides[recipes_router.get_mealdb_client] = lambda: mealdb_client
+
+        response = client.get("/recipes/search?q=chicken")
+        assert response.status_code == 200
+        data = response.json()
+        sources = {r["source"] for r in data["recipes"]}
+        assert sources == {"internal", "mealdb"}
+        external = next(r for r in data["recipes"] if r["source"] == "mealdb")
+        assert external["id"] == "52772"
+        assert external["ingredients"] == ["3/4 cup soy sauce"]
+        assert external["cuisine"] == "Japanese"
+
+    def test_search_response_is_cached_with_etag(self):
+        """Test GET /recipes/search serves repeat queries from the rendered-response cache"""
+        first = client.get("/recipes/search?q=Chicken")
+        assert first.status_code == 200
+        assert first.headers["X-Cache"] == "MISS"
+        etag = first.headers["ETag"]
+
+        second = client.get("/recipes/search?q=%20chicken%20")
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.headers["ETag"] == etag
+        assert second.content == first.content
+
+        not_modified = client.get("/recipes/search?q=chicken", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+    def test_search_response_cache_invalidated_by_writes(self):
+        """Test a write bumps the data version so cached searches are recomputed"""
+        etag = client.get("/recipes/search?q=chicken").headers["ETag"]
+        new_recipe = {
+            "title": "Chicken Katsu",
+            "ingredients": ["chicken", "panko"],
+            "steps": ["Bread", "Fry"],
+            "prepTime": "10 minutes",
+            "cookTime": "10 minutes",
+            "difficulty": "Easy",
+            "cuisine": "Japanese",
+        }
+        assert client.post("/recipes", json=new_recipe).status_code == 201
+
+        response = client.get("/recipes/search?q=chicken", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["X-Cache"] == "MISS"
+        assert "Chicken Katsu" in [r["title"] for r in response.json()["recipes"]]
+
+    def test_search_during_mealdb_outage_is_not_cached(self):
+        """Test a failed MealDB search is served uncached and recovers on the next request"""
+        meal = {"idMeal": "52772", "strMeal": "Teriyaki Chicken Casserole", "strArea": "Japanese"}
+        upstream = {"down": True}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if upstream["down"]:
+                return httpx.Response(500)
+            return httpx.Response(200, json={"meals": [meal]})
+
+        mealdb_client = MealDBClient(
+            redis_url="redis://127.0.0.1:1",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        app.dependency_overrides[recipes_router.get_mealdb_client] = lambda: mealdb_client
+
+        during = client.get("/recipes/search?q=chicken")
+        assert (during.status_code, during.headers["X-Cache"]) == (200, "BYPASS")
+        assert {r["source"] for r in during.json()["recipes"]} == {"internal"}
+
+        upstream["down"] = False
+        after = client.get("/recipes/search?q=chicken", headers={"If-None-Match": during.headers["ETag"]})
+        assert (after.status_code, after.headers["X-Cache"]) == (200, "MISS")
+        assert "Teriyaki Chicken Casserole" in [r["title"] for r in after.json()["recipes"]]
+        assert client.get("/recipes/search?q=chicken").headers["X-Cache"] == "HIT"
+
+    def test_find_recipes_by_ingredients(self):
+        """Test GET /recipes/by-ingredients ranks by coverage and lists missing ingredients"""
+        response = client.get("/recipes/by-ingredients?have=Eggs,bacon,pasta")
+        assert response.status_code == 200
+        recipes = response.json()["recipes"]
+        assert [r["title"] for r in recipes] == ["Spaghetti Carbonara"]
+        assert recipes[0]["matched"] == 3
+        assert recipes[0]["coverage"] == 0.75
+        assert recipes[0]["missing"] == ["cheese"]
+
+        response = client.get("/recipes/by-ingredients?have=chicken,eggs&min_match=2")
+        assert response.json()["recipes"] == []
+
+    def test_get_all_recipes_filters_and_facets(self):
+        """Test GET /recipes filters by cuisine, difficulty and times and reports facet counts"""
+        response = client.get("/recipes?cuisine=Italian,Indian&facets=true")
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["id"] for r in data["recipes"]] == [1, 2]
+        assert data["facets"] == {"cuisine": {"Italian": 1, "Indian": 1}, "difficulty": {"Medium": 2}}
+
+        data = client.get("/recipes?cuisine=Indian").json()
+        assert [r["title"] for r in data["recipes"]] == ["Chicken Tikka Masala"]
+        assert "facets" not in data
+
+        data = client.get("/recipes?max_total_minutes=25&fields=title").json()
+        assert data["recipes"] == [{"id": 1, "title": "Spaghetti Carbonara"}]
+
+        assert client.get("/recipes?difficulty=Hard").json()["recipes"] == []
+        assert client.get("/recipes?max_prep_minutes=-1").status_code == 422
+
+    def test_search_recipes_filters_and_facets(self):
+        """Test GET /recipes/search applies filters and returns facet counts for the results"""
+        data = client.get("/recipes/search?q=a&facets=true").json()
+        assert data["facets"]["cuisine"] == {"Italian": 1, "Indian": 1}
+
+        data = client.get("/recipes/search?q=a&cuisine=Indian&facets=true").json()
+        assert [r["title"] for r in data["recipes"]] == ["Chicken Tikka Masala"]
+        assert data["facets"] == {"cuisine": {"Indian": 1}, "difficulty": {"Medium": 1}}
+
+
+class TestSnapshotMode:
+    """The snapshot repository's spliced responses match the regular ones byte for byte"""
+
+    @pytest.fixture
+    def repos(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'recipes.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        ensure_fts_index(engine)
+        session = sessionmaker(bind=engine)()
+        writer = SQLiteRecipeRepository(session)
+        writer.create_recipes([
+            RecipeCreate(title=f"Recipe {i}", ingredients=["salt"], steps=["Cook"], prepTime="5 minutes",
+                         cookTime="10 minutes", difficulty="Easy", cuisine="Crème brûlée")
+            for i in range(3)
+        ])
+        yield writer, SnapshotRecipeRepository(SnapshotStore.load(engine), writer)
+        session.close()
+        engine.dispose()
+
+    def test_list_and_get_bodies_match(self, repos):
+        writer, snapshot_repo = repos
+        urls = ["/recipes", "/recipes?limit=2", "/recipes?limit=2&after=2&facets=true", "/recipes/2"]
+        app.dependency_overrides[recipes_router.get_repository] = lambda: writer
+        expected = [client.get(url).content for url in urls]
+        app.dependency_overrides[recipes_router.get_repository] = lambda: snapshot_repo
+        assert [client.get(url).content for url in urls] == expected
+        assert client.get("/recipes/99").status_code == 404
@@ -0,0 +1,398 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from app import config
+from app.local_cache import TTLCache
+from app.mealdb_client import MealDBClient, SearchResult
+from app.redis_client import CachedResults, RedisClient, normalize_query
+
+MEAL = {
+    "idMeal": "52795",
+    "strMeal": "Chicken Handi",
+    "strArea": "Indian",
+    "strCategory": "Chicken",
+    "strInstructions": "Take a large pot or wok. Heat the oil and fry the onions.",
+    "strIngredient1": "Chicken",
+    "strMeasure1": "1.2 kg",
+}
+
+
+class FakeCache:
+    """In-process stand-in for RedisClient's async cache interface."""
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, CachedResults] = {}
+        self.locks: Dict[str, str] = {}
+        self.published = []
+        self.writes = 0
+
+    def is_available(self) -> bool:
+        return True
+
+    async def get_cached_entry(self, search_query: str) -> Optional[CachedResults]:
+        return self.entries.get(normalize_query(search_query))
+
+    async def cache_results(self, search_query, results, ttl_seconds=86400, delta=0.0) -> bool:
+        self.writes += 1
+        self.entries[normalize_query(search_query)] = CachedResults(results, delta, time.time() + ttl_seconds)
+        return True
+
+    async def acquire_lock(self, search_query: str, ttl_ms: int) -> Optional[str]:
+        key = normalize_query(search_query)
+        if key in self.locks:
+            return None
+        self.locks[key] = "token"
+        return "token"
+
+    async def release_lock(self, search_query: str, token: str) -> None:
+        self.locks.pop(normalize_query(search_query), None)
+
+    async def publish_invalidation(self, key: str, origin: str) -> None:
+        self.published.append((origin, key))
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeRedis:
+    """Minimal async stand-in for the redis.asyncio commands RedisClient uses."""
+
+    def __init__(self) -> None:
+        self.data: Dict[str, str] = {}
+        self.ttls: Dict[str, int] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+        self.ttls[key] = ttl
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def publish(self, channel, message):
+        return 0
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, ttl, value))
+        return self
+
+    async def execute(self):
+        for command in self.commands:
+            await self.redis.setex(*command)
+        self.commands = []
+
+
+def make_redis_client() -> RedisClient:
+    client = RedisClient("redis://127.0.0.1:1")
+    client.redis_client = FakeRedis()
+    return client
+
+
+class CountingUpstream:
+    """MockTransport handler that counts calls and answers after a delay."""
+
+    def __init__(self, delay: float = 0.05, meals=None, status_code: int = 200) -> None:
+        self.calls = 0
+        self.paths = []
+        self.delay = delay
+        self.meals = [MEAL] if meals is None else meals
+        self.status_code = status_code
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        self.paths.append(request.url.path.rsplit("/", 1)[-1])
+        await asyncio.sleep(self.delay)
+        meals = self.meals
+        if request.url.path.endswith("lookup.php"):
+            meals = [m for m in meals if m["idMeal"] == request.url.params["i"]]
+        return httpx.Response(self.status_code, json={"meals": meals or None})
+
+
+def make_client(upstream, cache=None) -> MealDBClient:
+    return MealDBClient(
+        redis_url="redis://127.0.0.1:1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(upstream)),
+        redis_client=cache,
+    )
+
+
+class TestStampedeProtection:
+    def test_concurrent_identical_searches_make_one_upstream_call(self):
+        upstream = CountingUpstream()
+        client = make_client(upstream)
+
+        async def run():
+            queries = ["chicken", "Chicken", " CHICKEN "] * 10
+            return await asyncio.gather(*(client.search_recipes(q) for q in queries))
+
+        results = asyncio.run(run())
+        assert upstream.calls == 1
+        assert all([r.id for r in recipes] == ["52795"] for recipes in results)
+
+    def test_concurrent_searches_with_cache_fill_once(self):
+        upstream = CountingUpstream()
+        cache = FakeCache()
+        client = make_client(upstream, cache)
+
+        async def run():
+            await asyncio.gather(*(client.search_recipes("chicken") for _ in range(25)))
+            # Served from cache afterwards
+            return await client.search_recipes("chicken")
+
+        recipes = asyncio.run(run())
+        assert upstream.calls == 1
+        assert cache.writes == 1
+        assert recipes[0].title == "Chicken Handi"
+
+    def test_waits_for_lease_holder_instead_of_fetching(self):
+        upstream = CountingUpstream()
+        cache = FakeCache()
+        cache.locks["chicken"] = "other-worker"
+        client = make_client(upstream, cache)
+
+        async def other_worker_fills_cache():
+            await asyncio.sleep(0.1)
+            await cache.cache_results("chicken", [{**client.convert_mealdb_to_recipe(MEAL).model_dump()}])
+
+        async def run():
+            _, recipes = await asyncio.gather(other_worker_fills_cache(), client.search_recipes("chicken"))
+            return recipes
+
+        recipes = asyncio.run(run())
+        assert upstream.calls == 0
+        assert [r.id for r in recipes] == ["52795"]
+
+    def test_upstream_errors_are_not_cached(self):
+        upstream = CountingUpstream(status_code=500)
+        cache = FakeCache()
+        client = make_client(upstream, cache)
+
+        assert asyncio.run(client.search("chicken")) == SearchResult([], complete=False)
+        assert cache.writes == 0
+        assert cache.locks == {}
+
+
+class TestEarlyRefresh:
+    def test_should_refresh_early(self):
+        client = make_client(CountingUpstream())
+        client._random = lambda: 0.5
+        now = time.time()
+
+        assert not client._should_refresh_early(CachedResults([], delta=1.0, expires_at=now + 3600))
+        assert client._should_refresh_early(CachedResults([], delta=1.0, expires_at=now + 0.1))
+        # Legacy entries and entries without a compute time never refresh early
+        assert not client._should_refresh_early(CachedResults([]))
+        assert not client._should_refresh_early(CachedResults([], delta=0.0, expires_at=now))
+
+    def test_hot_key_near_expiry_refreshes_in_background(self):
+        upstream = CountingUpstream(delay=0)
+        cache = FakeCache()
+        client = make_client(upstream, cache)
+        stale = client.convert_mealdb_to_recipe({**MEAL, "strMeal": "Old Title"}).model_dump()
+        cache.entries["chicken"] = CachedResults([stale], delta=5.0, expires_at=time.time() + 0.01)
+
+        async def run():
+            first = await client.search_recipes("chicken")
+            await asyncio.gather(*client._inflight.values())
+            return first, await client.search_recipes("chicken")
+
+        first, second = asyncio.run(run())
+        assert first[0].title == "Old Title"  # stale value served immediately
+        assert second[0].title == "Chicken Handi"
+        assert upstream.calls == 1
+
+
+class TestNegativeCaching:
+    def test_empty_results_are_cached_with_short_ttl(self):
+        upstream = CountingUpstream(meals=[])
+        redis_client = make_redis_client()
+        client = make_client(upstream, redis_client)
+
+        async def run():
+            first = await client.search_recipes("chikcen")
+            client.local_cache.clear()  # force the second lookup to Redis
+            second = await client.search_recipes("Chikcen")
+            return first, second, await redis_client.get_cached_results("chikcen")
+
+        first, second, cached = asyncio.run(run())
+        assert first == second == []
+        assert upstream.calls == 1
+        assert cached == []  # distinguishable from a miss (None)
+        assert redis_client.redis_client.ttls["mealdb_search:chikcen"] == config.MEALDB_NEGATIVE_CACHE_TTL_SECONDS
+
+        stats = redis_client.stats.snapshot()
+        assert stats["misses"] == 1
+        assert stats["negative_hits"] == 2
+        assert stats["hits"] == 0
+
+    def test_positive_results_use_full_ttl(self):
+        redis_client = make_redis_client()
+        client = make_client(CountingUpstream(), redis_client)
+
+        async def run():
+            await client.search_recipes("chicken")
+            client.local_cache.clear()
+            return await client.search_recipes("chicken")
+
+        assert [r.id for r in asyncio.run(run())] == ["52795"]
+        assert redis_client.redis_client.ttls["mealdb_search:chicken"] == config.MEALDB_CACHE_TTL_SECONDS
+        assert redis_client.stats.snapshot()["hits"] == 1
+
+    def test_miss_is_none(self):
+        redis_client = make_redis_client()
+        assert asyncio.run(redis_client.get_cached_results("unknown")) is None
+
+
+class TestLocalCacheTier:
+    def test_ttl_cache_evicts_least_recently_used_and_expired(self):
+        now = [0.0]
+        cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # "b" is now least recently used
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+
+        now[0] = 10
+        assert cache.get("a") is None
+        assert len(cache) == 1
+
+    def test_repeat_searches_are_served_from_l1(self):
+        upstream = CountingUpstream()
+        cache = FakeCache()
+        client = make_client(upstream, cache)
+
+        async def run():
+            for _ in range(3):
+                await client.search_recipes("chicken")
+
+        asyncio.run(run())
+        tiers = client.tier_stats.snapshot()
+        assert tiers["upstream"]["served"] == 1
+        assert tiers["l1"]["served"] == 2
+        assert tiers["l2"]["served"] == 0
+        assert cache.published == [(client.instance_id, "chicken")]
+
+    def test_invalidation_from_other_worker_evicts_l1(self):
+        client = make_client(CountingUpstream())
+        client.local_cache.set("chicken", [])
+        client._on_invalidation(client.instance_id, "chicken")
+        assert client.local_cache.get("chicken") == []
+        client._on_invalidation("other-worker", "chicken")
+        assert client.local_cache.get("chicken") is None
+
+
+class TestPerMealCache:
+    def test_meals_are_stored_once_and_search_keys_hold_ids(self):
+        other = {**MEAL, "idMeal": "52796", "strMeal": "Chicken Curry"}
+        upstream = CountingUpstream(meals=[MEAL, other])
+        redis_client = make_redis_client()
+        client = make_client(upstream, redis_client)
+
+        async def run():
+            await client.search_recipes("chicken")
+            await client.search_recipes("chick")
+            client.local_cache.clear()
+            return await client.search_recipes("chicken")
+
+        recipes = asyncio.run(run())
+        data = redis_client.redis_client.data
+        assert redis_client.codec.decode(data["mealdb_search:chicken"])["ids"] == ["52795", "52796"]
+        assert sorted(k for k in data if k.startswith("mealdb_meal:")) == ["mealdb_meal:52795", "mealdb_meal:52796"]
+        assert [r.title for r in recipes] == ["Chicken Handi", "Chicken Curry"]
+        assert upstream.calls == 2
+
+    def test_evicted_meal_turns_search_into_miss(self):
+        upstream = CountingUpstream()
+        redis_client = make_redis_client()
+        client = make_client(upstream, redis_client)
+
+        asyncio.run(client.search_recipes("chicken"))
+        del redis_client.redis_client.data["mealdb_meal:52795"]
+        assert asyncio.run(redis_client.get_cached_entry("chicken")) is None
+
+    def test_legacy_full_entries_are_still_read(self):
+        import json
+
+        redis_client = make_redis_client()
+        redis_client.redis_client.data["mealdb_search:soup"] = json.dumps([{"id": "1"}]).encode()
+        assert asyncio.run(redis_client.get_cached_results("soup")) == [{"id": "1"}]
+
+    def test_get_recipe_by_id_uses_cache_then_lookup(self):
+        upstream = CountingUpstream()
+        redis_client = make_redis_client()
+        client = make_client(upstream, redis_client)
+
+        async def run():
+            first = await client.get_recipe_by_id("52795")  # lookup.php
+            second = await client.get_recipe_by_id("52795")  # per-meal cache
+            missing = await client.get_recipe_by_id("1")
+            invalid = await client.get_recipe_by_id("../search.php")
+            return first, second, missing, invalid
+
+        first, second, missing, invalid = asyncio.run(run())
+        assert first == second
+        assert first.source == "mealdb"
+        assert missing is None and invalid is None
+        assert upstream.paths == ["lookup.php", "lookup.php"]
+
+    def test_search_results_serve_detail_lookups(self):
+        upstream = CountingUpstream()
+        client = make_client(upstream, make_redis_client())
+
+        async def run():
+            await client.search_recipes("chicken")
+            return await client.get_recipe_by_id("52795")
+
+        assert asyncio.run(run()).title == "Chicken Handi"
+        assert upstream.paths == ["search.php"]
+
+
+class TestIngredientIndex:
+    def test_searched_meals_are_indexed_by_ingredient(self):
+        client = make_client(CountingUpstream())
+        asyncio.run(client.search_recipes("chicken"))
+
+        results = client.find_by_ingredients(["chicken"])
+        assert [(recipe.id, match.coverage) for recipe, match in results] == [("52795", 1.0)]
+        assert client.find_by_ingredients(["tofu"]) == []
+
+    def test_index_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(config, "MEALDB_INGREDIENT_INDEX_MAXSIZE", 1)
+        other = {**MEAL, "idMeal": "52796", "strMeal": "Chicken Curry"}
+        client = make_client(CountingUpstream(meals=[MEAL, other]))
+        asyncio.run(client.search_recipes("chicken"))
+        assert [recipe.id for recipe, _ in client.find_by_ingredients(["chicken"])] == ["52796"]
@@ -0,0 +1,137 @@
+import re
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.mealdb_client import MealDBClient
+from app.metrics import Counter, Gauge, Histogram, Registry
+from app.models import Recipe
+from app.repositories import InMemoryRecipeRepository
+from app.response_cache import ResponseCache
+from app.routers import recipes as recipes_router
+from main import app
+
+
+def sample(body, name, **labels):
+    """Value of one series in a /metrics body, or None if absent."""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = "^" + re.escape(name) + (r"\{" + re.escape(wanted) + r"\}" if labels else "") + r" (\S+)$"
+    match = re.search(pattern, body, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_counter_and_gauge_render():
+    registry = Registry()
+    lookups = Counter("lookups", "Lookups.", ("cache", "result"), registry=registry)
+    in_flight = Gauge("in_flight", "In flight.", registry=registry).labels()
+    lookups.labels("l1", "hit").inc()
+    lookups.labels("l1", "hit").inc(2)
+    lookups.labels("l1", 'a "quoted"\nvalue').inc()
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    assert registry.render().decode().splitlines() == [
+        "# HELP lookups Lookups.",
+        "# TYPE lookups counter",
+        'lookups_total{cache="l1",result="a \\"quoted\\"\\nvalue"} 1',
+        'lookups_total{cache="l1",result="hit"} 3',
+        "# HELP in_flight In flight.",
+        "# TYPE in_flight gauge",
+        "in_flight 1",
+    ]
+
+
+def test_children_are_bound_once():
+    registry = Registry()
+    lookups = Counter("lookups", "Lookups.", ("cache",), registry=registry)
+    assert lookups.labels("l1") is lookups.labels("l1")
+    with pytest.raises(ValueError):
+        lookups.labels("l1", "hit")
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = Histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0), registry=registry)
+    child = latency.labels("db")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    assert registry.render().decode().splitlines()[2:] == [
+        'latency_seconds_bucket{stage="db",le="0.1"} 2',
+        'latency_seconds_bucket{stage="db",le="1"} 3',
+        'latency_seconds_bucket{stage="db",le="+Inf"} 4',
+        'latency_seconds_sum{stage="db"} 3.65',
+        'latency_seconds_count{stage="db"} 4',
+    ]
+
+
+@pytest.fixture
+def client():
+    seed = [
+        Recipe(
+            id=1, title="Chicken Curry", ingredients=["chicken"], steps=["Cook"], prepTime="5 minutes",
+            cookTime="20 minutes", difficulty="Easy", cuisine="Indian", source="internal",
+        )
+    ]
+    repo = InMemoryRecipeRepository(seed=seed)
+    mealdb_client = MealDBClient(
+        redis_url="redis://127.0.0.1:1",
+        http_client=httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"meals": None}))
+        ),
+    )
+    response_cache = ResponseCache(maxsize=64, ttl=60)
+    app.dependency_overrides[recipes_router.get_repository] = lambda: repo
+    app.dependency_overrides[recipes_router.get_mealdb_client] = lambda: mealdb_client
+    app.dependency_overrides[recipes_router.get_search_response_cache] = lambda: response_cache
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    return response.text
+
+
+def test_requests_are_labelled_by_route_template(client):
+    before = scrape(client)
+    route = dict(method="GET", route="/recipes/{recipe_id}")
+    for recipe_id in (1, 2, 3):
+        client.get(f"/recipes/{recipe_id}")
+    client.get("/no/such/path")
+    after = scrape(client)
+
+    def delta(name, **labels):
+        return (sample(after, name, **labels) or 0) - (sample(before, name, **labels) or 0)
+
+    assert delta("http_request_duration_seconds_count", **route) == 3
+    assert delta("http_requests_total", **route, status="200") == 1
+    assert delta("http_requests_total", **route, status="404") == 2
+    assert delta("http_requests_total", method="GET", route="unmatched", status="404") == 1
+    # The raw paths never become label values
+    assert "/recipes/1" not in after
+    assert sample(after, "http_requests_in_flight") == 1  # the scrape itself
+
+
+def test_search_records_stages_and_cache_lookups(client):
+    before = scrape(client)
+    assert client.get("/recipes/search?q=curry").headers["X-Cache"] == "MISS"
+    assert client.get("/recipes/search?q=curry").headers["X-Cache"] == "HIT"
+    after = scrape(client)
+
+    def delta(name, **labels):
+        return (sample(after, name, **labels) or 0) - (sample(before, name, **labels) or 0)
+
+    assert delta("recipe_stage_duration_seconds_count", stage="db_query") == 3
+    assert delta("recipe_stage_duration_seconds_count", stage="mealdb_http") == 1
+    assert delta("recipe_stage_duration_seconds_count", stage="serialize") == 1
+    assert delta("cache_lookups_total", cache="search_response", result="hit") == 1
+    assert delta("cache_lookups_total", cache="search_response", result="miss") == 1
+    assert delta("cache_lookups_total", cache="l1", result="miss") == 1
+    assert sample(after, "db_queries_in_flight") == 0
+    assert sample(after, "mealdb_requests_in_flight") == 0
@@ -0,0 +1,167 @@
+import asyncio
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.migrations import MIGRATIONS, Migration, applied_versions, migrate, pending_migrations
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+ALL_VERSIONS = [migration.version for migration in MIGRATIONS]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'recipes.db'}", connect_args={"check_same_thread": False})
+    yield engine
+    engine.dispose()
+
+
+def count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+def test_migrate_creates_schema_and_seeds_once(engine):
+    assert migrate(engine) == ALL_VERSIONS
+    assert applied_versions(engine) == ALL_VERSIONS
+    tables = set(inspect(engine).get_table_names())
+    assert {"recipes", "recipe_ingredients", "data_version", "recipes_fts", "schema_migrations"} <= tables
+    assert count(engine, "recipes") == 2
+    # Seeded through the repository: ingredient rows and parsed times are set
+    assert count(engine, "recipe_ingredients") > 0
+    assert count(engine, "recipes WHERE prep_minutes IS NULL") == 0
+
+    # Current database: nothing to do, and deleting every recipe does not reseed
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM recipe_ingredients"))
+        conn.execute(text("DELETE FROM recipes"))
+    assert migrate(engine) == []
+    assert count(engine, "recipes") == 0
+
+
+def test_migrated_schema_matches_the_models(engine):
+    migrate(engine)
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        assert {column["name"] for column in inspector.get_columns(table.name)} == set(table.columns.keys())
+        assert {index["name"] for index in inspector.get_indexes(table.name)} == {index.name for index in table.indexes}
+    with engine.connect() as conn:
+        schema = conn.scalar(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'recipes'"))
+    assert "AUTOINCREMENT" in schema
+
+
+def create_legacy_schema(engine):
+    """Schema as created by releases before schema_migrations existed, with one recipe."""
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE recipes (id INTEGER PRIMARY KEY, title VARCHAR, ingredients JSON, steps JSON, '
+            '"prepTime" VARCHAR, "cookTime" VARCHAR, difficulty VARCHAR, cuisine VARCHAR)'
+        ))
+        conn.execute(text(
+            "INSERT INTO recipes VALUES (7, 'Old Stew', '[\"2 carrots\"]', '[]', '10 minutes', "
+            "'1 hour', 'Easy', 'British')"
+        ))
+
+
+def test_migrate_upgrades_database_created_at_import(engine):
+    create_legacy_schema(engine)
+
+    assert migrate(engine) == ALL_VERSIONS
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT prep_minutes, cook_minutes FROM recipes")).one() == (10, 60)
+        assert conn.execute(text("SELECT term FROM recipe_ingredients")).scalars().all() == ["carrot"]
+    # Not empty, so not seeded
+    assert count(engine, "recipes") == 1
+    # Rebuilt as AUTOINCREMENT: the id of a deleted recipe is not handed out again
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM recipe_ingredients"))
+        conn.execute(text("DELETE FROM recipes"))
+        conn.execute(text("INSERT INTO recipes (title) VALUES ('New Stew')"))
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM recipes")).scalar() == 8
+        assert conn.execute(text("SELECT rowid FROM recipes_fts WHERE recipes_fts MATCH 'new'")).scalar() == 8
+
+
+def test_seed_can_be_turned_off(engine, monkeypatch):
+    monkeypatch.setattr("app.config.SEED_INITIAL_RECIPES", False)
+    migrate(engine)
+    assert count(engine, "recipes") == 0
+
+
+def test_only_new_migrations_run(engine):
+    migrate(engine)
+    calls = []
+    extra = Migration(ALL_VERSIONS[-1] + 1, "add extra table", lambda e: calls.append(e))
+    assert [m.version for m in pending_migrations(engine, MIGRATIONS + [extra])] == [extra.version]
+    assert migrate(engine, MIGRATIONS + [extra]) == [extra.version]
+    assert migrate(engine, MIGRATIONS + [extra]) == []
+    assert calls == [engine]
+
+
+def test_failed_migration_is_retried(engine):
+    def fail(engine):
+        raise RuntimeError("boom")
+
+    broken = MIGRATIONS + [Migration(ALL_VERSIONS[-1] + 1, "broken", fail)]
+    with pytest.raises(RuntimeError):
+        migrate(engine, broken)
+    assert applied_versions(engine) == ALL_VERSIONS
+    assert [m.name for m in pending_migrations(engine, broken)] == ["broken"]
+
+
+def test_concurrent_workers_apply_each_migration_once(tmp_path):
+    path = tmp_path / "recipes.db"
+    engines = [create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}) for _ in range(4)]
+    with ThreadPoolExecutor(max_workers=len(engines)) as pool:
+        results = list(pool.map(migrate, engines))
+
+    assert sorted(version for applied in results for version in applied) == ALL_VERSIONS
+    assert count(engines[0], "recipes") == 2
+    for engine in engines:
+        engine.dispose()
+
+
+def test_importing_the_app_does_not_touch_the_database(tmp_path):
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT, "DATABASE_URL": f"sqlite:///{tmp_path / 'recipes.db'}"}
+    subprocess.run([sys.executable, "-c", "import main"], cwd=tmp_path, env=env, check=True)
+    assert os.listdir(tmp_path) == []
+
+
+def test_upgrade_command(tmp_path, engine):
+    create_legacy_schema(engine)
+    engine.dispose()
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT, "DATABASE_URL": f"sqlite:///{tmp_path / 'recipes.db'}"}
+
+    def run(command):
+        return subprocess.run(
+            [sys.executable, "-m", "app.migrations", command], cwd=tmp_path, env=env,
+            check=True, capture_output=True, text=True,
+        ).stdout
+
+    assert "pending" in run("status")
+    assert run("upgrade").startswith(f"Applied {len(MIGRATIONS)} migration(s)")
+    assert run("upgrade").strip() == "Database is up to date"
+    assert "pending" not in run("status")
+
+
+def test_lifespan_migrates_off_the_event_loop(monkeypatch):
+    import main
+
+    calls = []
+
+    def fake_migrate(engine):
+        # A worker thread has no running event loop
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        calls.append(engine)
+
+    monkeypatch.setattr(main, "migrate", fake_migrate)
+    with TestClient(main.app):
+        pass
+    assert len(calls) == 1
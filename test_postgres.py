@@ -0,0 +1,201 @@
+"""PostgresRecipeRepository against a throwaway PostgreSQL cluster.
+
+The tests create a cluster with initdb in a temp directory and start it with
+pg_ctl, listening only on a Unix socket there, so no external service is
+needed. They skip when the PostgreSQL server binaries (looked up in
+$POSTGRES_BIN_DIR, PATH, ``pg_config --bindir`` and /usr/lib/postgresql) or
+psycopg2 are missing, or when running as root, which postgres refuses.
+"""
+import asyncio
+import glob
+import os
+import shutil
+import subprocess
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.facets import RecipeFilters
+from app.models import RecipeCreate
+from app.migrations import migrate
+from app.postgres import TRIGRAM_INDEX, create_postgres_engine, trigram_index_exists
+from app.repositories import AsyncPostgresRecipeRepository, PostgresRecipeRepository
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+
+def make_payload(title, ingredients=None, cuisine="Test", **overrides):
+    data = dict(
+        title=title,
+        ingredients=ingredients or ["salt"],
+        steps=["Cook it"],
+        prepTime="5 minutes",
+        cookTime="10 minutes",
+        difficulty="Easy",
+        cuisine=cuisine,
+    )
+    data.update(overrides)
+    return RecipeCreate(**data)
+
+
+def find_bin_dir():
+    candidates = [os.environ.get("POSTGRES_BIN_DIR")]
+    initdb = shutil.which("initdb")
+    candidates.append(os.path.dirname(initdb) if initdb else None)
+    if shutil.which("pg_config"):
+        result = subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True)
+        candidates.append(result.stdout.strip())
+    candidates.extend(sorted(glob.glob("/usr/lib/postgresql/*/bin"), reverse=True))
+    for path in candidates:
+        if path and os.path.exists(os.path.join(path, "initdb")) and os.path.exists(os.path.join(path, "pg_ctl")):
+            return path
+    return None
+
+
+@pytest.fixture(scope="module")
+def pg_engine(tmp_path_factory):
+    bin_dir = find_bin_dir()
+    if bin_dir is None:
+        pytest.skip("PostgreSQL server binaries (initdb, pg_ctl) not found")
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        pytest.skip("PostgreSQL cannot run as root")
+
+    base = tmp_path_factory.mktemp("postgres")
+    data, log = str(base / "data"), str(base / "server.log")
+    subprocess.run(
+        [os.path.join(bin_dir, "initdb"), "-D", data, "-U", "postgres", "-A", "trust", "-E", "UTF8", "--no-sync"],
+        check=True, capture_output=True,
+    )
+    pg_ctl = os.path.join(bin_dir, "pg_ctl")
+    subprocess.run(
+        [pg_ctl, "-D", data, "-l", log, "-w", "-o", f"-k {base} -c listen_addresses='' -F", "start"],
+        check=True, capture_output=True,
+    )
+    engine = create_postgres_engine(make_url(f"postgresql+psycopg2://postgres@/postgres?host={base}"))
+    try:
+        migrate(engine)
+        yield engine
+    finally:
+        engine.dispose()
+        subprocess.run([pg_ctl, "-D", data, "-m", "fast", "-w", "stop"], capture_output=True)
+
+
+@pytest.fixture(scope="module")
+def trigram(pg_engine):
+    return trigram_index_exists(pg_engine)
+
+
+@pytest.fixture
+def repo(pg_engine, trigram):
+    with pg_engine.begin() as conn:
+        conn.execute(text("TRUNCATE recipes, recipe_ingredients, data_version RESTART IDENTITY"))
+    session = sessionmaker(autocommit=False, autoflush=False, bind=pg_engine)()
+    yield PostgresRecipeRepository(session, trigram=trigram)
+    session.close()
+
+
+def test_pool_options():
+    engine = create_postgres_engine(make_url("postgresql+psycopg2://user@db.internal/recipes"))
+    assert engine.pool.size() == 10
+    assert engine.pool._max_overflow == 10
+    assert engine.pool._recycle == 1800
+    assert engine.pool._pre_ping
+
+
+def test_json_columns_are_jsonb(repo):
+    types = dict(repo.db.execute(text(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_name = 'recipes' AND column_name IN ('ingredients', 'steps')"
+    )).all())
+    assert types == {"ingredients": "jsonb", "steps": "jsonb"}
+
+
+def test_crud_roundtrip(repo):
+    created = repo.create_recipes([make_payload("Pad Thai"), make_payload("Ramen", ["noodles", "egg"])])
+    assert [recipe.id for recipe in created] == [1, 2]
+    assert repo.get_recipe(2).ingredients == ["noodles", "egg"]
+
+    updated = repo.update_recipe(1, make_payload("Pad See Ew", cuisine="Thai"))
+    assert updated.title == "Pad See Ew"
+    assert repo.delete_recipe(2)
+    assert repo.get_recipe(2) is None
+    assert [recipe.title for recipe in repo.list_recipes()] == ["Pad See Ew"]
+    assert repo.data_version() == 3
+
+
+def test_search_is_case_insensitive_and_literal(repo):
+    repo.create_recipes([
+        make_payload("Chicken Tikka Masala"),
+        make_payload("Tikka Paneer"),
+        make_payload("100% Rye Bread"),
+        make_payload("Beef Stew"),
+    ])
+    assert {recipe.title for recipe in repo.search_recipes("TIKKA")} == {"Chicken Tikka Masala", "Tikka Paneer"}
+    # Wildcards in the query match literally
+    assert [recipe.title for recipe in repo.search_recipes("%")] == ["100% Rye Bread"]
+    assert repo.search_recipes("_") == []
+
+
+def test_search_ranks_by_similarity(repo, trigram):
+    if not trigram:
+        pytest.skip("pg_trgm is not available")
+    repo.create_recipes([make_payload("Spicy Chicken Curry with Rice"), make_payload("Chicken Curry")])
+    assert [recipe.title for recipe in repo.search_recipes("chicken curry")] == [
+        "Chicken Curry",
+        "Spicy Chicken Curry with Rice",
+    ]
+
+
+def test_search_uses_trigram_index(repo, trigram):
+    if not trigram:
+        pytest.skip("pg_trgm is not available")
+    repo.db.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = repo.db.execute(text("EXPLAIN SELECT id FROM recipes WHERE title ILIKE '%tikka%'")).scalars().all()
+    assert any(TRIGRAM_INDEX in line for line in plan)
+
+
+def test_search_filters_and_facets(repo):
+    repo.create_recipes([
+        make_payload("Green Curry", cuisine="Thai"),
+        make_payload("Red Curry", cuisine="Thai", difficulty="Hard"),
+        make_payload("Curry Wurst", cuisine="German"),
+    ])
+    filters = RecipeFilters(cuisine=("Thai",), difficulty=("Easy",))
+    assert [recipe.title for recipe in repo.search_recipes("curry", filters)] == ["Green Curry"]
+    assert repo.facet_counts() == {
+        "cuisine": {"Thai": 2, "German": 1},
+        "difficulty": {"Easy": 2, "Hard": 1},
+    }
+
+
+def test_find_by_ingredients(repo):
+    repo.create_recipes([
+        make_payload("Omelette", ["2 eggs", "salt"]),
+        make_payload("Carbonara", ["pasta", "eggs", "bacon", "cheese"]),
+    ])
+    results = repo.find_by_ingredients(["egg", "salt"])
+    assert [(recipe.title, match.matched) for recipe, match in results] == [("Omelette", 2), ("Carbonara", 1)]
+
+
+def test_async_search_matches_sync(repo, pg_engine, trigram):
+    pytest.importorskip("asyncpg")
+    repo.create_recipes([
+        make_payload("Spicy Chicken Curry with Rice"),
+        make_payload("Chicken Curry"),
+        make_payload("100% Rye Bread"),
+    ])
+
+    async def search(query):
+        engine = create_async_engine(pg_engine.url.set(drivername="postgresql+asyncpg"))
+        try:
+            async with AsyncSession(engine) as session:
+                results = await AsyncPostgresRecipeRepository(session, trigram=trigram).search_recipes(query)
+                return [recipe.title for recipe in results]
+        finally:
+            await engine.dispose()
+
+    for query in ("chicken curry", "%", "_"):
+        assert asyncio.run(search(query)) == [recipe.title for recipe in repo.search_recipes(query)]
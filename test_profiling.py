@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import config, profiling
+from app.mealdb_client import MealDBClient
+from app.models import Recipe
+from app.profiling import ProfileStore, ProfilingMiddleware
+from app.repositories import InMemoryRecipeRepository
+from app.response_cache import ResponseCache
+from app.routers import debug, recipes as recipes_router
+from main import app as main_app
+
+
+def make_app(sample_rate=0.0, slow_ms=0.0, maxsize=10):
+    app = FastAPI()
+    app.state.request_profiles = ProfileStore(maxsize)
+    app.add_middleware(ProfilingMiddleware, store=app.state.request_profiles, sample_rate=sample_rate, slow_ms=slow_ms)
+    app.include_router(recipes_router.router)
+    app.include_router(debug.router)
+
+    @app.get("/sleep/{seconds}")
+    async def sleep(seconds: float):
+        started = time.perf_counter()
+        await asyncio.sleep(seconds)
+        profiling.record_span("sleeping", started)
+        return {}
+
+    repo = InMemoryRecipeRepository(seed=[
+        Recipe(
+            id=1, title="Chicken Curry", ingredients=["chicken"], steps=["Cook"], prepTime="5 minutes",
+            cookTime="20 minutes", difficulty="Easy", cuisine="Indian", source="internal",
+        )
+    ])
+    mealdb_client = MealDBClient(
+        redis_url="redis://127.0.0.1:1",
+        http_client=httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"meals": None}))
+        ),
+    )
+    response_cache = ResponseCache(maxsize=64, ttl=60)
+    app.dependency_overrides[recipes_router.get_repository] = lambda: repo
+    app.dependency_overrides[recipes_router.get_mealdb_client] = lambda: mealdb_client
+    app.dependency_overrides[recipes_router.get_search_response_cache] = lambda: response_cache
+    return TestClient(app)
+
+
+def test_sampled_search_has_spans_and_profile():
+    client = make_app(sample_rate=1.0)
+    assert client.get("/recipes/search?q=curry").status_code == 200
+
+    [summary] = client.get("/debug/profiles").json()["profiles"]
+    assert summary["reason"] == "sampled"
+    assert summary["profiled"]
+    assert (summary["route"], summary["query"], summary["status"]) == ("/recipes/search", "q=curry", 200)
+    names = [span["name"] for span in summary["spans"]]
+    for name in ("repo.data_version", "repo.search_recipes", "mealdb_client.search_recipes",
+                 "mealdb.http", "redis.get_cached_entry", "serialize"):
+        assert name in names
+    assert all(0 <= span["start_ms"] <= summary["duration_ms"] for span in summary["spans"])
+    assert "profile" not in summary
+
+    detail = client.get(f"/debug/profiles/{summary['id']}?limit=5").json()
+    assert "cumulative" in detail["profile"]
+    assert detail["spans"] == summary["spans"]
+
+
+def test_slow_requests_are_kept_without_profile():
+    client = make_app(slow_ms=50)
+    client.get("/sleep/0")
+    client.get("/sleep/0.06")
+
+    [summary] = client.get("/debug/profiles").json()["profiles"]
+    assert (summary["reason"], summary["path"], summary["profiled"]) == ("slow", "/sleep/0.06", False)
+    assert summary["duration_ms"] >= 50
+    assert [span["name"] for span in summary["spans"]] == ["sleeping"]
+    assert "profile" not in client.get(f"/debug/profiles/{summary['id']}").json()
+
+
+def test_buffer_keeps_last_requests():
+    client = make_app(sample_rate=1.0, maxsize=3)
+    for n in range(5):
+        client.get(f"/sleep/0?n={n}")
+
+    profiles = client.get("/debug/profiles").json()["profiles"]
+    # The /debug/profiles request itself is sampled after the listing is built
+    assert [p["query"] for p in profiles] == ["n=4", "n=3", "n=2"]
+    assert client.get(f"/debug/profiles/{profiles[-1]['id'] - 1}").status_code == 404
+
+
+def test_unsampled_fast_requests_are_not_kept():
+    client = make_app(sample_rate=0.0, slow_ms=1000)
+    client.get("/recipes/search?q=curry")
+    assert client.get("/debug/profiles").json() == {"profiles": []}
+
+
+def test_spans_are_ignored_outside_profiled_requests():
+    profiling.record_span("anything", time.perf_counter())
+    assert profiling._spans.get() is None
+
+
+@pytest.mark.skipif(config.PROFILING_ENABLED, reason="PROFILING_ENABLED is set")
+def test_debug_endpoint_is_off_by_default():
+    assert TestClient(main_app).get("/debug/profiles").status_code == 404
@@ -0,0 +1,539 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, RecipeDB
+from app.facets import RecipeFilters, backfill_recipe_minutes
+from app.models import Recipe, RecipeCreate
+from app.response_cache import render_json
+from app.repositories import (
+    AsyncSQLiteRecipeRepository,
+    InMemoryRecipeRepository,
+    SnapshotRecipeRepository,
+    SQLiteRecipeRepository,
+)
+from app.ingredients import backfill_ingredient_index
+from app.search_index import build_match_query, ensure_fts_index, rebuild_fts_index
+from app.snapshot import SnapshotStore
+from app.sqlite_tuning import ReadWriteSession, create_sqlite_engines
+
+
+def make_payload(title, ingredients=None, steps=None, cuisine="Test", **overrides):
+    data = dict(
+        title=title,
+        ingredients=ingredients or ["salt"],
+        steps=steps or ["Cook it"],
+        prepTime="5 minutes",
+        cookTime="10 minutes",
+        difficulty="Easy",
+        cuisine=cuisine,
+    )
+    data.update(overrides)
+    return RecipeCreate(**data)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'recipes.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    assert ensure_fts_index(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def repo(session_factory):
+    session = session_factory()
+    yield SQLiteRecipeRepository(session, full_text=True)
+    session.close()
+
+
+class TestFullTextSearch:
+    def test_matches_ingredients_steps_and_cuisine(self, repo):
+        repo.create_recipe(make_payload("Carbonara", ingredients=["pasta", "guanciale"], cuisine="Italian"))
+        repo.create_recipe(make_payload("Dal", steps=["Simmer the lentils"], cuisine="Indian"))
+
+        assert [r.title for r in repo.search_recipes("guanciale")] == ["Carbonara"]
+        assert [r.title for r in repo.search_recipes("lentils")] == ["Dal"]
+        assert [r.title for r in repo.search_recipes("indian")] == ["Dal"]
+
+    def test_prefix_and_case_insensitive(self, repo):
+        repo.create_recipe(make_payload("Chicken Tikka Masala"))
+        assert [r.title for r in repo.search_recipes("CHICK tik")] == ["Chicken Tikka Masala"]
+        assert repo.search_recipes("chicken beef") == []
+
+    def test_title_match_ranks_above_step_match(self, repo):
+        repo.create_recipe(make_payload("Stew", steps=["Add the garlic last"]))
+        repo.create_recipe(make_payload("Garlic Bread"))
+        assert [r.title for r in repo.search_recipes("garlic")] == ["Garlic Bread", "Stew"]
+
+    def test_index_follows_updates_and_deletes(self, repo):
+        created = repo.create_recipe(make_payload("Pancakes"))
+        repo.update_recipe(created.id, make_payload("Waffles"))
+        assert repo.search_recipes("pancakes") == []
+        assert [r.title for r in repo.search_recipes("waffles")] == ["Waffles"]
+
+        repo.delete_recipe(created.id)
+        assert repo.search_recipes("waffles") == []
+
+    def test_operator_input_is_treated_as_words(self, repo):
+        repo.create_recipe(make_payload("Fish and Chips"))
+        assert [r.title for r in repo.search_recipes('fish" AND (')] == ["Fish and Chips"]
+        assert build_match_query("!!!") is None
+        assert repo.search_recipes("!!!") == []
+
+
+class TestListing:
+    def test_keyset_pages_cover_every_row_once(self, repo):
+        for i in range(5):
+            repo.create_recipe(make_payload(f"Recipe {i}"))
+
+        seen, after = [], None
+        while True:
+            page = repo.list_recipes(limit=2, after=after)
+            if not page:
+                break
+            seen.extend(r.id for r in page)
+            after = page[-1].id
+        assert seen == [1, 2, 3, 4, 5]
+
+    def test_iter_recipes_crosses_batch_boundaries(self, repo):
+        for i in range(5):
+            repo.create_recipe(make_payload(f"Recipe {i}"))
+        assert [r.id for r in repo.iter_recipes(batch_size=2)] == [1, 2, 3, 4, 5]
+        assert [r.id for r in repo.iter_recipes(batch_size=5)] == [1, 2, 3, 4, 5]
+
+    def test_field_projection_skips_unrequested_columns(self, repo):
+        repo.create_recipe(make_payload("Soup", cuisine="French"))
+        assert repo.list_recipe_fields(["cuisine", "source"]) == [
+            {"id": 1, "cuisine": "French", "source": "internal"}
+        ]
+        with pytest.raises(ValueError):
+            repo.list_recipe_fields(["nope"])
+
+
+class TestBulkCreate:
+    def test_create_recipes_returns_ids_in_order(self, repo):
+        repo.create_recipe(make_payload("Existing"))
+        created = repo.create_recipes([make_payload("A"), make_payload("B"), make_payload("C")])
+        assert [(r.id, r.title) for r in created] == [(2, "A"), (3, "B"), (4, "C")]
+        assert [r.title for r in repo.search_recipes("b")] == ["B"]
+        assert repo.create_recipes([]) == []
+
+    def test_deleted_ids_are_not_reused(self, repo):
+        for backend in (repo, InMemoryRecipeRepository()):
+            _, last = backend.create_recipes([make_payload("A"), make_payload("B")])
+            assert backend.delete_recipe(last.id)
+            assert backend.create_recipe(make_payload("C")).id == last.id + 1
+
+    @pytest.mark.filterwarnings("ignore::UserWarning")
+    def test_failed_batch_is_rolled_back(self, repo):
+        # A set is not JSON serializable, so the INSERT fails mid-batch
+        broken = RecipeCreate.model_construct(**dict(make_payload("Broken").model_dump(), ingredients={"x"}))
+        with pytest.raises(SQLAlchemyError):
+            repo.create_recipes([make_payload("Ok"), broken])
+        assert repo.list_recipes() == []
+
+
+class TestConcurrentCreate:
+    THREADS = 8
+    PER_THREAD = 25
+
+    def _run(self, create):
+        def worker(n):
+            return [create(make_payload(f"T{n}-{i}")).id for i in range(self.PER_THREAD)]
+
+        with ThreadPoolExecutor(self.THREADS) as pool:
+            return [recipe_id for chunk in pool.map(worker, range(self.THREADS)) for recipe_id in chunk]
+
+    def test_sqlite_concurrent_writers_get_unique_ids(self, session_factory):
+        def create(payload):
+            session = session_factory()
+            try:
+                return SQLiteRecipeRepository(session, full_text=True).create_recipe(payload)
+            finally:
+                session.close()
+
+        ids = self._run(create)
+        assert sorted(ids) == list(range(1, self.THREADS * self.PER_THREAD + 1))
+
+    def test_in_memory_concurrent_writers_get_unique_ids(self):
+        repo = InMemoryRecipeRepository()
+        ids = self._run(repo.create_recipe)
+        assert sorted(ids) == list(range(1, self.THREADS * self.PER_THREAD + 1))
+        assert len(repo.list_recipes()) == len(ids)
+
+
+class TestIngredientSearch:
+    def test_ranks_by_coverage(self, repo):
+        repo.create_recipes([
+            make_payload("Bacon and Eggs", ingredients=["2 eggs", "4 slices bacon"]),
+            make_payload("Quiche", ingredients=["3 eggs", "bacon", "1 cup cream", "pastry"]),
+            make_payload("Rice", ingredients=["rice"]),
+        ])
+        results = repo.find_by_ingredients(["egg", "bacon"])
+        assert [(r.title, m.coverage) for r, m in results] == [("Bacon and Eggs", 1.0), ("Quiche", 0.5)]
+        assert results[1][1].missing == ("cream", "pastry")
+        assert [r.title for r, _ in repo.find_by_ingredients(["egg", "bacon", "cream"], min_match=3)] == ["Quiche"]
+
+    def test_index_follows_updates_and_deletes(self, repo):
+        created = repo.create_recipe(make_payload("Omelette", ingredients=["eggs"]))
+        repo.update_recipe(created.id, make_payload("Omelette", ingredients=["tofu"]))
+        assert repo.find_by_ingredients(["egg"]) == []
+        assert [r.title for r, _ in repo.find_by_ingredients(["tofu"])] == ["Omelette"]
+
+        repo.delete_recipe(created.id)
+        assert repo.find_by_ingredients(["tofu"]) == []
+
+    def test_backfill_indexes_rows_written_directly(self, engine, repo):
+        with engine.begin() as conn:
+            conn.execute(RecipeDB.__table__.insert(), [dict(
+                title="Legacy", ingredients=["1 cup Lentils"], steps=[], prepTime="", cookTime="",
+                difficulty="Easy", cuisine="Test",
+            )])
+        assert repo.find_by_ingredients(["lentil"]) == []
+        assert backfill_ingredient_index(engine) == 1
+        assert backfill_ingredient_index(engine) == 0
+        assert [r.title for r, _ in repo.find_by_ingredients(["lentil"])] == ["Legacy"]
+
+
+class TestFilters:
+    @pytest.fixture
+    def filled_repo(self, repo):
+        repo.create_recipes([
+            make_payload("Pasta Bake", cuisine="Italian", difficulty="Easy", prepTime="10 minutes", cookTime="30 minutes"),
+            make_payload("Risotto", cuisine="Italian", difficulty="Hard", prepTime="15 mins", cookTime="1 hour"),
+            make_payload("Dal", cuisine="Indian", difficulty="Easy", prepTime="5 minutes", cookTime="20 minutes"),
+            make_payload("Curry Pasta", cuisine="Indian", difficulty="Medium", prepTime="Not specified", cookTime="40 minutes"),
+        ])
+        return repo
+
+    def test_cuisine_difficulty_and_time_filters(self, filled_repo):
+        def titles(**filters):
+            return [r.title for r in filled_repo.list_recipes(filters=RecipeFilters(**filters))]
+
+        assert titles(cuisine=("Italian",)) == ["Pasta Bake", "Risotto"]
+        assert titles(cuisine=("Italian", "Indian"), difficulty=("Easy",)) == ["Pasta Bake", "Dal"]
+        assert titles(max_cook_minutes=30) == ["Pasta Bake", "Dal"]
+        assert titles(max_total_minutes=25) == ["Dal"]
+        assert titles(max_prep_minutes=60) == ["Pasta Bake", "Risotto", "Dal"]
+
+    def test_filters_apply_to_search_and_projection(self, filled_repo):
+        filters = RecipeFilters(cuisine=("Indian",))
+        assert [r.title for r in filled_repo.search_recipes("pasta", filters)] == ["Curry Pasta"]
+        assert filled_repo.list_recipe_fields(["title"], filters=filters) == [
+            {"id": 3, "title": "Dal"}, {"id": 4, "title": "Curry Pasta"},
+        ]
+
+    def test_facet_counts(self, filled_repo):
+        assert filled_repo.facet_counts() == {
+            "cuisine": {"Italian": 2, "Indian": 2},
+            "difficulty": {"Easy": 2, "Hard": 1, "Medium": 1},
+        }
+        assert filled_repo.facet_counts(RecipeFilters(difficulty=("Easy",))) == {
+            "cuisine": {"Italian": 1, "Indian": 1},
+            "difficulty": {"Easy": 2},
+        }
+
+    def test_in_memory_buckets_match_sqlite(self, filled_repo):
+        memory_repo = InMemoryRecipeRepository(seed=filled_repo.list_recipes())
+        for filters in (RecipeFilters(), RecipeFilters(cuisine=("Indian",)), RecipeFilters(max_total_minutes=40)):
+            assert memory_repo.list_recipes(filters=filters) == filled_repo.list_recipes(filters=filters)
+            assert memory_repo.facet_counts(filters) == filled_repo.facet_counts(filters)
+
+        recipe = memory_repo.list_recipes()[0]
+        memory_repo.update_recipe(recipe.id, make_payload("Pasta Bake", cuisine="French"))
+        assert memory_repo.facet_counts()["cuisine"] == {"Indian": 2, "Italian": 1, "French": 1}
+
+    def test_times_are_parsed_on_write_and_backfilled(self, engine, filled_repo):
+        with engine.begin() as conn:
+            conn.execute(RecipeDB.__table__.insert(), [dict(
+                title="Legacy", ingredients=[], steps=[], prepTime="1 hr", cookTime="2 hours",
+                difficulty="Easy", cuisine="Test",
+            )])
+            stored = conn.execute(text("SELECT title, prep_minutes, cook_minutes FROM recipes ORDER BY id")).all()
+        assert stored[:2] == [("Pasta Bake", 10, 30), ("Risotto", 15, 60)]
+        assert stored[-1] == ("Legacy", None, None)
+
+        assert backfill_recipe_minutes(engine) == 1
+        assert [r.title for r in filled_repo.list_recipes(filters=RecipeFilters(max_prep_minutes=60, cuisine=("Test",)))] == ["Legacy"]
+
+
+class TestInMemoryIndexes:
+    def test_title_search_matches_substrings_in_id_order(self):
+        repo = InMemoryRecipeRepository()
+        repo.create_recipes([make_payload(t) for t in ["Chicken Curry", "Beef Stew", "Curried Chickpeas", "Ox"]])
+        assert [r.title for r in repo.search_recipes("CURR")] == ["Chicken Curry", "Curried Chickpeas"]
+        assert [r.title for r in repo.search_recipes("ck")] == ["Chicken Curry", "Curried Chickpeas"]
+        assert [r.title for r in repo.search_recipes("ox")] == ["Ox"]
+        assert repo.search_recipes("curry stew") == []
+
+    def test_indexes_follow_updates_and_deletes(self):
+        repo = InMemoryRecipeRepository(seed=[
+            Recipe(id=7, source="internal", **make_payload("Pancakes").model_dump()),
+            Recipe(id=3, source="internal", **make_payload("Waffles").model_dump()),
+        ])
+        assert [r.id for r in repo.list_recipes()] == [3, 7]
+        assert repo.create_recipe(make_payload("Crepes")).id == 8
+
+        repo.update_recipe(3, make_payload("Blini"))
+        assert repo.search_recipes("waffle") == []
+        assert [r.id for r in repo.search_recipes("blini")] == [3]
+
+        assert repo.delete_recipe(7)
+        assert repo.get_recipe(7) is None
+        assert repo.search_recipes("pancake") == []
+        assert [r.id for r in repo.list_recipes(after=3)] == [8]
+        assert [r.id for r in repo.iter_recipes(batch_size=1)] == [3, 8]
+
+    def test_concurrent_reads_during_writes(self):
+        repo = InMemoryRecipeRepository()
+
+        def write(n):
+            for i in range(50):
+                created = repo.create_recipe(make_payload(f"Dish {n}-{i}"))
+                if i % 2:
+                    repo.delete_recipe(created.id)
+            return n
+
+        def read(_):
+            for _ in range(50):
+                repo.search_recipes("dish")
+                repo.list_recipes(limit=10, after=5)
+            return _
+
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda n: write(n) if n % 2 else read(n), range(8)))
+        assert len(repo.search_recipes("dish")) == len(repo.list_recipes()) == 100
+
+
+class TestSnapshotRepository:
+    @pytest.fixture
+    def snapshot_repo(self, engine, repo):
+        repo.create_recipes([
+            make_payload("Carbonara", ingredients=["pasta", "eggs"], cuisine="Italian"),
+            make_payload("Dal", steps=["Simmer the lentils"], cuisine="Indian", cookTime="40 minutes"),
+        ])
+        return SnapshotRecipeRepository(SnapshotStore.load(engine), repo)
+
+    def test_reads_match_sqlite(self, repo, snapshot_repo):
+        assert snapshot_repo.list_recipes() == repo.list_recipes()
+        assert snapshot_repo.list_recipes(limit=1, after=1) == repo.list_recipes(limit=1, after=1)
+        assert snapshot_repo.get_recipe(2) == repo.get_recipe(2)
+        assert snapshot_repo.get_recipe(99) is None
+        assert snapshot_repo.list_recipe_fields(["title", "source"]) == repo.list_recipe_fields(["title", "source"])
+        assert list(snapshot_repo.iter_recipes()) == repo.list_recipes()
+        for filters in (RecipeFilters(cuisine=("Indian",)), RecipeFilters(max_cook_minutes=20)):
+            assert snapshot_repo.list_recipes(filters=filters) == repo.list_recipes(filters=filters)
+            assert snapshot_repo.facet_counts(filters) == repo.facet_counts(filters)
+        assert [r.title for r in snapshot_repo.search_recipes("lentil")] == ["Dal"]
+        assert snapshot_repo.search_recipes("lentil", RecipeFilters(cuisine=("Italian",))) == []
+
+    def test_pre_encoded_json_matches_response_rendering(self, repo, snapshot_repo):
+        assert snapshot_repo.get_recipe_json(1) == render_json(repo.get_recipe(1).model_dump())
+        assert snapshot_repo.list_recipes_json(limit=1) == [(1, render_json(repo.get_recipe(1).model_dump()))]
+
+    def test_writes_publish_a_new_snapshot(self, snapshot_repo):
+        store = snapshot_repo.store
+        before = store.current
+        created = snapshot_repo.create_recipe(make_payload("Waffles"))
+        snapshot_repo.update_recipe(1, make_payload("Cacio e Pepe", cuisine="Italian"))
+        snapshot_repo.delete_recipe(2)
+
+        assert [r.title for r in snapshot_repo.list_recipes()] == ["Cacio e Pepe", "Waffles"]
+        assert snapshot_repo.get_recipe(created.id) == created
+        assert snapshot_repo.data_version() == before.version + 3
+        # Readers holding the old snapshot still see the old data
+        assert [r.title for r in before.records] == ["Carbonara", "Dal"]
+
+    def test_title_search_without_full_text(self, engine, session_factory):
+        session = session_factory()
+        try:
+            writer = SQLiteRecipeRepository(session, full_text=False)
+            writer.create_recipe(make_payload("Chicken Curry"))
+            snapshot_repo = SnapshotRecipeRepository(SnapshotStore.load(engine), writer)
+            assert [r.title for r in snapshot_repo.search_recipes("CURR")] == ["Chicken Curry"]
+        finally:
+            session.close()
+
+
+class TestAsyncRepository:
+    """AsyncSQLiteRecipeRepository returns what the sync repository does"""
+
+    def _run(self, tmp_path, session_factory, scenario):
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async def run():
+            async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'recipes.db'}")
+            try:
+                async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+                    return await scenario(AsyncSQLiteRecipeRepository(db, full_text=True))
+            finally:
+                await async_engine.dispose()
+
+        return asyncio.run(run())
+
+    def test_reads_match_sync_repository(self, tmp_path, session_factory, repo):
+        repo.create_recipes([
+            make_payload("Carbonara", ingredients=["pasta", "eggs", "bacon"], cuisine="Italian"),
+            make_payload("Dal", steps=["Simmer the lentils"], cuisine="Indian", cookTime="40 minutes"),
+        ])
+        filters = RecipeFilters(cuisine=("Indian",))
+
+        async def scenario(async_repo):
+            return (
+                await async_repo.list_recipes(limit=1, after=1),
+                await async_repo.list_recipes(filters=filters),
+                await async_repo.list_recipe_fields(["title", "source"]),
+                await async_repo.facet_counts(),
+                await async_repo.search_recipes("lentil"),
+                await async_repo.find_by_ingredients(["egg", "bacon"]),
+                await async_repo.get_recipe(1),
+                [recipe async for recipe in async_repo.iter_recipes(batch_size=1)],
+                await async_repo.data_version(),
+            )
+
+        assert self._run(tmp_path, session_factory, scenario) == (
+            repo.list_recipes(limit=1, after=1),
+            repo.list_recipes(filters=filters),
+            repo.list_recipe_fields(["title", "source"]),
+            repo.facet_counts(),
+            repo.search_recipes("lentil"),
+            repo.find_by_ingredients(["egg", "bacon"]),
+            repo.get_recipe(1),
+            repo.list_recipes(),
+            repo.data_version(),
+        )
+
+    def test_writes_are_visible_to_sync_repository(self, tmp_path, session_factory, repo):
+        async def scenario(async_repo):
+            created = await async_repo.create_recipes([make_payload("Pancakes"), make_payload("Waffles")])
+            updated = await async_repo.update_recipe(created[0].id, make_payload("Blini", ingredients=["buckwheat"]))
+            assert await async_repo.delete_recipe(created[1].id)
+            assert not await async_repo.delete_recipe(99)
+            assert await async_repo.update_recipe(99, make_payload("Nothing")) is None
+            return updated
+
+        updated = self._run(tmp_path, session_factory, scenario)
+        assert repo.list_recipes() == [updated]
+        assert [r.title for r, _ in repo.find_by_ingredients(["buckwheat"])] == ["Blini"]
+        assert [r.title for r in repo.search_recipes("blini")] == ["Blini"]
+        assert repo.data_version() == 3
+
+
+class TestSQLiteProfiles:
+    @pytest.fixture
+    def split_engines(self, tmp_path):
+        engine, read_engine = create_sqlite_engines(
+            make_url(f"sqlite:///{tmp_path / 'recipes.db'}"), "tuned", read_pool_size=2
+        )
+        Base.metadata.create_all(bind=engine)
+        ensure_fts_index(engine)
+        yield engine, read_engine
+        read_engine.dispose()
+        engine.dispose()
+
+    def test_tuned_pragmas_are_applied(self, split_engines):
+        engine, read_engine = split_engines
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+            assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2
+        with read_engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+            with pytest.raises(SQLAlchemyError):
+                conn.exec_driver_sql("DELETE FROM recipes")
+
+    def test_default_profile_keeps_one_engine(self, tmp_path):
+        engine, read_engine = create_sqlite_engines(make_url(f"sqlite:///{tmp_path / 'db'}"), "default", 4)
+        assert read_engine is None
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+        with pytest.raises(ValueError):
+            create_sqlite_engines(make_url("sqlite://"), "fast", 0)
+
+    def test_repository_on_read_write_session(self, split_engines):
+        engine, read_engine = split_engines
+        factory = sessionmaker(class_=ReadWriteSession, writer=engine, reader=read_engine)
+
+        def create(payload):
+            session = factory()
+            try:
+                return SQLiteRecipeRepository(session, full_text=True).create_recipe(payload)
+            finally:
+                session.close()
+
+        # Writers queue on the single writer connection
+        with ThreadPoolExecutor(4) as pool:
+            ids = list(pool.map(lambda i: create(make_payload(f"Soup {i}")).id, range(20)))
+        assert sorted(ids) == list(range(1, 21))
+
+        session = factory()
+        try:
+            repo = SQLiteRecipeRepository(session, full_text=True)
+            repo.update_recipe(1, make_payload("Stew", ingredients=["beef"]))
+            assert repo.delete_recipe(2)
+            assert [r.title for r in repo.search_recipes("stew")] == ["Stew"]
+            assert [r.title for r, _ in repo.find_by_ingredients(["beef"])] == ["Stew"]
+            assert len(repo.list_recipes()) == 19
+            assert repo.data_version() == 22
+            assert session.get_bind(clause=text("SELECT 1")) is read_engine
+        finally:
+            session.close()
+
+
+class TestDataVersion:
+    def test_every_write_bumps_the_version(self, repo):
+        assert repo.data_version() == 0
+        created = repo.create_recipe(make_payload("Pancakes"))
+        assert repo.data_version() == 1
+        repo.create_recipes([make_payload("Waffles"), make_payload("Crepes")])
+        assert repo.data_version() == 2
+        repo.update_recipe(created.id, make_payload("Blini"))
+        assert repo.data_version() == 3
+        repo.delete_recipe(created.id)
+        assert repo.data_version() == 4
+
+    def test_reads_and_missed_writes_keep_the_version(self, repo):
+        repo.search_recipes("anything")
+        assert repo.update_recipe(999, make_payload("Nothing")) is None
+        assert not repo.delete_recipe(999)
+        assert repo.data_version() == 0
+
+    def test_in_memory_repository_tracks_writes(self):
+        memory_repo = InMemoryRecipeRepository()
+        created = memory_repo.create_recipe(make_payload("Pancakes"))
+        memory_repo.update_recipe(created.id, make_payload("Waffles"))
+        memory_repo.delete_recipe(created.id)
+        assert memory_repo.data_version() == 3
+
+
+def test_ensure_backfills_existing_rows(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            RecipeDB.__table__.insert(),
+            [{"id": 1, "title": "Legacy Lasagne", "ingredients": ["pasta"], "steps": ["Bake"],
+              "prepTime": "", "cookTime": "", "difficulty": "", "cuisine": "Italian"}],
+        )
+
+    assert ensure_fts_index(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        repo = SQLiteRecipeRepository(session, full_text=True)
+        assert [r.title for r in repo.search_recipes("lasagne")] == ["Legacy Lasagne"]
+
+        rebuild_fts_index(engine)
+        assert [r.id for r in repo.search_recipes("lasagne")] == [1]
+    finally:
+        session.close()
@@ -0,0 +1,87 @@
+import json
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.request_log import RequestLog, RequestLogMiddleware
+
+
+class Payload(BaseModel):
+    title: str
+
+
+def make_app(log, **options):
+    app = FastAPI()
+    app.add_middleware(RequestLogMiddleware, log=log, **options)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/cached")
+    async def cached():
+        return Response(content=b"{}", media_type="application/json", headers={"X-Cache": "HIT"})
+
+    @app.post("/items", status_code=201)
+    async def create_item(payload: Payload):
+        return payload
+
+    return TestClient(app)
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_requests_are_written_as_json_lines(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    log = RequestLog(str(path))
+    client = make_app(log)
+    client.get("/items/7?fields=id")
+    client.get("/missing")
+    log.close()
+
+    first, second = read_records(path)
+    assert (first["method"], first["path"], first["query"]) == ("GET", "/items/7", "fields=id")
+    assert (first["route"], first["status"]) == ("/items/{item_id}", 200)
+    assert first["duration_ms"] >= 0 and first["ts"] > 0
+    assert "body" not in first
+    assert (second["route"], second["status"]) == (None, 404)
+    assert log.written == 2
+
+
+def test_cache_header_is_recorded(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    log = RequestLog(str(path))
+    client = make_app(log)
+    client.get("/cached")
+    log.close()
+    [record] = read_records(path)
+    assert record["cache"] == "HIT"
+
+
+def test_bodies_are_kept_up_to_the_limit(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    log = RequestLog(str(path))
+    client = make_app(log, max_body_bytes=30)
+    assert client.post("/items", json={"title": "Soup"}).status_code == 201
+    assert client.post("/items", json={"title": "A much longer recipe title"}).status_code == 201
+    log.close()
+
+    short, long = read_records(path)
+    assert json.loads(short["body"]) == {"title": "Soup"}
+    assert "body" not in long and long["body_truncated"] is True
+
+
+def test_sample_rate_skips_requests(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    log = RequestLog(str(path))
+    draws = iter([0.9, 0.1])
+    client = make_app(log, sample_rate=0.5, rng=lambda: next(draws))
+    client.get("/items/1")
+    client.get("/items/2")
+    log.close()
+
+    assert [record["path"] for record in read_records(path)] == ["/items/2"]